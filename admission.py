@@ -0,0 +1,246 @@
+"""
+Controle de admissão para execuções do agente (Chromium + LLM).
+
+Limita quantos agentes rodam ao mesmo tempo, mantém uma fila de espera limitada
+com tempo máximo de espera e distribui as vagas entre as API keys de forma
+proporcional ao peso do seu role, para que um cliente não monopolize o serviço.
+Em modo multi-worker, um semáforo global (SharedSlotGate) limita também a soma das
+execuções de todos os processos.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from collections import deque, defaultdict
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, Any, Deque
+
+logger = logging.getLogger("browser-use-api.admission")
+
+# Sentinela para "usar o tempo máximo de espera configurado"
+DEFAULT_WAIT = object()
+
+
+class AdmissionRejected(Exception):
+    """Execução recusada; status_code e retry_after devem ser repassados ao cliente"""
+
+    def __init__(self, status_code: int, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    def __init__(self, tenant: str, future: asyncio.Future):
+        self.tenant = tenant
+        self.future = future
+        self.enqueued_at = time.time()
+
+
+class AdmissionTicket:
+    """Vaga concedida a uma execução"""
+
+    def __init__(self, tenant: str, queue_wait: float):
+        self.tenant = tenant
+        self.queue_wait = queue_wait
+
+
+def parse_role_weights(value: str) -> Dict[str, float]:
+    """Converte 'admin:2,developer:1' em {'admin': 2.0, 'developer': 1.0}"""
+    weights = {}
+    for item in (value or "").split(","):
+        if ":" not in item:
+            continue
+        role, weight = item.split(":", 1)
+        try:
+            weights[role.strip()] = max(0.1, float(weight))
+        except ValueError:
+            logger.warning(f"Peso inválido para o role '{role}': {weight}")
+    return weights
+
+
+class AdmissionController:
+    """
+    Semáforo com fila justa por cliente.
+
+    Args:
+        max_concurrent: Execuções simultâneas permitidas
+        max_queue: Execuções aguardando vaga (acima disso responde 503)
+        max_queue_per_tenant: Execuções aguardando por cliente (acima disso responde 429)
+        max_queue_wait: Tempo máximo, em segundos, de espera na fila (SLA)
+        role_weights: Peso de cada role na divisão das vagas
+        shared_gate: Semáforo global entre processos (SharedSlotGate), opcional
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 4,
+        max_queue: int = 20,
+        max_queue_per_tenant: int = 10,
+        max_queue_wait: float = 60.0,
+        role_weights: Optional[Dict[str, float]] = None,
+        shared_gate=None,
+    ):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.max_queue_per_tenant = max(0, max_queue_per_tenant)
+        self.max_queue_wait = max_queue_wait
+        self.role_weights = role_weights or {}
+        self.shared_gate = shared_gate
+
+        self._in_use = 0
+        self._active: Dict[str, int] = defaultdict(int)
+        self._weights: Dict[str, float] = {}
+        self._waiting: Dict[str, Deque[_Waiter]] = {}
+        # Média móvel da duração das execuções, usada para estimar o Retry-After
+        self._avg_hold_time = 30.0
+
+        self._stats = {
+            "admitted": 0,
+            "rejected_tenant_queue_full": 0,
+            "rejected_queue_full": 0,
+            "rejected_queue_timeout": 0,
+            "total_queue_wait": 0.0,
+            "max_queue_wait_seen": 0.0,
+        }
+
+    def queue_depth(self) -> int:
+        return sum(len(q) for q in self._waiting.values())
+
+    def _retry_after(self) -> int:
+        waves = (self.queue_depth() + 1) / self.max_concurrent
+        return max(1, math.ceil(self._avg_hold_time * waves))
+
+    def _grant(self, tenant: str):
+        self._in_use += 1
+        self._active[tenant] += 1
+
+    def _release(self, tenant: str, hold_time: float):
+        self._in_use -= 1
+        self._active[tenant] -= 1
+        if self._active[tenant] <= 0:
+            del self._active[tenant]
+        self._avg_hold_time = 0.8 * self._avg_hold_time + 0.2 * hold_time
+        self._dispatch()
+
+    def _next_tenant(self) -> Optional[str]:
+        """Cliente com menos vagas em uso relativamente ao seu peso (desempate: espera mais antiga)"""
+        candidates = [t for t, q in self._waiting.items() if q]
+        if not candidates:
+            return None
+        return min(
+            candidates,
+            key=lambda t: (self._active.get(t, 0) / self._weights.get(t, 1.0), self._waiting[t][0].enqueued_at),
+        )
+
+    def _dispatch(self):
+        while self._in_use < self.max_concurrent:
+            tenant = self._next_tenant()
+            if tenant is None:
+                return
+            waiter = self._waiting[tenant].popleft()
+            if not self._waiting[tenant]:
+                del self._waiting[tenant]
+            if waiter.future.done():
+                continue
+            self._grant(tenant)
+            waiter.future.set_result(True)
+
+    def _remove_waiter(self, waiter: _Waiter):
+        queue = self._waiting.get(waiter.tenant)
+        if queue and waiter in queue:
+            queue.remove(waiter)
+            if not queue:
+                del self._waiting[waiter.tenant]
+
+    def _reject(self, stat: str, status_code: int, detail: str):
+        self._stats[stat] += 1
+        retry_after = self._retry_after()
+        logger.warning(f"Admissão recusada ({status_code}): {detail}. Retry-After: {retry_after}s")
+        raise AdmissionRejected(status_code, detail, retry_after)
+
+    @asynccontextmanager
+    async def admit(self, tenant: str, role: str, wait_timeout=DEFAULT_WAIT, enforce_limits: bool = True):
+        """
+        Aguarda uma vaga para executar o agente.
+
+        Args:
+            tenant: Identificador do cliente (derivado da API key)
+            role: Role da API key, usado para o peso na divisão justa
+            wait_timeout: Espera máxima; None espera indefinidamente
+            enforce_limits: Se False, ignora os limites da fila (usado pela fila assíncrona)
+        """
+        if wait_timeout is DEFAULT_WAIT:
+            wait_timeout = self.max_queue_wait
+        self._weights[tenant] = self.role_weights.get(role, 1.0)
+        start = time.time()
+
+        if self._in_use < self.max_concurrent and not self.queue_depth():
+            self._grant(tenant)
+        else:
+            if enforce_limits:
+                if self.max_queue_per_tenant and len(self._waiting.get(tenant, ())) >= self.max_queue_per_tenant:
+                    self._reject("rejected_tenant_queue_full", 429, f"Limite de {self.max_queue_per_tenant} execuções aguardando por cliente atingido")
+                if self.queue_depth() >= self.max_queue:
+                    self._reject("rejected_queue_full", 503, f"Fila de execuções cheia ({self.max_queue})")
+
+            waiter = _Waiter(tenant, asyncio.get_running_loop().create_future())
+            self._waiting.setdefault(tenant, deque()).append(waiter)
+            try:
+                await asyncio.wait_for(waiter.future, timeout=wait_timeout)
+            except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+                if waiter.future.done() and not waiter.future.cancelled():
+                    # A vaga foi concedida no mesmo instante do timeout/cancelamento
+                    self._release(tenant, 0.0)
+                else:
+                    self._remove_waiter(waiter)
+                if isinstance(e, asyncio.TimeoutError):
+                    self._reject("rejected_queue_timeout", 503, f"Tempo máximo de espera na fila ({wait_timeout}s) excedido")
+                raise
+
+        slot_id = None
+        if self.shared_gate is not None:
+            remaining = None if wait_timeout is None else max(0.0, wait_timeout - (time.time() - start))
+            try:
+                slot_id = await self.shared_gate.acquire(tenant, remaining)
+            except asyncio.TimeoutError:
+                self._release(tenant, 0.0)
+                self._reject("rejected_queue_timeout", 503, f"Tempo máximo de espera por vaga global ({wait_timeout}s) excedido")
+            except BaseException:
+                self._release(tenant, 0.0)
+                raise
+
+        queue_wait = time.time() - start
+        self._stats["admitted"] += 1
+        self._stats["total_queue_wait"] += queue_wait
+        self._stats["max_queue_wait_seen"] = max(self._stats["max_queue_wait_seen"], queue_wait)
+
+        hold_start = time.time()
+        try:
+            yield AdmissionTicket(tenant, queue_wait)
+        finally:
+            self._release(tenant, time.time() - hold_start)
+            if slot_id is not None:
+                await self.shared_gate.release(slot_id)
+
+    def stats(self) -> Dict[str, Any]:
+        admitted = self._stats["admitted"]
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "max_queue_per_tenant": self.max_queue_per_tenant,
+            "max_queue_wait": self.max_queue_wait,
+            "in_use": self._in_use,
+            "queue_depth": self.queue_depth(),
+            "active_by_tenant": dict(self._active),
+            "waiting_by_tenant": {t: len(q) for t, q in self._waiting.items()},
+            "admitted": admitted,
+            "rejected_tenant_queue_full": self._stats["rejected_tenant_queue_full"],
+            "rejected_queue_full": self._stats["rejected_queue_full"],
+            "rejected_queue_timeout": self._stats["rejected_queue_timeout"],
+            "avg_queue_wait": round(self._stats["total_queue_wait"] / admitted, 3) if admitted else 0.0,
+            "max_queue_wait_seen": round(self._stats["max_queue_wait_seen"], 3),
+            "avg_execution_time": round(self._avg_hold_time, 2),
+        }
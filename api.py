@@ -1,50 +1,120 @@
-from fastapi import FastAPI, Depends, HTTPException, status, Request, BackgroundTasks
+from fastapi import FastAPI, Depends, HTTPException, status, Request, Response, BackgroundTasks
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi.responses import StreamingResponse, PlainTextResponse
 from pydantic import BaseModel
 from langchain_openai import ChatOpenAI
 from langchain_deepseek import ChatDeepSeek
-from browser_use import Agent, Browser, BrowserConfig
+from browser_use import Agent
 import asyncio
 import os
 import json
 import secrets
+import hashlib
 import logging
 import traceback
 import time
 import sys
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Optional, Dict, Any, List, Union
+from typing import Optional, Dict, Any, List, Union, Callable, Awaitable, AsyncIterator, Literal
 from dotenv import load_dotenv
-import tempfile
+import psutil
 
 # Importar watchtower para CloudWatch logging
 import watchtower
 
+from browser_pool import BrowserPool
+from task_queue import TaskScheduler, InMemoryJobStore, SQLiteJobStore, QueueFullError
+from admission import AdmissionController, AdmissionRejected, parse_role_weights
+from llm_clients import LLMClientCache
+from result_cache import ResultCache, MemoryResultCache, DiskResultCache, task_cache_key
+from page_readiness import navigate_and_wait_ready
+from load_profiles import LoadProfileStore, profile_key
+from task_events import TaskEventBus, format_sse, summarize_agent_step
+from batch import run_batch, batch_stats
+from shared_state import SharedSlotGate
+from log_pipeline import AsyncLogHandler
+from log_store import IndexedRotatingFileHandler, tail_lines
+from metrics import MetricsRegistry, LabelLimiter, LLMLatencyCallback, task_labels
+from usage import TaskUsage, UsageCallback, current_usage, budget_exceeded, partial_result
+from recipes import RecipeRegistry, Recipe
+from replay import ReplayStore, ScriptReplayer, ReplayError, result_matches_example
+from render_profiles import RenderProfiles, parse_domain_profiles
+from asset_cache import AssetCache
+from task_lifecycle import LifecycleManager, OrphanReaper, TaskBudgets, TaskHandle, TaskTimeout, TaskCancelled
+from diagnostic_browser import DiagnosticBrowser, DiagnosticBusy
+from mock_llm import create_mock_llm
+from llm_cache import DiskLLMCache, llm_cache_enabled
+from logging.handlers import RotatingFileHandler
+
 # Carregar variáveis de ambiente com prioridade absoluta
 load_dotenv(override=True)
 
+# Modo multi-worker: API_WORKERS processos uvicorn, cada um com seu pool de navegadores.
+# Fila de tarefas, cache de resultados e limite global de agentes passam a ser
+# compartilhados entre os processos via SQLite.
+API_WORKERS = int(os.getenv("API_WORKERS", "1"))
+MULTI_WORKER = API_WORKERS > 1
+
 # Configuração de logging avançada
 log_dir = "logs"
 os.makedirs(log_dir, exist_ok=True)
 
+def worker_log_path(path: str) -> str:
+    """
+    Em modo multi-worker cada processo grava seus próprios arquivos de log e índice
+    (ex.: logs/api.12345.log): a rotação e os offsets do índice pressupõem um único
+    processo escrevendo no arquivo.
+    """
+    if not MULTI_WORKER:
+        return path
+    directory, name = os.path.split(path)
+    stem, dot, extensions = name.partition(".")
+    return os.path.join(directory, f"{stem}.{os.getpid()}{dot}{extensions}")
+
 # Obter nome do grupo de logs do ambiente, default para "BrowserUseAPI"
 LOG_GROUP_NAME = os.getenv("LOG_GROUP_NAME", "BrowserUseAPILogs")
 # Obter nome do stream de logs do ambiente, default para "api"
 LOG_STREAM_NAME_API = os.getenv("LOG_STREAM_NAME_API", "api-logs")
 LOG_STREAM_NAME_DIAG = os.getenv("LOG_STREAM_NAME_DIAG", "diag-logs")
 
+# Rotação dos arquivos de log (LOG_MAX_BYTES=0 desabilita)
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(50 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+
 # Logger principal
 logger = logging.getLogger("browser-use-api")
 logger.setLevel(logging.INFO)
 logger.addHandler(logging.StreamHandler(sys.stdout))
-logger.addHandler(logging.FileHandler(f"{log_dir}/api.log"))
+logger.addHandler(RotatingFileHandler(worker_log_path(f"{log_dir}/api.log"), maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT))
 
 # Logger específico para diagnóstico do browser_use
 diag_logger = logging.getLogger("browser-use-diag")
 diag_logger.setLevel(logging.DEBUG) # Mantido como DEBUG para logs detalhados
-diag_handler = logging.FileHandler(f"{log_dir}/browser_use_debug.log")
+# Cada registro é indexado (task_id, nível, timestamp, posição) para a consulta em GET /logs
+diag_handler = IndexedRotatingFileHandler(
+    worker_log_path(f"{log_dir}/browser_use_debug.log"),
+    max_bytes=LOG_MAX_BYTES,
+    backup_count=LOG_BACKUP_COUNT,
+    index_path=worker_log_path(os.getenv("LOG_INDEX_PATH", f"{log_dir}/browser_use_debug.index.db")),
+)
 diag_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
-diag_logger.addHandler(diag_handler)
+# A escrita em disco/CloudWatch acontece em uma thread própria, fora do loop de eventos
+diag_pipeline = AsyncLogHandler(
+    targets=[diag_handler],
+    max_queue=int(os.getenv("LOG_PIPELINE_MAX_QUEUE", "10000")),
+    batch_size=int(os.getenv("LOG_PIPELINE_BATCH_SIZE", "500")),
+    flush_interval=float(os.getenv("LOG_PIPELINE_FLUSH_INTERVAL", "0.2")),
+    debug_sample_every=int(os.getenv("LOG_PIPELINE_DEBUG_SAMPLE_EVERY", "10")),
+)
+# Saída no terminal também passa pela fila; sem propagação para o root (o browser_use
+# instala lá um StreamHandler síncrono que escreveria cada evento no loop de eventos)
+diag_console_handler = logging.StreamHandler(sys.stdout)
+diag_console_handler.setLevel(os.getenv("LOG_DIAG_CONSOLE_LEVEL", "INFO").upper())
+diag_console_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+diag_pipeline.add_target(diag_console_handler)
+diag_logger.addHandler(diag_pipeline)
+diag_logger.propagate = False
 
 # Configurar Watchtower se estiver em ambiente de produção e LOG_GROUP_NAME estiver definido
 if os.getenv("ENVIRONMENT", "development").lower() == "production" and LOG_GROUP_NAME:
@@ -68,7 +138,7 @@ if os.getenv("ENVIRONMENT", "development").lower() == "production" and LOG_GROUP
             create_log_group=True # O grupo já deve ter sido criado acima, mas para garantir
         )
         cw_handler_diag.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
-        diag_logger.addHandler(cw_handler_diag)
+        diag_pipeline.add_target(cw_handler_diag)
         diag_logger.info(f"Watchtower configurado para o logger de diagnóstico. Grupo: {LOG_GROUP_NAME}, Stream: {LOG_STREAM_NAME_DIAG}")
 
     except Exception as e:
@@ -83,6 +153,97 @@ app = FastAPI(
     version="1.0.0"
 )
 
+SHARED_STATE_DB_PATH = os.getenv("SHARED_STATE_DB_PATH", "data/shared_state.db")
+
+# Métricas Prometheus (GET /metrics): duração por fase com labels de modelo e domínio
+metrics = MetricsRegistry()
+TASK_PHASE_SECONDS = metrics.histogram(
+    "browser_use_task_phase_seconds",
+    "Duração de cada fase da tarefa (browser_acquire, page_readiness, recipe, replay, agent, result_parsing, cleanup)",
+    ["phase", "model", "domain"],
+)
+AGENT_STEP_SECONDS = metrics.histogram(
+    "browser_use_agent_step_seconds", "Duração de cada passo do agente", ["model", "domain"]
+)
+LLM_REQUEST_SECONDS = metrics.histogram(
+    "browser_use_llm_request_seconds", "Latência das chamadas ao LLM", ["model", "domain", "outcome"]
+)
+BROWSER_LAUNCH_SECONDS = metrics.histogram(
+    "browser_use_browser_launch_seconds", "Tempo de lançamento de um navegador do pool"
+)
+TASK_DURATION_SECONDS = metrics.histogram(
+    "browser_use_task_duration_seconds", "Duração total da tarefa", ["model", "domain", "status"]
+)
+TASKS_TOTAL = metrics.counter("browser_use_tasks_total", "Tarefas executadas", ["model", "domain", "status"])
+RECIPE_RUNS_TOTAL = metrics.counter("browser_use_recipe_runs_total", "Execuções de receitas de extração", ["recipe", "outcome"])
+REPLAY_RUNS_TOTAL = metrics.counter("browser_use_replay_runs_total", "Replays de execuções gravadas do agente", ["outcome"])
+LLM_CACHE_LOOKUPS_TOTAL = metrics.counter("browser_use_llm_cache_lookups_total", "Consultas ao cache de respostas do LLM", ["outcome"])
+LLM_TOKENS_TOTAL = metrics.counter("browser_use_llm_tokens_total", "Tokens consumidos", ["model", "domain", "direction"])
+BROWSERS_GAUGE = metrics.gauge("browser_use_browsers", "Navegadores do pool por estado", ["state"])
+BROWSER_LEASES_GAUGE = metrics.gauge("browser_use_browser_leases_active", "Contextos emprestados em uso")
+QUEUE_DEPTH_GAUGE = metrics.gauge("browser_use_queue_depth", "Tarefas aguardando", ["queue"])
+RSS_GAUGE = metrics.gauge("browser_use_rss_bytes", "Memória residente", ["process"])
+LOG_DROPPED_GAUGE = metrics.gauge("browser_use_log_pipeline_dropped", "Eventos de log descartados sob pressão")
+# Domínios distintos acima do limite são agregados em domain="other"
+metric_domain = LabelLimiter(int(os.getenv("METRICS_MAX_DOMAINS", "200")))
+# O modelo vem do corpo da requisição: nomes distintos acima do limite viram model="other"
+metric_model = LabelLimiter(int(os.getenv("METRICS_MAX_MODELS", "20")))
+METRICS_PATH_HOSTS = os.getenv("LOAD_PROFILES_PATH_HOSTS", "gov.br").split(",")
+
+# Pool de navegadores quentes compartilhado entre as tarefas
+browser_pool = BrowserPool(
+    min_size=int(os.getenv("BROWSER_POOL_MIN_SIZE", "1")),
+    max_size=int(os.getenv("BROWSER_POOL_MAX_SIZE", "4")),
+    contexts_per_browser=int(os.getenv("BROWSER_POOL_CONTEXTS_PER_BROWSER", "2")),
+    max_tasks_per_browser=int(os.getenv("BROWSER_POOL_MAX_TASKS", "50")),
+    max_rss_mb=int(os.getenv("BROWSER_POOL_MAX_RSS_MB", "1500")),
+    health_check_interval=float(os.getenv("BROWSER_POOL_HEALTH_INTERVAL", "30")),
+    on_launch=lambda seconds: BROWSER_LAUNCH_SECONDS.observe(seconds),
+    context_close_timeout=float(os.getenv("BROWSER_POOL_CLOSE_TIMEOUT", "10")),
+)
+
+# Limites de tempo em camadas (navegação, passo, total) e cancelamento das tarefas em execução
+TASK_NAVIGATION_TIMEOUT = float(os.getenv("TASK_NAVIGATION_TIMEOUT", "90"))
+TASK_STEP_TIMEOUT = float(os.getenv("TASK_STEP_TIMEOUT", "120"))
+lifecycle = LifecycleManager(cancel_grace=float(os.getenv("TASK_CANCEL_GRACE", "10")))
+
+# Varredura de Chromium órfãos (fora do pool e sem o driver Playwright que os lançou)
+orphan_reaper = OrphanReaper(
+    browser_pool.known_pids,
+    interval=float(os.getenv("ORPHAN_REAPER_INTERVAL", "60")),
+    min_age=float(os.getenv("ORPHAN_REAPER_MIN_AGE", "120")),
+)
+
+# Driver Playwright e navegador quentes para /diagnose_browser (contexto novo por requisição)
+diagnostic_browser = DiagnosticBrowser(
+    concurrency=int(os.getenv("DIAGNOSE_MAX_CONCURRENCY", "4")),
+    acquire_timeout=float(os.getenv("DIAGNOSE_QUEUE_TIMEOUT", "10")),
+    max_contexts_per_browser=int(os.getenv("DIAGNOSE_MAX_CONTEXTS_PER_BROWSER", "500")),
+    close_timeout=float(os.getenv("BROWSER_POOL_CLOSE_TIMEOUT", "10")),
+)
+DIAGNOSE_PREWARM = os.getenv("DIAGNOSE_PREWARM", "true").lower() == "true"
+
+@app.on_event("startup")
+async def start_browser_pool():
+    """Pré-aquece os navegadores do pool ao iniciar a API"""
+    try:
+        await browser_pool.start()
+    except Exception as e:
+        logger.error(f"Falha ao iniciar o pool de navegadores: {e}", exc_info=True)
+    if DIAGNOSE_PREWARM:
+        try:
+            await diagnostic_browser.start()
+        except Exception as e:
+            logger.error(f"Falha ao pré-aquecer o navegador de diagnóstico: {e}", exc_info=True)
+    orphan_reaper.start()
+
+@app.on_event("shutdown")
+async def stop_browser_pool():
+    """Fecha todos os navegadores do pool ao encerrar a API"""
+    await orphan_reaper.stop()
+    await browser_pool.shutdown()
+    await diagnostic_browser.shutdown()
+
 # Sistema de autenticação aprimorado
 security = HTTPBearer()
 
@@ -91,6 +252,8 @@ DEFAULT_API_KEY = os.getenv("API_KEY")
 if not DEFAULT_API_KEY:
     DEFAULT_API_KEY = secrets.token_urlsafe(32)
     logger.warning(f"API_KEY não encontrada no ambiente. Gerada chave temporária: {DEFAULT_API_KEY}")
+    if MULTI_WORKER:
+        logger.error("Modo multi-worker sem API_KEY definida: cada worker gerou uma chave temporária diferente")
 
 # Suporte a múltiplas chaves API
 API_KEYS = {}
@@ -119,15 +282,57 @@ def verify_api_key(credentials: HTTPAuthorizationCredentials = Depends(security)
     logger.info(f"Acesso autorizado para usuário com role: {user_role}")
     return user_role
 
+def tenant_id(api_key: str) -> str:
+    """Identificador estável e não reversível de uma API key (usado na divisão justa)"""
+    return hashlib.sha256(api_key.encode()).hexdigest()[:12]
+
+# Role de cada cliente, indexado pelo tenant_id
+TENANT_ROLES = {tenant_id(key): role for key, role in API_KEYS.items()}
+
+def verify_api_client(credentials: HTTPAuthorizationCredentials = Depends(security)) -> Dict[str, str]:
+    """Valida a API key e retorna o cliente (tenant e role) para o controle de admissão"""
+    user_role = verify_api_key(credentials)
+    return {"tenant": tenant_id(credentials.credentials), "role": user_role}
+
+# Controle de admissão: limita agentes simultâneos e divide as vagas entre os clientes
+def create_shared_gate() -> Optional[SharedSlotGate]:
+    """Semáforo global entre workers (ADMISSION_SHARED; habilitado por padrão em modo multi-worker)"""
+    if os.getenv("ADMISSION_SHARED", "true" if MULTI_WORKER else "false").lower() != "true":
+        return None
+    os.makedirs(os.path.dirname(SHARED_STATE_DB_PATH) or ".", exist_ok=True)
+    return SharedSlotGate(SHARED_STATE_DB_PATH, max_slots=int(os.getenv("MAX_CONCURRENT_AGENTS", "4")))
+
+admission = AdmissionController(
+    max_concurrent=int(os.getenv("MAX_CONCURRENT_AGENTS", "4")),
+    max_queue=int(os.getenv("ADMISSION_MAX_QUEUE", "20")),
+    max_queue_per_tenant=int(os.getenv("ADMISSION_MAX_QUEUE_PER_TENANT", "10")),
+    max_queue_wait=float(os.getenv("ADMISSION_MAX_QUEUE_WAIT", "60")),
+    role_weights=parse_role_weights(os.getenv("ADMISSION_ROLE_WEIGHTS", "admin:2,developer:1")),
+    shared_gate=create_shared_gate(),
+)
+
 # Modelos de dados
 class BrowserTask(BaseModel):
     url: str
     task: str
     model: Optional[str] = "deepseek-chat"
-    timeout: Optional[int] = 300
+    timeout: Optional[int] = 300  # Tempo total da tarefa (pré-navegação + agente)
+    navigation_timeout: Optional[float] = None  # None: TASK_NAVIGATION_TIMEOUT
+    step_timeout: Optional[float] = None  # None: TASK_STEP_TIMEOUT
     additional_params: Optional[Dict[str, Any]] = None
     debug_mode: Optional[bool] = False
-    additional_load_wait_time: Optional[int] = 5
+    additional_load_wait_time: Optional[int] = None  # None: escolhido pelo perfil do domínio
+    wait_for_selector: Optional[str] = None
+    cache: Optional[bool] = False
+    cache_ttl: Optional[int] = None
+    # Orçamento opcional: ao atingir qualquer limite o agente para no fim do passo
+    # e a tarefa retorna status "budget_exceeded" com o resultado parcial
+    budget_tokens: Optional[int] = None
+    budget_steps: Optional[int] = None
+    budget_seconds: Optional[float] = None
+    use_recipes: Optional[bool] = True  # False: sempre usa o agente, mesmo com receita para a URL
+    render_profile: Optional[Literal["full", "no-media", "text-only"]] = None  # None: perfil do domínio ou RENDER_PROFILE
+    llm_cache: Optional[bool] = None  # None: usa o cache de respostas do LLM se o domínio estiver em LLM_CACHE_HOSTS
 
 class TaskResponse(BaseModel):
     task_id: str
@@ -135,6 +340,26 @@ class TaskResponse(BaseModel):
     status: str = "completed"
     error: Optional[str] = None
     debug_info: Optional[Dict[str, Any]] = None
+    usage: Optional[Dict[str, Any]] = None
+
+class TaskStatus(BaseModel):
+    task_id: str
+    status: str
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    status_url: str
+    result_url: str
+
+class BatchRequest(BaseModel):
+    tasks: List[BrowserTask]
+    max_parallel: Optional[int] = None
+    stream: Optional[bool] = False
+
+class BatchResponse(BaseModel):
+    batch_id: str
+    results: List[TaskResponse]
+    stats: Dict[str, Any]
 
 class DiagnosticRequest(BaseModel):
     url: str
@@ -148,9 +373,17 @@ class DiagnosticResponse(BaseModel):
     timestamp: str
     debug_info: Optional[Dict[str, Any]] = None
 
+# Eventos de progresso por tarefa (transmitidos via SSE)
+task_events = TaskEventBus(
+    history_size=int(os.getenv("TASK_EVENTS_HISTORY", "1000")),
+    retention=float(os.getenv("TASK_EVENTS_RETENTION", "600")),
+)
+TASK_EVENTS_HEARTBEAT = float(os.getenv("TASK_EVENTS_HEARTBEAT", "15"))
+
 # Função para logs detalhados
-def log_detailed_info(task_id: str, message: str, level: str = "INFO", extra_data: Any = None):
-    """Registra informações detalhadas no log de diagnóstico"""
+def log_detailed_info(task_id: str, message: str, level: str = "INFO", extra_data: Any = None, event: str = "log"):
+    """Registra informações detalhadas no log de diagnóstico e publica o evento no stream da tarefa"""
+    task_events.publish(task_id, event, {"level": level.upper(), "message": message, "extra_data": extra_data})
     log_entry = {
         "task_id": task_id,
         "timestamp": datetime.now().isoformat(),
@@ -158,26 +391,75 @@ def log_detailed_info(task_id: str, message: str, level: str = "INFO", extra_dat
         "extra_data": extra_data
     }
     
+    # O dict é serializado em lote pela thread do pipeline de logging
     if level.upper() == "DEBUG":
-        diag_logger.debug(json.dumps(log_entry))
+        diag_logger.debug(log_entry)
     elif level.upper() == "INFO":
-        diag_logger.info(json.dumps(log_entry))
+        diag_logger.info(log_entry)
     elif level.upper() == "WARNING":
-        diag_logger.warning(json.dumps(log_entry))
+        diag_logger.warning(log_entry)
     elif level.upper() == "ERROR":
-        diag_logger.error(json.dumps(log_entry))
+        diag_logger.error(log_entry)
     else:
-        diag_logger.info(json.dumps(log_entry))
+        diag_logger.info(log_entry)
+
+# Cache de clientes LLM por processo (pools HTTP keep-alive compartilhados por provider)
+llm_clients = LLMClientCache(
+    max_connections=int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "50")),
+    max_keepalive_connections=int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "20")),
+    keepalive_expiry=float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "120")),
+    http2=os.getenv("LLM_HTTP2", "true").lower() == "true",
+    max_llms=int(os.getenv("LLM_CLIENT_CACHE_MAX", "32")),
+)
+
+LLM_TEMPERATURE = 0.7
+LLM_MAX_TOKENS = 2048
+
+# Preços por milhão de tokens, ex.: {"deepseek-chat": {"input": 0.27, "output": 1.1}}
+LLM_PRICES = json.loads(os.getenv("LLM_PRICES", "{}"))
+# Acumula tokens, chamadas e tempo de espera no TaskUsage da tarefa em execução
+llm_usage_callback = UsageCallback()
+
+# Cache em disco das respostas do LLM (hash do modelo + mensagens), opt-in
+def create_llm_response_cache() -> Optional[DiskLLMCache]:
+    if os.getenv("LLM_CACHE_ENABLED", "false").lower() != "true":
+        return None
+    return DiskLLMCache(
+        os.getenv("LLM_CACHE_PATH", "data/llm_cache.db"),
+        ttl=float(os.getenv("LLM_CACHE_TTL", "86400")),
+        max_bytes=int(os.getenv("LLM_CACHE_MAX_MB", "200")) * 1024 * 1024,
+        hosts=os.getenv("LLM_CACHE_HOSTS", "").split(","),
+        on_lookup=lambda outcome: LLM_CACHE_LOOKUPS_TOTAL.inc(outcome=outcome),
+    )
+
+llm_response_cache = create_llm_response_cache()
+
+@app.on_event("shutdown")
+async def close_llm_clients():
+    """Fecha os pools HTTP dos clientes LLM"""
+    await llm_clients.aclose()
 
 def get_llm_instance(model_name: str):
     """
     Retorna a instância correta do LLM baseado no nome do modelo.
     Suporta tanto OpenAI quanto DeepSeek com carregamento dinâmico.
+    As instâncias são reutilizadas entre requisições (cache por provider, modelo,
+    temperature e max_tokens) e compartilham o pool de conexões do provider.
+    Modelos "mock:..." usam o LLM roteirizado local (ver get_mock_llm_instance).
     """
+    if model_name.startswith("mock:"):
+        return get_mock_llm_instance(model_name)
+    provider = "deepseek" if any(keyword in model_name.lower() for keyword in ['deepseek']) else "openai"
+    cache_key = (provider, model_name, LLM_TEMPERATURE, LLM_MAX_TOKENS)
+    cached_llm = llm_clients.get(cache_key)
+    if cached_llm is not None:
+        return cached_llm
+
     logger.info(f"Inicializando modelo: {model_name}")
+    http_client, http_async_client = llm_clients.http_clients(provider)
     
     # Modelos DeepSeek - detecção mais precisa
-    if any(keyword in model_name.lower() for keyword in ['deepseek']):
+    if provider == "deepseek":
         deepseek_api_key = os.getenv("DEEPSEEK_API_KEY")
         if not deepseek_api_key:
             logger.error("DEEPSEEK_API_KEY não encontrada nas variáveis de ambiente")
@@ -190,12 +472,16 @@ def get_llm_instance(model_name: str):
         logger.debug(f"DEEPSEEK_API_KEY disponível: {deepseek_api_key[:10]}...")
         
         try:
-            return ChatDeepSeek(
+            llm = ChatDeepSeek(
                 model=model_name,
-                temperature=0.7,
-                max_tokens=2048,
+                temperature=LLM_TEMPERATURE,
+                max_tokens=LLM_MAX_TOKENS,
                 api_key=deepseek_api_key,
-                api_base="https://api.deepseek.com"
+                api_base="https://api.deepseek.com",
+                http_client=http_client,
+                http_async_client=http_async_client,
+                cache=llm_response_cache,
+                callbacks=[LLMLatencyCallback(LLM_REQUEST_SECONDS, metric_model(model_name)), llm_usage_callback]
             )
         except Exception as e:
             logger.error(f"Erro ao inicializar DeepSeek: {str(e)}", exc_info=True)
@@ -218,11 +504,15 @@ def get_llm_instance(model_name: str):
         logger.debug(f"OPENAI_API_KEY disponível: {openai_api_key[:10]}...")
         
         try:
-            return ChatOpenAI(
+            llm = ChatOpenAI(
                 model=model_name,
-                temperature=0.7,
-                max_tokens=2048,
+                temperature=LLM_TEMPERATURE,
+                max_tokens=LLM_MAX_TOKENS,
                 api_key=openai_api_key,
+                http_client=http_client,
+                http_async_client=http_async_client,
+                cache=llm_response_cache,
+                callbacks=[LLMLatencyCallback(LLM_REQUEST_SECONDS, metric_model(model_name)), llm_usage_callback]
             )
         except Exception as e:
             logger.error(f"Erro ao inicializar OpenAI: {str(e)}", exc_info=True)
@@ -231,14 +521,242 @@ def get_llm_instance(model_name: str):
                 detail=f"Erro ao inicializar modelo OpenAI: {str(e)}"
             )
 
-# Endpoints da API
-@app.post("/run_task", response_model=TaskResponse)
-async def run_task(task_request: BrowserTask, user_role: str = Depends(verify_api_key)):
+    return llm_clients.put(cache_key, llm)
+
+# Provider "mock:" para testes de carga sem LLM real (desabilitado por padrão: respostas
+# roteirizadas não servem para tarefas de verdade)
+MOCK_LLM_ENABLED = os.getenv("MOCK_LLM_ENABLED", "false").lower() == "true"
+MOCK_LLM_DIR = os.getenv("MOCK_LLM_DIR", "mock_transcripts")
+MOCK_LLM_LATENCY = os.getenv("MOCK_LLM_LATENCY", "")
+MOCK_LLM_SEED = int(os.getenv("MOCK_LLM_SEED")) if os.getenv("MOCK_LLM_SEED") else None
+
+def get_mock_llm_instance(model_name: str):
+    """
+    LLM roteirizado para model="mock:<roteiro>[@<latência>]", ex.: "mock:scripted",
+    "mock:paginated:3@lognormal:1.2:0.5" ou "mock:transcript:cvm.json" (arquivo em MOCK_LLM_DIR).
+    """
+    if not MOCK_LLM_ENABLED:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provider mock desabilitado (defina MOCK_LLM_ENABLED=true)"
+        )
+    cache_key = ("mock", model_name, MOCK_LLM_LATENCY)
+    cached_llm = llm_clients.get(cache_key)
+    if cached_llm is not None:
+        return cached_llm
+    try:
+        llm = create_mock_llm(
+            model_name[len("mock:"):],
+            base_dir=MOCK_LLM_DIR,
+            default_latency=MOCK_LLM_LATENCY or None,
+            seed=MOCK_LLM_SEED,
+            cache=llm_response_cache,
+            callbacks=[LLMLatencyCallback(LLM_REQUEST_SECONDS, metric_model(model_name)), llm_usage_callback]
+        )
+    except (ValueError, OSError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Modelo mock inválido: {str(e)}"
+        )
+    logger.info(f"Modelo mock inicializado: {model_name}")
+    return llm_clients.put(cache_key, llm)
+
+# Detecção de prontidão da página (rede ociosa + DOM estável + seletor opcional)
+READINESS_NETWORK_IDLE_MS = int(os.getenv("READINESS_NETWORK_IDLE_MS", "500"))
+READINESS_DOM_QUIET_MS = int(os.getenv("READINESS_DOM_QUIET_MS", "500"))
+READINESS_NAVIGATION_TIMEOUT = float(os.getenv("READINESS_NAVIGATION_TIMEOUT", "60"))
+
+# Perfis de carregamento por domínio: o time_to_ready de cada execução alimenta o
+# teto de espera das próximas quando a requisição não informa additional_load_wait_time
+LOAD_PROFILES_ENABLED = os.getenv("LOAD_PROFILES_ENABLED", "true").lower() == "true"
+
+def create_load_profiles() -> Optional[LoadProfileStore]:
+    if not LOAD_PROFILES_ENABLED:
+        return None
+    db_path = os.getenv("LOAD_PROFILES_DB_PATH", "data/load_profiles.db")
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    return LoadProfileStore(
+        db_path,
+        window=int(os.getenv("LOAD_PROFILES_WINDOW", "50")),
+        pct=float(os.getenv("LOAD_PROFILES_PERCENTILE", "90")),
+        min_samples=int(os.getenv("LOAD_PROFILES_MIN_SAMPLES", "3")),
+        margin=float(os.getenv("LOAD_PROFILES_MARGIN", "1.2")),
+        min_wait=float(os.getenv("LOAD_PROFILES_MIN_WAIT", "1")),
+        max_wait=float(os.getenv("LOAD_PROFILES_MAX_WAIT", "60")),
+        default_wait=float(os.getenv("LOAD_PROFILES_DEFAULT_WAIT", "5")),
+        path_hosts=os.getenv("LOAD_PROFILES_PATH_HOSTS", "gov.br").split(","),
+    )
+
+load_profiles = create_load_profiles()
+
+# Perfis de renderização: bloqueio de imagens, mídia, fontes e rastreadores por interceptação de requisições
+render_profiles = RenderProfiles(
+    default_profile=os.getenv("RENDER_PROFILE", "full"),
+    domain_profiles=parse_domain_profiles(os.getenv("RENDER_PROFILE_DOMAINS", "")),
+    allow_domains=os.getenv("RENDER_ALLOW_DOMAINS", "").split(","),
+    block_domains=os.getenv("RENDER_BLOCK_DOMAINS", "").split(","),
+)
+
+# Cache compartilhado de assets estáticos (JS/CSS/fontes/imagens públicos), opt-in
+def create_asset_cache() -> Optional[AssetCache]:
+    if os.getenv("ASSET_CACHE_ENABLED", "false").lower() != "true":
+        return None
+    return AssetCache(
+        os.getenv("ASSET_CACHE_DIR", "data/asset_cache"),
+        max_bytes=int(os.getenv("ASSET_CACHE_MAX_MB", "500")) * 1024 * 1024,
+        max_entry_bytes=int(os.getenv("ASSET_CACHE_MAX_ENTRY_MB", "5")) * 1024 * 1024,
+        hosts=os.getenv("ASSET_CACHE_HOSTS", "").split(","),
+    )
+
+asset_cache = create_asset_cache()
+
+# Receitas de extração determinística (URL conhecida -> seletores -> schema), tentadas antes do agente
+def create_recipes() -> Optional[RecipeRegistry]:
+    path = os.getenv("RECIPES_PATH", "recipes.json")
+    if not os.path.exists(path):
+        logger.info(f"Arquivo de receitas {path} não encontrado; fast path de extração desabilitado")
+        return None
+    return RecipeRegistry.from_file(path)
+
+recipes = create_recipes()
+
+def match_recipe(task_request: BrowserTask) -> Optional[Recipe]:
+    if recipes is None or task_request.use_recipes is False:
+        return None
+    return recipes.match(task_request.url, task_request.task)
+
+# Receitas aprendidas: execuções bem-sucedidas do agente gravadas e reproduzidas sem o loop do LLM,
+# opt-in (o resultado do replay só é conferido pelo formato)
+REPLAY_ENABLED = os.getenv("REPLAY_ENABLED", "false").lower() == "true"
+
+def create_replay_store() -> Optional[ReplayStore]:
+    if not REPLAY_ENABLED:
+        return None
+    db_path = os.getenv("REPLAY_DB_PATH", "data/replay_scripts.db")
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    return ReplayStore(db_path, max_failures=int(os.getenv("REPLAY_MAX_FAILURES", "3")))
+
+replay_store = create_replay_store()
+
+async def replay_navigate(page, url: str):
+    """Navegação dos scripts de replay, com a mesma espera de prontidão da tarefa"""
+    if load_profiles is not None:
+        max_wait = (await load_profiles.recommend(url))["wait"]
+    else:
+        max_wait = float(os.getenv("LOAD_PROFILES_DEFAULT_WAIT", "5"))
+    await navigate_and_wait_ready(
+        page,
+        url,
+        max_wait=max_wait,
+        network_idle_ms=READINESS_NETWORK_IDLE_MS,
+        dom_quiet_ms=READINESS_DOM_QUIET_MS,
+        navigation_timeout=READINESS_NAVIGATION_TIMEOUT,
+    )
+
+replayer = ScriptReplayer(
+    replay_navigate,
+    step_timeout=float(os.getenv("REPLAY_STEP_TIMEOUT", "10")),
+    max_content_chars=int(os.getenv("REPLAY_MAX_CONTENT_CHARS", "60000")),
+)
+
+async def resolve_load_wait(task_request: BrowserTask) -> Dict[str, Any]:
+    """Teto de espera da tarefa: o valor da requisição ou o recomendado pelo perfil do domínio"""
+    if task_request.additional_load_wait_time is not None:
+        return {"wait": float(task_request.additional_load_wait_time), "source": "request"}
+    if load_profiles is None:
+        return {"wait": float(os.getenv("LOAD_PROFILES_DEFAULT_WAIT", "5")), "source": "default"}
+    return await load_profiles.recommend(task_request.url)
+
+def build_agent_prompt(task_request: BrowserTask, pre_navigated: bool, load_wait: float = 0) -> str:
+    """
+    Monta o prompt do agente. Se a página já foi aberta e aguardada pelo detector de
+    prontidão, o agente começa dela; caso contrário, navega por conta própria.
+    """
+    if pre_navigated:
+        return (
+            f"A página {task_request.url} já está aberta na aba atual e seu conteúdo dinâmico já foi carregado. "
+            f"Não é necessário navegar até ela novamente.\n\n{task_request.task}"
+        )
+
+    technical_instructions = ""
+    if load_wait and load_wait > 0:
+        technical_instructions = f"""
+
+INSTRUÇÕES TÉCNICAS PARA CARREGAMENTO DINÂMICO:
+1. Após carregar a página inicial, aguarde {load_wait:g} segundos para que todo conteúdo dinâmico seja carregado
+2. Aguarde elementos aparecerem completamente antes de tentar interagir com eles
+3. Se necessário, aguarde que requisições AJAX/Fetch sejam concluídas
+4. Para sites com carregamento assíncrono, certifique-se de que todos os elementos estejam visíveis
+5. Use wait_for_selector ou wait_for_load_state quando apropriado
+6. Considere que o conteúdo pode ser populado via JavaScript após o carregamento inicial
+
+"""
+    return f"Acesse {task_request.url}.{technical_instructions}{task_request.task}"
+
+def metric_labels(task_request: BrowserTask) -> Dict[str, str]:
+    """Labels (model, domain) das métricas de uma tarefa"""
+    return {"model": metric_model(task_request.model), "domain": metric_domain(profile_key(task_request.url, METRICS_PATH_HOSTS))}
+
+@asynccontextmanager
+async def metered_lease(task_id: str, labels: Dict[str, str]):
+    """browser_pool.lease que registra o tempo de aquisição e o de limpeza (fechamento do contexto)"""
+    start = time.time()
+    cleanup_start = None
+    try:
+        async with browser_pool.lease(task_id) as lease:
+            TASK_PHASE_SECONDS.observe(time.time() - start, phase="browser_acquire", **labels)
+            try:
+                yield lease
+            finally:
+                cleanup_start = time.time()
+    finally:
+        if cleanup_start is not None:
+            TASK_PHASE_SECONDS.observe(time.time() - cleanup_start, phase="cleanup", **labels)
+
+def task_budgets(task_request: BrowserTask) -> TaskBudgets:
+    """Limites de tempo da tarefa: os da requisição ou os padrões do ambiente"""
+    total = task_request.timeout
+    if total is None or total <= 0:
+        logger.warning(f"Timeout inválido detectado: {total}, usando padrão de 300")
+        total = 300
+    return TaskBudgets(
+        total=float(total),
+        navigation=task_request.navigation_timeout or TASK_NAVIGATION_TIMEOUT,
+        step=task_request.step_timeout or TASK_STEP_TIMEOUT,
+    )
+
+async def execute_browser_task(task_request: BrowserTask, task_id: str) -> TaskResponse:
     """
     Executa uma tarefa de navegação web usando o agente LLM.
-    Requer autenticação via Bearer Token.
+    Compartilhada entre o /run_task síncrono e os workers da fila de tarefas.
     """
-    task_id = f"task_{secrets.token_hex(8)}"
+    labels = metric_labels(task_request)
+    usage = TaskUsage(task_request.model)
+    labels_token = task_labels.set(labels)
+    usage_token = current_usage.set(usage)
+    llm_cache_token = llm_cache_enabled.set(
+        task_request.llm_cache if task_request.llm_cache is not None
+        else llm_response_cache is not None and llm_response_cache.allows(task_request.url)
+    )
+    try:
+        async with lifecycle.track(task_id, task_budgets(task_request)) as handle:
+            response = await run_browser_agent(task_request, task_id, labels, usage, handle)
+    finally:
+        llm_cache_enabled.reset(llm_cache_token)
+        current_usage.reset(usage_token)
+        task_labels.reset(labels_token)
+    response.usage = usage.to_dict(LLM_PRICES)
+    log_detailed_info(task_id, "Uso do LLM na tarefa", "INFO", response.usage)
+    TASK_DURATION_SECONDS.observe(usage.elapsed(), status=response.status, **labels)
+    TASKS_TOTAL.inc(status=response.status, **labels)
+    LLM_TOKENS_TOTAL.inc(usage.input_tokens, direction="input", **labels)
+    LLM_TOKENS_TOTAL.inc(usage.output_tokens, direction="output", **labels)
+    return response
+
+async def run_browser_agent(
+    task_request: BrowserTask, task_id: str, labels: Dict[str, str], usage: TaskUsage, handle: TaskHandle
+) -> TaskResponse:
+    """Pré-navegação, execução do agente e parsing do resultado de uma tarefa"""
     original_debug_mode_flag = task_request.debug_mode
     
     # Use o objeto task_request diretamente para os logs e debug_info para consistência
@@ -259,6 +777,8 @@ async def run_task(task_request: BrowserTask, user_role: str = Depends(verify_ap
     # Adicionar additional_params apenas se existir e não for None
     if task_request.additional_params is not None:
         task_details_for_debug["additional_params"] = task_request.additional_params
+    if task_request.wait_for_selector:
+        task_details_for_debug["wait_for_selector"] = task_request.wait_for_selector
     # Adicionar debug_mode explicitamente (como booleano)
     task_details_for_debug["debug_mode"] = original_debug_mode_flag
 
@@ -269,206 +789,278 @@ async def run_task(task_request: BrowserTask, user_role: str = Depends(verify_ap
     }
 
     try:
-        technical_instructions = ""
-        if task_request.additional_load_wait_time and task_request.additional_load_wait_time > 0:
-            technical_instructions = f"""
-
-INSTRUÇÕES TÉCNICAS PARA CARREGAMENTO DINÂMICO:
-1. Após carregar a página inicial, aguarde {task_request.additional_load_wait_time} segundos para que todo conteúdo dinâmico seja carregado
-2. Aguarde elementos aparecerem completamente antes de tentar interagir com eles
-3. Se necessário, aguarde que requisições AJAX/Fetch sejam concluídas
-4. Para sites com carregamento assíncrono, certifique-se de que todos os elementos estejam visíveis
-5. Use wait_for_selector ou wait_for_load_state quando apropriado
-6. Considere que o conteúdo pode ser populado via JavaScript após o carregamento inicial
-
-"""
-            log_detailed_info(task_id, f"Adicionando instruções técnicas para espera de {task_request.additional_load_wait_time} segundos", "DEBUG")
-        
-        full_task = f"Acesse {task_request.url}.{technical_instructions}{task_request.task}"
-        log_detailed_info(task_id, "Construindo o prompt para o agente", "DEBUG", {"full_task": full_task[:500] + "..." if len(full_task) > 500 else full_task})
-        
         start_time = time.time()
         final_result = "" # Initialize final_result
         result = None # Initialize result
 
-        browser = None
-        temp_dir = None
+        load_profile = await resolve_load_wait(task_request)
+        load_wait = load_profile["wait"]
+        debug_info["load_profile"] = load_profile
+        log_detailed_info(task_id, f"Teto de espera de carregamento: {load_wait}s ({load_profile['source']})", "DEBUG", load_profile)
+
         try:
-            # CRIAR DIRETÓRIO TEMPORÁRIO ÚNICO para cada execução
-            import tempfile
-            temp_dir = tempfile.mkdtemp(prefix=f"browser_{task_id}_")
-            log_detailed_info(task_id, f"Diretório temporário criado: {temp_dir}", "DEBUG")
-            
-            # CONFIGURAÇÃO CRÍTICA: Browser totalmente isolado a cada execução
-            browser_config = BrowserConfig(
-                # Forçar headless para servidor
-                headless=True,
+            # Contexto novo e isolado emprestado de um navegador quente do pool.
+            # O contexto é descartado (cookies, storage, cache) ao sair do bloco.
+            async with metered_lease(task_id, labels) as lease:
+                log_detailed_info(task_id, "Contexto isolado obtido do pool de navegadores", "DEBUG", lease.describe())
+                debug_info["browser_pool"] = lease.describe()
                 
-                # CRITICAL: Args anti-cache explícitos para isolamento total
-                extra_chromium_args=[
-                    '--no-first-run',
-                    '--no-default-browser-check',
-                    '--disable-default-apps',
-                    '--disable-extensions',
-                    '--disable-features=TranslateUI,VizDisplayCompositor',
-                    '--disable-web-security',
-                    '--no-sandbox',
-                    '--disable-dev-shm-usage',
-                    '--disable-gpu',
-                    '--disable-software-rasterizer',
-                    
-                    # CACHE DESTRUCTION: Zero persistência entre execuções
-                    '--disk-cache-size=0',           # Zero cache de disco
-                    '--memory-cache-size=0',         # Zero cache de memória  
-                    '--disable-application-cache',   # Sem cache de aplicações
-                    '--disable-offline-load-stale-cache',
-                    '--disable-background-networking',
-                    '--disable-background-timer-throttling',
-                    '--disable-backgrounding-occluded-windows',
-                    '--disable-renderer-backgrounding',
-                    
-                    # MODO INCÓGNITO FORÇADO: Sem dados persistentes
-                    '--incognito',
-                    f'--user-data-dir={temp_dir}',  # Dir temporário ÚNICO por execução
-                    '--data-reduction-proxy-bypass',
-                    '--disable-session-crashed-bubble',
-                    '--disable-infobars',
-                    '--disable-features=VizDisplayCompositor',
-                    
-                    # OTIMIZAÇÕES ADICIONAIS
-                    '--disable-blink-features=AutomationControlled',
-                    '--disable-ipc-flooding-protection',
-                ]
-            )
-            
-            # Criar browser isolado para esta execução
-            browser = Browser(config=browser_config)
-            log_detailed_info(task_id, "Browser isolado criado com configuração anti-cache", "DEBUG")
-            
-            # Criar agente com browser explícito e isolado
-            agent = Agent(
-                task=full_task,
-                llm=get_llm_instance(task_request.model),
-                browser=browser  # Browser explícito e isolado para esta tarefa
-            )
-            log_detailed_info(task_id, "Agente inicializado com sucesso", "DEBUG")
-            
-            logger.info(f"Executando agente para tarefa {task_id}")
-            log_detailed_info(task_id, "Iniciando execução do agente run()", "INFO")
-            
-            # DEBUG: Log do timeout antes de usar
-            print(f"DEBUG: timeout = {task_request.timeout}, tipo = {type(task_request.timeout)}")
-            print(f"DEBUG: timeout é None? {task_request.timeout is None}")
-            print(f"DEBUG: timeout convertido para float: {float(task_request.timeout)}")
-            
-            # VERIFICAR SE O TIMEOUT É VÁLIDO
-            timeout_value = task_request.timeout
-            if timeout_value is None or timeout_value <= 0:
-                logger.warning(f"Timeout inválido detectado: {timeout_value}, usando padrão de 300")
-                timeout_value = 300
-            
-            # USAR TIMEOUT EXPLÍCITO
-            try:
-                result = await asyncio.wait_for(
-                    agent.run(), 
-                    timeout=float(timeout_value)
+                # O cache de assets é registrado antes do perfil de renderização: o Playwright chama as rotas
+                # da mais recente para a mais antiga, então recursos bloqueados nunca chegam ao cache
+                if asset_cache is not None:
+                    try:
+                        debug_info["asset_cache"] = await asset_cache.attach(lease.context)
+                    except Exception as asset_cache_error:
+                        log_detailed_info(task_id, f"Falha ao instalar o cache de assets: {asset_cache_error}", "WARNING")
+                
+                # Interceptação instalada antes da primeira navegação; o relatório segue atualizado até o fim da tarefa
+                render = render_profiles.session(task_request.render_profile, profile_key(task_request.url, METRICS_PATH_HOSTS))
+                try:
+                    await render.attach(lease.context)
+                    debug_info["rendering"] = render.report
+                except Exception as render_error:
+                    debug_info["rendering"] = {"profile": render.profile, "error": str(render_error)}
+                    log_detailed_info(task_id, f"Falha ao aplicar o perfil de renderização {render.profile}: {render_error}", "WARNING")
+                
+                recipe = match_recipe(task_request)
+                
+                # Navegar e aguardar a página ficar pronta ANTES de entregar o controle ao agente.
+                # additional_load_wait_time é o teto da espera, não uma espera fixa.
+                pre_navigated = False
+                try:
+                    page = await lease.context.get_current_page()
+                    with TASK_PHASE_SECONDS.time(phase="page_readiness", **labels):
+                        readiness = await lifecycle.navigation(handle, navigate_and_wait_ready(
+                            page,
+                            task_request.url,
+                            max_wait=load_wait,
+                            wait_for_selector=task_request.wait_for_selector or (recipe.wait_for_selector if recipe else None),
+                            network_idle_ms=READINESS_NETWORK_IDLE_MS,
+                            dom_quiet_ms=READINESS_DOM_QUIET_MS,
+                            navigation_timeout=READINESS_NAVIGATION_TIMEOUT,
+                        ))
+                    pre_navigated = True
+                    debug_info["page_readiness"] = readiness
+                    if load_profiles is not None:
+                        await load_profiles.record(task_request.url, readiness["time_to_ready"], readiness["ready"])
+                    if readiness["ready"]:
+                        render.record_ready(readiness["time_to_ready"])
+                    log_detailed_info(task_id, f"Página pronta em {readiness['time_to_ready']}s ({readiness['reason']})", "INFO", readiness, event="navigation")
+                except TaskCancelled:
+                    raise
+                except Exception as readiness_error:
+                    debug_info["page_readiness"] = {"ready": False, "error": str(readiness_error)}
+                    log_detailed_info(task_id, f"Falha na pré-navegação, o agente fará a navegação: {readiness_error}", "WARNING")
+                
+                # Fast path: extração direta pela receita, sem LLM; se falhar, o agente assume a partir da página já aberta
+                if recipe is not None and pre_navigated:
+                    with TASK_PHASE_SECONDS.time(phase="recipe", **labels):
+                        attempt = await recipes.run(recipe, page)
+                    RECIPE_RUNS_TOTAL.inc(recipe=recipe.name, outcome="hit" if attempt["ok"] else "fallback")
+                    debug_info["recipe"] = {"name": recipe.name, "ok": attempt["ok"], "duration": round(attempt["duration"], 3), "errors": attempt["errors"]}
+                    if attempt["ok"]:
+                        log_detailed_info(task_id, f"Resultado extraído pela receita {recipe.name} em {attempt['duration']:.2f}s", "INFO", debug_info["recipe"], event="recipe")
+                        debug_info["execution_time"] = time.time() - start_time
+                        debug_info["end_time"] = datetime.now().isoformat()
+                        return TaskResponse(
+                            task_id=task_id,
+                            result=attempt["result"],
+                            status="completed",
+                            debug_info=debug_info if original_debug_mode_flag else None
+                        )
+                    log_detailed_info(task_id, f"Receita {recipe.name} não validou, usando o agente", "WARNING", debug_info["recipe"], event="recipe")
+                
+                # Receita aprendida: reproduz as ações de uma execução anterior e extrai o resultado com uma única chamada ao LLM
+                script = None
+                if replay_store is not None and task_request.use_recipes is not False and pre_navigated:
+                    script = await replay_store.lookup(task_request.url, task_request.task)
+                if script is not None:
+                    replay_start = time.time()
+                    try:
+                        with TASK_PHASE_SECONDS.time(phase="replay", **labels):
+                            contents = await replayer.run(page, script["steps"], task_request.url, script["params"], pre_navigated)
+                            replay_result = await replayer.extract(get_llm_instance(task_request.model), task_request.task, contents, script["example"])
+                        if not result_matches_example(replay_result, script["example"]):
+                            raise ReplayError("Resultado do replay com formato diferente do gravado")
+                    except Exception as replay_error:
+                        replay_time = time.time() - replay_start
+                        await replay_store.report(script["key"], False, replay_time)
+                        REPLAY_RUNS_TOTAL.inc(outcome="fallback")
+                        debug_info["replay"] = {"ok": False, "steps": len(script["steps"]), "duration": round(replay_time, 3), "error": str(replay_error)}
+                        log_detailed_info(task_id, f"Replay falhou, usando o agente: {replay_error}", "WARNING", debug_info["replay"], event="replay")
+                        # O replay pode ter deixado a página em outro estado: o agente navega desde o início
+                        pre_navigated = False
+                    else:
+                        replay_time = time.time() - replay_start
+                        await replay_store.report(script["key"], True, replay_time)
+                        REPLAY_RUNS_TOTAL.inc(outcome="hit")
+                        debug_info["replay"] = {"ok": True, "steps": len(script["steps"]), "duration": round(replay_time, 3), "agent_time": round(script["agent_time"], 1)}
+                        log_detailed_info(task_id, f"Resultado obtido por replay em {replay_time:.2f}s", "INFO", debug_info["replay"], event="replay")
+                        debug_info["execution_time"] = time.time() - start_time
+                        debug_info["end_time"] = datetime.now().isoformat()
+                        return TaskResponse(
+                            task_id=task_id,
+                            result=replay_result,
+                            status="completed",
+                            debug_info=debug_info if original_debug_mode_flag else None
+                        )
+                
+                full_task = build_agent_prompt(task_request, pre_navigated, load_wait)
+                log_detailed_info(task_id, "Construindo o prompt para o agente", "DEBUG", {"full_task": full_task[:500] + "..." if len(full_task) > 500 else full_task})
+                
+                # Criar agente com o contexto isolado desta tarefa
+                agent = Agent(
+                    task=full_task,
+                    llm=get_llm_instance(task_request.model),
+                    browser=lease.browser,
+                    browser_context=lease.context
                 )
-            except asyncio.TimeoutError:
-                # CAPTURAR O TIMEOUT EXPLICITAMENTE
-                logger.error(f"TIMEOUT CAPTURADO - Tarefa {task_id} expirou após {timeout_value} segundos")
-                raise  # Re-raise para ser capturado pelo except externo
+                log_detailed_info(task_id, "Agente inicializado com sucesso", "DEBUG")
+                
+                logger.info(f"Executando agente para tarefa {task_id}")
+                log_detailed_info(task_id, "Iniciando execução do agente run()", "INFO")
+                
+                async def on_step_start(agent_instance):
+                    handle.step_started()
+                
+                async def on_step_end(agent_instance):
+                    handle.step_finished()
+                    handle.history = agent_instance.state.history
+                    usage.steps += 1
+                    if not agent_instance.state.history.is_done():
+                        reason = budget_exceeded(
+                            usage,
+                            max_tokens=task_request.budget_tokens,
+                            max_steps=task_request.budget_steps,
+                            max_seconds=task_request.budget_seconds,
+                        )
+                        if reason and usage.stop_reason is None:
+                            usage.stop_reason = reason
+                            log_detailed_info(task_id, f"Parando o agente: {reason}", "WARNING", usage.to_dict(LLM_PRICES), event="budget")
+                            agent_instance.stop()
+                    step = summarize_agent_step(agent_instance)
+                    if step is not None:
+                        if step.get("duration") is not None:
+                            AGENT_STEP_SECONDS.observe(step["duration"], **labels)
+                        log_detailed_info(task_id, f"Passo {step['step']} concluído", "DEBUG", step, event="step")
+                
+                # Limites de passo e total aplicados pelo watchdog: parada cooperativa e, se preciso, cancelamento
+                agent_start = time.time()
+                with TASK_PHASE_SECONDS.time(phase="agent", **labels):
+                    result = await lifecycle.run_agent(
+                        handle, agent, lambda: agent.run(on_step_start=on_step_start, on_step_end=on_step_end)
+                    )
+                if recipe is not None:
+                    recipes.record_agent_time(recipe, time.time() - agent_start)
             
             execution_time = time.time() - start_time
             log_detailed_info(task_id, f"Execução do agente concluída em {execution_time:.2f} segundos", "INFO")
             
-            if hasattr(result, "final_result"):
-                final_result = result.final_result()
-            elif isinstance(result, str):
-                final_result = result
-            else:
-                try:
-                    final_result = str(result)
-                    log_detailed_info(task_id, "Resultado convertido para string", "WARNING")
-                except Exception as e:
-                    log_detailed_info(task_id, f"Erro ao converter resultado: {str(e)}", "ERROR")
-            
-            if final_result:
-                log_detailed_info(task_id, "Resultado final obtido", "DEBUG", {"result_size": len(final_result)})
-            else:
-                log_detailed_info(task_id, "Resultado final vazio", "WARNING")
-            
-            logger.info(f"Tarefa {task_id} concluída em {execution_time:.2f} segundos")
-            
-            debug_info["execution_time"] = execution_time
-            debug_info["end_time"] = datetime.now().isoformat()
-            
-            # Limpeza EXPLÍCITA do browser isolado
-            try:
-                if browser:
-                    await browser.close()
-                    log_detailed_info(task_id, "Browser isolado fechado com sucesso", "DEBUG")
-                # Limpar diretório temporário ÚNICO desta execução
-                if temp_dir and os.path.exists(temp_dir):
-                    import shutil
-                    shutil.rmtree(temp_dir, ignore_errors=True)
-                    log_detailed_info(task_id, f"Diretório temporário {temp_dir} limpo", "DEBUG")
-            except Exception as cleanup_error:
-                log_detailed_info(task_id, f"Erro na limpeza do browser: {cleanup_error}", "WARNING")
-            
-            try:
-                if final_result:
-                    json_result = json.loads(final_result)
+            with TASK_PHASE_SECONDS.time(phase="result_parsing", **labels):
+                if usage.stop_reason and hasattr(result, "is_done") and not result.is_done():
+                    debug_info["execution_time"] = execution_time
+                    debug_info["end_time"] = datetime.now().isoformat()
                     return TaskResponse(
                         task_id=task_id,
-                        result=json_result,
-                        status="completed",
+                        result=partial_result(result, usage.stop_reason),
+                        status="budget_exceeded",
+                        error=f"Tarefa interrompida: {usage.stop_reason}",
                         debug_info=debug_info if original_debug_mode_flag else None
                     )
+
+                if hasattr(result, "final_result"):
+                    final_result = result.final_result()
+                elif isinstance(result, str):
+                    final_result = result
+                else:
+                    try:
+                        final_result = str(result)
+                        log_detailed_info(task_id, "Resultado convertido para string", "WARNING")
+                    except Exception as e:
+                        log_detailed_info(task_id, f"Erro ao converter resultado: {str(e)}", "ERROR")
+            
+                if final_result:
+                    log_detailed_info(task_id, "Resultado final obtido", "DEBUG", {"result_size": len(final_result)})
                 else:
-                    logger.warning(f"Tarefa {task_id} retornou resultado vazio")
+                    log_detailed_info(task_id, "Resultado final vazio", "WARNING")
+            
+                logger.info(f"Tarefa {task_id} concluída em {execution_time:.2f} segundos")
+            
+                debug_info["execution_time"] = execution_time
+                debug_info["end_time"] = datetime.now().isoformat()
+            
+                try:
+                    if final_result:
+                        json_result = json.loads(final_result)
+                        if (replay_store is not None and task_request.use_recipes is not False and json_result
+                                and isinstance(json_result, (dict, list)) and hasattr(result, "history") and result.is_successful() is not False):
+                            if await replay_store.record(task_request.url, task_request.task, result, json_result, time.time() - agent_start):
+                                log_detailed_info(task_id, "Execução gravada para replay", "DEBUG")
+                        return TaskResponse(
+                            task_id=task_id,
+                            result=json_result,
+                            status="completed",
+                            debug_info=debug_info if original_debug_mode_flag else None
+                        )
+                    else:
+                        logger.warning(f"Tarefa {task_id} retornou resultado vazio")
+                        return TaskResponse(
+                            task_id=task_id,
+                            status="completed",
+                            result={},
+                            error="Sem resultados retornados",
+                            debug_info=debug_info if original_debug_mode_flag else None
+                        )
+                except json.JSONDecodeError as e:
+                    logger.warning(f"Tarefa {task_id} retornou resultado não-JSON: {str(e)}")
+                    log_detailed_info(task_id, "Erro ao parsear JSON final", "WARNING", {"error": str(e), "raw_output": final_result[:1000] + ("..." if len(final_result) > 1000 else "") })
+                    result_preview = final_result[:500] + "..." if len(final_result) > 500 else final_result
+                    log_detailed_info(task_id, "Preview do resultado não-JSON", "DEBUG", {"preview": result_preview})
+                    # Modificado para retornar um array com o texto bruto, conforme solicitado
                     return TaskResponse(
                         task_id=task_id,
-                        status="completed",
-                        result={},
-                        error="Sem resultados retornados",
+                        result=[{"raw_text": final_result}], # Retorna array com o dado bruto
+                        status="completed_with_parsing_error", # Novo status para indicar o problema
+                        error="JSON parsing failed for final result, returning raw text.",
                         debug_info=debug_info if original_debug_mode_flag else None
                     )
-            except json.JSONDecodeError as e:
-                logger.warning(f"Tarefa {task_id} retornou resultado não-JSON: {str(e)}")
-                log_detailed_info(task_id, "Erro ao parsear JSON final", "WARNING", {"error": str(e), "raw_output": final_result[:1000] + ("..." if len(final_result) > 1000 else "") })
-                result_preview = final_result[:500] + "..." if len(final_result) > 500 else final_result
-                log_detailed_info(task_id, "Preview do resultado não-JSON", "DEBUG", {"preview": result_preview})
-                # Modificado para retornar um array com o texto bruto, conforme solicitado
+        except TaskTimeout as timeout_error:
+            logger.error(f"Timeout na tarefa {task_id}: {timeout_error}")
+            log_detailed_info(task_id, f"Timeout: {timeout_error}", "ERROR", {"kind": timeout_error.kind, "limit": timeout_error.limit})
+            debug_info["error"] = "TIMEOUT"
+            debug_info["timeout_kind"] = timeout_error.kind
+            debug_info["end_time"] = datetime.now().isoformat()
+            
+            # O que o agente já extraiu até o timeout é devolvido em vez de descartado
+            history = handle.history
+            if history is not None and (history.extracted_content() or any(history.urls())):
+                partial = partial_result(history, str(timeout_error))
+                log_detailed_info(task_id, f"Retornando resultado parcial de {partial['steps']} passo(s)", "WARNING",
+                                  {"data_items": len(partial["data"]), "urls": partial["urls"]})
                 return TaskResponse(
                     task_id=task_id,
-                    result=[{"raw_text": final_result}], # Retorna array com o dado bruto
-                    status="completed_with_parsing_error", # Novo status para indicar o problema
-                    error="JSON parsing failed for final result, returning raw text.",
+                    result=partial,
+                    status="partial",
+                    error=f"Timeout: {timeout_error}",
                     debug_info=debug_info if original_debug_mode_flag else None
                 )
-        except asyncio.TimeoutError:
-            logger.error(f"Timeout na tarefa {task_id} após {task_request.timeout} segundos")
-            log_detailed_info(task_id, f"Timeout após {task_request.timeout} segundos", "ERROR")
-            debug_info["error"] = "TIMEOUT"
-            debug_info["end_time"] = datetime.now().isoformat()
-            
-            # Limpeza EXPLÍCITA após timeout
-            try:
-                if browser:
-                    await browser.close()
-                    log_detailed_info(task_id, "Browser isolado fechado após timeout", "DEBUG")
-                # Limpar diretório temporário ÚNICO
-                if temp_dir and os.path.exists(temp_dir):
-                    import shutil
-                    shutil.rmtree(temp_dir, ignore_errors=True)
-                    log_detailed_info(task_id, f"Diretório temporário {temp_dir} limpo após timeout", "DEBUG")
-            except Exception as cleanup_error:
-                log_detailed_info(task_id, f"Erro na limpeza após timeout: {cleanup_error}", "WARNING")
             
             return TaskResponse(
                 task_id=task_id,
                 status="error",
-                error=f"Timeout após {task_request.timeout} segundos",
+                error=f"Timeout: {timeout_error}",
+                debug_info=debug_info if original_debug_mode_flag else None
+            )
+        except TaskCancelled as cancelled:
+            logger.info(f"Tarefa {task_id} cancelada: {cancelled.reason}")
+            log_detailed_info(task_id, f"Tarefa cancelada: {cancelled.reason}", "WARNING", event="cancelled")
+            debug_info["error"] = "CANCELLED"
+            debug_info["end_time"] = datetime.now().isoformat()
+            
+            return TaskResponse(
+                task_id=task_id,
+                status="cancelled",
+                error=cancelled.reason,
                 debug_info=debug_info if original_debug_mode_flag else None
             )
             
@@ -481,19 +1073,6 @@ INSTRUÇÕES TÉCNICAS PARA CARREGAMENTO DINÂMICO:
         debug_info["traceback"] = trace
         debug_info["end_time"] = datetime.now().isoformat()
         
-        # Limpeza EXPLÍCITA após erro
-        try:
-            if browser:
-                await browser.close()
-                log_detailed_info(task_id, "Browser isolado fechado após erro", "DEBUG")
-            # Limpar diretório temporário ÚNICO
-            if temp_dir and os.path.exists(temp_dir):
-                import shutil
-                shutil.rmtree(temp_dir, ignore_errors=True)
-                log_detailed_info(task_id, f"Diretório temporário {temp_dir} limpo após erro", "DEBUG")
-        except Exception as cleanup_error:
-            log_detailed_info(task_id, f"Erro na limpeza após exceção: {cleanup_error}", "WARNING")
-        
         return TaskResponse(
             task_id=task_id,
             status="error",
@@ -501,6 +1080,423 @@ INSTRUÇÕES TÉCNICAS PARA CARREGAMENTO DINÂMICO:
             debug_info=debug_info if original_debug_mode_flag else None
         )
 
+# Cache de resultados para submissões idênticas (opt-in por requisição via "cache": true)
+def create_result_cache() -> ResultCache:
+    """Cria o cache conforme RESULT_CACHE_BACKEND (memory ou disk)"""
+    backend = os.getenv("RESULT_CACHE_BACKEND", "disk" if MULTI_WORKER else "memory").lower()
+    if MULTI_WORKER and backend != "disk":
+        logger.warning("Modo multi-worker com RESULT_CACHE_BACKEND em memória: o cache não será compartilhado entre os workers")
+    max_entries = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "500"))
+    if backend == "disk":
+        db_path = os.getenv("RESULT_CACHE_PATH", "data/result_cache.db")
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        storage = DiskResultCache(db_path, max_entries=max_entries)
+    else:
+        storage = MemoryResultCache(max_entries=max_entries)
+    return ResultCache(
+        storage,
+        default_ttl=float(os.getenv("RESULT_CACHE_DEFAULT_TTL", "600")),
+        max_ttl=float(os.getenv("RESULT_CACHE_MAX_TTL", "86400")),
+    )
+
+result_cache = create_result_cache()
+
+async def run_with_result_cache(
+    task_request: BrowserTask,
+    task_id: str,
+    execute: Callable[[], Awaitable[TaskResponse]],
+) -> TaskResponse:
+    """
+    Consulta o cache antes de executar a tarefa e grava resultados bem-sucedidos.
+    O status do cache (hit/miss) é informado em debug_info["cache"].
+    """
+    if not task_request.cache:
+        return await execute()
+
+    cache_key = task_cache_key(task_request.model_dump())
+    entry = await result_cache.lookup(cache_key)
+    if entry is not None:
+        created_at, cached = entry
+        age = time.time() - created_at
+        logger.info(f"Tarefa {task_id} atendida pelo cache de resultados (idade: {age:.0f}s)")
+        log_detailed_info(task_id, "Resultado obtido do cache", "INFO", {"cache_key": cache_key, "cached_task_id": cached["task_id"]})
+        return TaskResponse(
+            task_id=task_id,
+            result=cached["result"],
+            status=cached["status"],
+            error=cached["error"],
+            debug_info={"cache": {"status": "hit", "key": cache_key, "age_seconds": round(age, 1), "cached_task_id": cached["task_id"]}},
+        )
+
+    response = await execute()
+    cache_info = {"status": "miss", "key": cache_key, "stored": False}
+    if response.status == "completed" and response.result and not response.error:
+        ttl = result_cache.ttl_for(task_request.cache_ttl)
+        await result_cache.store(
+            cache_key,
+            {"task_id": response.task_id, "result": response.result, "status": response.status, "error": response.error},
+            ttl,
+        )
+        cache_info.update({"stored": True, "ttl": ttl})
+    response.debug_info = {**(response.debug_info or {}), "cache": cache_info}
+    return response
+
+async def run_with_events(task_id: str, run: Callable[[], Awaitable[TaskResponse]], owner: Optional[str] = None) -> TaskResponse:
+    """
+    Executa a tarefa com o stream de eventos aberto e o encerra com o resultado ou o erro.
+    owner (tenant que submeteu a tarefa) restringe quem pode acompanhar ou cancelar a tarefa.
+    """
+    task_events.open(task_id, owner)
+    try:
+        response = await run()
+    except AdmissionRejected as e:
+        task_events.close(task_id, "error", {"status_code": e.status_code, "detail": e.detail, "retry_after": e.retry_after})
+        raise
+    except asyncio.CancelledError:
+        task_events.close(task_id, "error", {"detail": "Tarefa cancelada"})
+        raise
+    except Exception as e:
+        task_events.close(task_id, "error", {"detail": str(e)})
+        raise
+    task_events.close(task_id, "result", response.model_dump())
+    return response
+
+def event_stream_response(task_id: str, last_event_id: int = 0, on_disconnect: Optional[Callable[[], None]] = None) -> StreamingResponse:
+    """Resposta text/event-stream com os eventos da tarefa a partir de last_event_id"""
+    async def stream():
+        try:
+            async for entry in task_events.subscribe(task_id, last_event_id, heartbeat=TASK_EVENTS_HEARTBEAT):
+                yield format_sse(entry)
+        finally:
+            if on_disconnect is not None:
+                on_disconnect()
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "X-Task-Id": task_id},
+    )
+
+@app.post("/run_task", response_model=TaskResponse)
+async def run_task(task_request: BrowserTask, client: Dict[str, str] = Depends(verify_api_client)):
+    """
+    Executa uma tarefa de navegação web usando o agente LLM.
+    Requer autenticação via Bearer Token.
+    Responde 429/503 com Retry-After quando o limite de agentes simultâneos está esgotado.
+    """
+    task_id = f"task_{secrets.token_hex(8)}"
+
+    async def execute() -> TaskResponse:
+        async with admission.admit(client["tenant"], client["role"]) as ticket:
+            log_detailed_info(task_id, "Execução admitida", "DEBUG", {"queue_wait": round(ticket.queue_wait, 3)})
+            return await execute_browser_task(task_request, task_id)
+
+    try:
+        return await run_with_events(task_id, lambda: run_with_result_cache(task_request, task_id, execute), client["tenant"])
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=e.detail,
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+@app.post("/run_task/stream")
+async def run_task_stream(
+    task_request: BrowserTask,
+    cancel_on_disconnect: bool = True,
+    client: Dict[str, str] = Depends(verify_api_client),
+):
+    """
+    Executa uma tarefa e transmite o progresso via Server-Sent Events.
+    Eventos: accepted, log, navigation, step (ações, conteúdo extraído, tokens e tempos)
+    e, por fim, result (TaskResponse) ou error. Se o cliente desconectar, a
+    execução é cancelada (a menos que cancel_on_disconnect=false).
+    """
+    task_id = f"task_{secrets.token_hex(8)}"
+
+    async def execute() -> TaskResponse:
+        async with admission.admit(client["tenant"], client["role"]) as ticket:
+            log_detailed_info(task_id, "Execução admitida", "DEBUG", {"queue_wait": round(ticket.queue_wait, 3)})
+            return await execute_browser_task(task_request, task_id)
+
+    task_events.open(task_id, client["tenant"])
+    task_events.publish(task_id, "accepted", {"task_id": task_id, "events_url": f"/tasks/{task_id}/events"})
+    runner = asyncio.create_task(run_with_events(task_id, lambda: run_with_result_cache(task_request, task_id, execute), client["tenant"]))
+    # O resultado/erro chega ao cliente pelo stream; evita aviso de exceção não recuperada
+    runner.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    def on_disconnect():
+        if cancel_on_disconnect and not runner.done():
+            logger.warning(f"Cliente desconectou do stream da tarefa {task_id}; cancelando a execução")
+            runner.cancel()
+
+    return event_stream_response(task_id, on_disconnect=on_disconnect)
+
+# Lotes de tarefas com paralelismo limitado sobre o pool de navegadores
+BATCH_MAX_TASKS = int(os.getenv("BATCH_MAX_TASKS", "100"))
+BATCH_MAX_PARALLEL = int(os.getenv("BATCH_MAX_PARALLEL", "4"))
+
+@app.post("/run_batch", response_model=BatchResponse)
+async def run_task_batch(
+    batch_request: BatchRequest,
+    cancel_on_disconnect: bool = True,
+    client: Dict[str, str] = Depends(verify_api_client),
+):
+    """
+    Executa uma lista de tarefas com paralelismo limitado (max_parallel).
+    Retorna os resultados na ordem de entrada, com erros e timeouts por item e
+    estatísticas de vazão e latência do lote. Com "stream": true, responde via SSE
+    com um evento "item" a cada tarefa concluída e um evento "summary" ao final.
+    """
+    tasks = batch_request.tasks
+    if not tasks:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="O lote não contém tarefas")
+    if len(tasks) > BATCH_MAX_TASKS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"O lote excede o limite de {BATCH_MAX_TASKS} tarefas")
+
+    batch_id = f"batch_{secrets.token_hex(8)}"
+    task_ids = [f"task_{secrets.token_hex(8)}" for _ in tasks]
+    max_parallel = min(batch_request.max_parallel or BATCH_MAX_PARALLEL, BATCH_MAX_PARALLEL, len(tasks))
+    logger.info(f"Lote {batch_id} recebido: {len(tasks)} tarefa(s), paralelismo {max_parallel}")
+
+    async def run_item(index: int, task_request: BrowserTask) -> TaskResponse:
+        task_id = task_ids[index]
+
+        async def execute() -> TaskResponse:
+            # O paralelismo do lote já é limitado; a admissão divide as vagas com os demais clientes
+            async with admission.admit(client["tenant"], client["role"], wait_timeout=None, enforce_limits=False):
+                return await execute_browser_task(task_request, task_id)
+
+        try:
+            return await run_with_events(task_id, lambda: run_with_result_cache(task_request, task_id, execute), client["tenant"])
+        except Exception as e:
+            logger.error(f"Lote {batch_id}: erro na tarefa {task_id}: {e}", exc_info=True)
+            return TaskResponse(task_id=task_id, status="error", error=str(e))
+
+    async def execute_batch(on_result=None) -> BatchResponse:
+        start = time.time()
+        outcomes = await run_batch(tasks, run_item, max_parallel, on_result)
+        results = [response for response, _ in outcomes]
+        stats = batch_stats([latency for _, latency in outcomes], [r.status for r in results], time.time() - start, max_parallel)
+        stats["cache_hits"] = sum(1 for r in results if (r.debug_info or {}).get("cache", {}).get("status") == "hit")
+        logger.info(f"Lote {batch_id} concluído em {stats['wall_time']}s ({stats['completed']}/{stats['tasks']} com sucesso)")
+        return BatchResponse(batch_id=batch_id, results=results, stats=stats)
+
+    if not batch_request.stream:
+        return await execute_batch()
+
+    task_events.open(batch_id, client["tenant"])
+    task_events.publish(batch_id, "accepted", {"batch_id": batch_id, "task_ids": task_ids, "max_parallel": max_parallel})
+
+    def on_result(index: int, response: TaskResponse, latency: float):
+        task_events.publish(batch_id, "item", {"index": index, "latency": round(latency, 3), "response": response.model_dump()})
+
+    async def stream_batch():
+        try:
+            batch_response = await execute_batch(on_result)
+        except asyncio.CancelledError:
+            task_events.close(batch_id, "error", {"detail": "Lote cancelado"})
+            raise
+        task_events.close(batch_id, "summary", {"batch_id": batch_id, "stats": batch_response.stats})
+
+    runner = asyncio.create_task(stream_batch())
+    runner.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    def on_disconnect():
+        if cancel_on_disconnect and not runner.done():
+            logger.warning(f"Cliente desconectou do stream do lote {batch_id}; cancelando as tarefas restantes")
+            runner.cancel()
+
+    return event_stream_response(batch_id, on_disconnect=on_disconnect)
+
+# Fila assíncrona de tarefas (POST /tasks + polling de status/resultado)
+async def run_queued_task(task_id: str, request: Dict[str, Any], owner: Optional[str]) -> Dict[str, Any]:
+    """Executor usado pelos workers da fila; aguarda vaga sem limite de tempo"""
+    tenant = owner or "anonymous"
+    task_request = BrowserTask(**request)
+
+    async def execute() -> TaskResponse:
+        async with admission.admit(tenant, TENANT_ROLES.get(tenant, ""), wait_timeout=None, enforce_limits=False):
+            return await execute_browser_task(task_request, task_id)
+
+    response = await run_with_events(task_id, lambda: run_with_result_cache(task_request, task_id, execute), owner)
+    return response.model_dump()
+
+def create_job_store():
+    """Cria o backend da fila conforme TASK_QUEUE_BACKEND (memory ou sqlite)"""
+    backend = os.getenv("TASK_QUEUE_BACKEND", "sqlite" if MULTI_WORKER else "memory").lower()
+    if MULTI_WORKER and backend != "sqlite":
+        logger.warning("Modo multi-worker com TASK_QUEUE_BACKEND em memória: status e resultado só serão encontrados no worker que recebeu a tarefa")
+    result_ttl = float(os.getenv("TASK_RESULT_TTL", "86400"))
+    if backend == "sqlite":
+        db_path = os.getenv("TASK_QUEUE_DB_PATH", "data/tasks.db")
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        logger.info(f"Fila de tarefas usando SQLite em {db_path}")
+        return SQLiteJobStore(db_path, result_ttl=result_ttl)
+    return InMemoryJobStore(result_ttl=result_ttl)
+
+task_scheduler = TaskScheduler(
+    store=create_job_store(),
+    executor=run_queued_task,
+    max_workers=int(os.getenv("TASK_QUEUE_WORKERS", "2")),
+    max_queue_size=int(os.getenv("TASK_QUEUE_MAX_SIZE", "100")),
+    poll_interval=float(os.getenv("TASK_QUEUE_POLL_INTERVAL", "1")),
+    on_cancel=lambda task_id: lifecycle.cancel(task_id),
+    shared=MULTI_WORKER,
+)
+
+@app.on_event("startup")
+async def start_task_scheduler():
+    """Inicia os workers da fila e recupera tarefas pendentes"""
+    await task_scheduler.start()
+
+@app.on_event("shutdown")
+async def stop_task_scheduler():
+    await task_scheduler.shutdown()
+
+def job_to_status(job: Dict[str, Any]) -> TaskStatus:
+    return TaskStatus(
+        task_id=job["task_id"],
+        status=job["status"],
+        created_at=datetime.fromtimestamp(job["created_at"]).isoformat(),
+        started_at=datetime.fromtimestamp(job["started_at"]).isoformat() if job["started_at"] else None,
+        finished_at=datetime.fromtimestamp(job["finished_at"]).isoformat() if job["finished_at"] else None,
+        status_url=f"/tasks/{job['task_id']}",
+        result_url=f"/tasks/{job['task_id']}/result",
+    )
+
+@app.post("/tasks", response_model=TaskStatus, status_code=status.HTTP_202_ACCEPTED)
+async def submit_task(task_request: BrowserTask, client: Dict[str, str] = Depends(verify_api_client)):
+    """
+    Enfileira uma tarefa de navegação e retorna o task_id imediatamente.
+    Use GET /tasks/{task_id} e GET /tasks/{task_id}/result para acompanhar.
+    """
+    task_id = f"task_{secrets.token_hex(8)}"
+    try:
+        # O stream de eventos é aberto pelo worker que reivindicar a tarefa (run_queued_task)
+        job = await task_scheduler.submit(task_id, task_request.model_dump(), owner=client["tenant"])
+    except QueueFullError as e:
+        logger.warning(f"Tarefa recusada: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "30"},
+        )
+    log_detailed_info(task_id, "Tarefa enfileirada", "INFO", {"url": task_request.url, "queue_depth": await task_scheduler.queue_depth()})
+    return job_to_status(job)
+
+def can_access_task(client: Dict[str, str], owner: Optional[str]) -> bool:
+    """Só o tenant que submeteu a tarefa (ou um admin) pode consultá-la ou cancelá-la"""
+    return client["role"] == "admin" or owner == client["tenant"]
+
+async def get_owned_job(task_id: str, client: Dict[str, str]) -> Dict[str, Any]:
+    """Registro da tarefa na fila; 404 se não existe ou pertence a outro cliente"""
+    job = await task_scheduler.store.get(task_id)
+    if job is None or not can_access_task(client, job["owner"]):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Tarefa {task_id} não encontrada")
+    return job
+
+async def check_task_owner(task_id: str, client: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    """
+    Verifica o dono de uma tarefa da fila ou com stream de eventos neste processo
+    (/run_task, /run_task/stream, lotes). Retorna o registro da fila, se houver;
+    404 se a tarefa não existe ou pertence a outro cliente.
+    """
+    job = await task_scheduler.store.get(task_id)
+    if job is not None:
+        found, owner = True, job["owner"]
+    else:
+        found, owner = task_events.exists(task_id), task_events.owner(task_id)
+    if not found or not can_access_task(client, owner):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Tarefa {task_id} não encontrada")
+    return job
+
+@app.get("/tasks/{task_id}", response_model=TaskStatus)
+async def get_task_status(task_id: str, client: Dict[str, str] = Depends(verify_api_client)):
+    """Retorna o status de uma tarefa enfileirada"""
+    return job_to_status(await get_owned_job(task_id, client))
+
+async def job_event_stream(task_id: str) -> AsyncIterator[str]:
+    """
+    Eventos SSE de uma tarefa sem stream neste processo, a partir do backend da fila:
+    "status" a cada mudança e "result" ao terminar. Se este worker reivindicar a tarefa
+    enquanto espera, passa a transmitir os eventos locais. Os eventos de status usam
+    id 0, para que uma reconexão com Last-Event-ID receba o histórico completo.
+    """
+    last_status = None
+    last_sent = time.time()
+    while True:
+        if task_events.exists(task_id):
+            async for entry in task_events.subscribe(task_id, 0, heartbeat=TASK_EVENTS_HEARTBEAT):
+                yield format_sse(entry)
+            return
+        job = await task_scheduler.store.get(task_id)
+        if job is None:
+            return
+        if job["response"] is not None:
+            yield format_sse({"id": 0, "event": "result", "timestamp": job["finished_at"], "data": job["response"]})
+            return
+        if job["status"] != last_status:
+            last_status = job["status"]
+            last_sent = time.time()
+            yield format_sse({"id": 0, "event": "status", "timestamp": last_sent, "data": {"task_id": task_id, "status": last_status}})
+        elif time.time() - last_sent >= TASK_EVENTS_HEARTBEAT:
+            last_sent = time.time()
+            yield format_sse(None)
+        await asyncio.sleep(task_scheduler.poll_interval)
+
+@app.get("/tasks/{task_id}/events")
+async def get_task_events(task_id: str, request: Request, client: Dict[str, str] = Depends(verify_api_client)):
+    """
+    Transmite os eventos de progresso de uma tarefa (enfileirada ou em execução) via SSE.
+    Eventos já emitidos são reenviados; use o cabeçalho Last-Event-ID para retomar.
+    """
+    await check_task_owner(task_id, client)
+    if not task_events.exists(task_id):
+        # Tarefa ainda na fila, ou executada por outro processo (multi-worker): os eventos são
+        # locais, então acompanha o status e o resultado no backend compartilhado da fila
+        return StreamingResponse(
+            job_event_stream(task_id),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "X-Task-Id": task_id},
+        )
+    try:
+        last_event_id = int(request.headers.get("last-event-id") or 0)
+    except ValueError:
+        last_event_id = 0
+    return event_stream_response(task_id, last_event_id)
+
+@app.get("/tasks/{task_id}/result", response_model=TaskResponse)
+async def get_task_result(task_id: str, response: Response, client: Dict[str, str] = Depends(verify_api_client)):
+    """
+    Retorna o resultado de uma tarefa enfileirada.
+    Enquanto a tarefa não termina, responde 202 com o status atual.
+    """
+    job = await get_owned_job(task_id, client)
+    if job["response"] is None:
+        response.status_code = status.HTTP_202_ACCEPTED
+        return TaskResponse(task_id=task_id, status=job["status"])
+    return TaskResponse(**job["response"])
+
+@app.delete("/tasks/{task_id}")
+async def cancel_task(task_id: str, client: Dict[str, str] = Depends(verify_api_client)):
+    """
+    Cancela uma tarefa. Enfileirada: sai da fila imediatamente. Em execução (neste
+    ou em outro worker): o agente para no fim do passo atual ou é interrompido
+    após TASK_CANCEL_GRACE segundos, e o contexto do navegador é fechado.
+    """
+    await check_task_owner(task_id, client)
+    running_here = lifecycle.cancel(task_id)
+    job_status = await task_scheduler.cancel(task_id)
+    if job_status is None and not running_here:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Tarefa {task_id} não encontrada")
+    if job_status == "cancelled":
+        return {"task_id": task_id, "status": "cancelled"}
+    if running_here or job_status == "running":
+        log_detailed_info(task_id, "Cancelamento solicitado pelo cliente", "WARNING")
+        return {"task_id": task_id, "status": "cancelling"}
+    raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Tarefa {task_id} já finalizada ({job_status})")
+
 @app.post("/diagnose_browser", response_model=DiagnosticResponse)
 async def diagnose_browser(
     diagnostic_req: DiagnosticRequest, 
@@ -509,6 +1505,10 @@ async def diagnose_browser(
     """
     Endpoint de diagnóstico que testa o acesso a um URL específico.
     Usado para verificar se o browser-use consegue acessar corretamente os sites.
+
+    Usa o driver Playwright e o navegador mantidos quentes (contexto novo por
+    requisição). Responde 503 com Retry-After quando DIAGNOSE_MAX_CONCURRENCY
+    diagnósticos já estão em andamento por mais de DIAGNOSE_QUEUE_TIMEOUT segundos.
     """
     diag_id = f"diag_{secrets.token_hex(6)}"
     logger.info(f"Solicitação de diagnóstico: {diag_id} - URL: {diagnostic_req.url}")
@@ -518,15 +1518,12 @@ async def diagnose_browser(
         "timestamp": datetime.now().isoformat(),
         "url": diagnostic_req.url,
     }
+    started = time.perf_counter()
     
     try:
-        # Esta é uma simplificação - na implementação real você usaria o browser_use
-        # para capturar uma screenshot e outros diagnósticos
-        from playwright.async_api import async_playwright
-        
-        async with async_playwright() as p:
-            browser = await p.chromium.launch()
-            page = await browser.new_page()
+        async with diagnostic_browser.context() as (context, timings):
+            debug_info["timings"] = timings
+            page = await context.new_page()
             
             # Adicionar logs para diagnóstico
             page.on("console", lambda msg: diag_logger.debug(f"Browser console [{msg.type}]: {msg.text}"))
@@ -534,7 +1531,9 @@ async def diagnose_browser(
             
             # Registrar progresso de navegação
             diag_logger.info(f"[{diag_id}] Navegando para {diagnostic_req.url}")
+            nav_start = time.perf_counter()
             response = await page.goto(diagnostic_req.url, wait_until="networkidle")
+            timings["navigation"] = time.perf_counter() - nav_start
             
             # Verificar resposta HTTP
             status_code = response.status if response else 0
@@ -575,15 +1574,25 @@ async def diagnose_browser(
             # Verificar título da página
             title = await page.title()
             debug_info["page_title"] = title
-            
-            await browser.close()
-            
-            return DiagnosticResponse(
-                status="success",
-                message=f"Diagnóstico concluído com sucesso para {diagnostic_req.url}",
-                timestamp=datetime.now().isoformat(),
-                debug_info=debug_info
-            )
+        
+        timings["total"] = time.perf_counter() - started
+        debug_info["timings"] = {k: round(v, 3) if isinstance(v, float) else v for k, v in timings.items()}
+        diag_logger.info(f"[{diag_id}] Tempos: {debug_info['timings']}")
+        
+        return DiagnosticResponse(
+            status="success",
+            message=f"Diagnóstico concluído com sucesso para {diagnostic_req.url}",
+            timestamp=datetime.now().isoformat(),
+            debug_info=debug_info
+        )
+    
+    except DiagnosticBusy as e:
+        logger.warning(f"Diagnóstico {diag_id} recusado: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "5"},
+        )
             
     except Exception as e:
         error_msg = str(e)
@@ -592,6 +1601,8 @@ async def diagnose_browser(
         
         debug_info["error"] = error_msg
         debug_info["traceback"] = trace
+        if "timings" in debug_info:
+            debug_info["timings"] = {k: round(v, 3) if isinstance(v, float) else v for k, v in debug_info["timings"].items()}
         
         return DiagnosticResponse(
             status="error",
@@ -605,6 +1616,168 @@ async def health_check():
     """Endpoint para verificar se a API está funcionando"""
     return {"status": "ok", "environment": os.getenv("ENVIRONMENT", "production")}
 
+@app.get("/browser_pool")
+async def browser_pool_stats(user_role: str = Depends(verify_api_key)):
+    """Retorna o estado do pool de navegadores (tamanho, reciclagens, RSS por navegador)"""
+    return browser_pool.stats()
+
+@app.get("/diagnose_browser/stats")
+async def diagnostic_browser_stats(user_role: str = Depends(verify_api_key)):
+    """Retorna o estado do navegador de diagnóstico (vagas, lançamentos, reciclagens, recusas)"""
+    return diagnostic_browser.stats()
+
+@app.get("/lifecycle")
+async def lifecycle_stats(user_role: str = Depends(verify_api_key)):
+    """Retorna as tarefas em execução com seus limites, timeouts, cancelamentos e a varredura de órfãos"""
+    return {
+        **lifecycle.stats(),
+        "browsers_force_killed": browser_pool.stats()["force_killed"],
+        "orphan_reaper": orphan_reaper.stats(),
+    }
+
+@app.get("/admission")
+async def admission_stats(user_role: str = Depends(verify_api_key)):
+    """Retorna o estado do controle de admissão (vagas em uso, fila, recusas)"""
+    stats = admission.stats()
+    if admission.shared_gate is not None:
+        stats["shared"] = await admission.shared_gate.stats()
+    return stats
+
+@app.get("/task_queue")
+async def task_queue_stats(user_role: str = Depends(verify_api_key)):
+    """Retorna o estado da fila de tarefas e do worker que atendeu a requisição"""
+    return {"api_workers": API_WORKERS, **(await task_scheduler.stats())}
+
+@app.get("/llm_clients")
+async def llm_clients_stats(user_role: str = Depends(verify_api_key)):
+    """Retorna o cache de clientes LLM e as estatísticas de reuso de conexões HTTP"""
+    return llm_clients.stats()
+
+@app.get("/result_cache")
+async def result_cache_stats(user_role: str = Depends(verify_api_key)):
+    """Retorna as estatísticas do cache de resultados"""
+    return await result_cache.stats()
+
+@app.get("/recipes")
+async def recipes_stats(user_role: str = Depends(verify_api_key)):
+    """Retorna as receitas de extração com taxa de acerto e tempo economizado"""
+    if recipes is None:
+        return {"enabled": False}
+    return {"enabled": True, **recipes.stats()}
+
+@app.get("/replay_scripts")
+async def replay_scripts_stats(user_role: str = Depends(verify_api_key)):
+    """Retorna as execuções gravadas para replay, com replays, falhas e tempo economizado"""
+    if replay_store is None:
+        return {"enabled": False}
+    return {"enabled": True, **(await replay_store.stats())}
+
+@app.get("/asset_cache")
+async def asset_cache_stats(user_role: str = Depends(verify_api_key)):
+    """Retorna o tamanho e a taxa de acerto do cache compartilhado de assets estáticos"""
+    if asset_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **(await asset_cache.stats())}
+
+@app.get("/llm_cache")
+async def llm_cache_stats(user_role: str = Depends(verify_api_key)):
+    """Retorna o tamanho, a validade e a taxa de acerto do cache de respostas do LLM"""
+    if llm_response_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **(await llm_response_cache.stats())}
+
+@app.get("/render_profiles")
+async def render_profiles_stats(user_role: str = Depends(verify_api_key)):
+    """Retorna os perfis de renderização com requisições bloqueadas, bytes economizados e tempos por domínio"""
+    return render_profiles.stats()
+
+@app.get("/load_profiles")
+async def load_profiles_stats(user_role: str = Depends(verify_api_key)):
+    """Retorna os perfis de carregamento aprendidos por domínio"""
+    if load_profiles is None:
+        return {"enabled": False}
+    return {"enabled": True, **(await load_profiles.stats())}
+
+async def collect_runtime_metrics():
+    """Atualiza os gauges (navegadores, filas, RSS) no momento da coleta"""
+    pool = browser_pool.stats()
+    BROWSERS_GAUGE.replace([
+        ({"state": "active"}, sum(1 for b in pool["browsers"] if not b["retiring"])),
+        ({"state": "retiring"}, sum(1 for b in pool["browsers"] if b["retiring"])),
+        ({"state": "launching"}, pool["launching"]),
+    ])
+    BROWSER_LEASES_GAUGE.set(pool["active_leases"])
+    QUEUE_DEPTH_GAUGE.set(await task_scheduler.queue_depth(), queue="tasks")
+    QUEUE_DEPTH_GAUGE.set(admission.queue_depth(), queue="admission")
+    RSS_GAUGE.set(psutil.Process().memory_info().rss, process="api")
+    RSS_GAUGE.set(sum(b["rss_mb"] for b in pool["browsers"]) * 1024 * 1024, process="browsers")
+    LOG_DROPPED_GAUGE.set(diag_pipeline.stats()["dropped_total"])
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics(user_role: str = Depends(verify_api_key)):
+    """Métricas no formato de exposição de texto do Prometheus"""
+    await collect_runtime_metrics()
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+def parse_time_filter(value: Optional[str]) -> Optional[float]:
+    """Aceita epoch em segundos ou data ISO 8601"""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Data inválida: {value}")
+
+@app.get("/logs")
+async def query_logs(
+    task_id: Optional[str] = None,
+    level: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    order: str = "desc",
+    user_role: str = Depends(verify_api_key),
+):
+    """
+    Consulta o log de diagnóstico pelo índice: filtros por task_id, nível mínimo
+    e intervalo de tempo, paginados com cursor. order=desc lê do mais recente
+    para o mais antigo; order=asc lê em ordem cronológica (útil para acompanhar
+    novos registros a partir do último cursor).
+    """
+    min_level = None
+    if level:
+        min_level = logging.getLevelName(level.upper())
+        if not isinstance(min_level, int):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Nível inválido: {level}")
+    try:
+        return await asyncio.to_thread(
+            diag_handler.search,
+            task_id=task_id,
+            min_level=min_level,
+            since=parse_time_filter(since),
+            until=parse_time_filter(until),
+            cursor=cursor,
+            limit=max(1, min(limit, 1000)),
+            forward=order.lower() == "asc",
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+@app.get("/log_pipeline")
+async def log_pipeline_stats(user_role: str = Depends(verify_api_key)):
+    """Retorna as métricas do pipeline de logging (fila, descartes, latência de escrita)"""
+    return diag_pipeline.stats()
+
+@app.on_event("shutdown")
+async def flush_log_pipeline():
+    """Grava os logs pendentes antes de encerrar"""
+    await asyncio.to_thread(diag_pipeline.close)
+
 @app.get("/view_logs/{lines}")
 async def view_recent_logs(lines: int = 50, user_role: str = Depends(verify_api_key)):
     """Retorna as linhas mais recentes do log de diagnóstico"""
@@ -612,15 +1785,12 @@ async def view_recent_logs(lines: int = 50, user_role: str = Depends(verify_api_
         lines = 1000  # Limitar para evitar problemas de performance
         
     try:
-        log_path = f"{log_dir}/browser_use_debug.log"
+        log_path = diag_handler.baseFilename
         if not os.path.exists(log_path):
             return {"status": "error", "message": "Arquivo de log não encontrado"}
             
-        # Ler as últimas 'lines' linhas do arquivo
-        with open(log_path, 'r') as f:
-            # Ler todas as linhas e obter as últimas N
-            all_lines = f.readlines()
-            recent_logs = all_lines[-lines:] if len(all_lines) > lines else all_lines
+        # Ler as últimas 'lines' linhas a partir do fim do arquivo
+        recent_logs = await asyncio.to_thread(tail_lines, log_path, lines)
             
         return {
             "status": "success", 
@@ -639,9 +1809,32 @@ async def root():
         "documentação": "/docs",
         "endpoints": [
             {"método": "POST", "caminho": "/run_task", "descrição": "Executa tarefa de navegação web"},
+            {"método": "POST", "caminho": "/run_task/stream", "descrição": "Executa tarefa transmitindo o progresso via SSE"},
+            {"método": "POST", "caminho": "/run_batch", "descrição": "Executa uma lista de tarefas com paralelismo limitado"},
+            {"método": "POST", "caminho": "/tasks", "descrição": "Enfileira tarefa de navegação e retorna o task_id"},
+            {"método": "GET", "caminho": "/tasks/{task_id}", "descrição": "Status de uma tarefa enfileirada"},
+            {"método": "GET", "caminho": "/tasks/{task_id}/result", "descrição": "Resultado de uma tarefa enfileirada"},
+            {"método": "GET", "caminho": "/tasks/{task_id}/events", "descrição": "Eventos de progresso de uma tarefa via SSE"},
+            {"método": "DELETE", "caminho": "/tasks/{task_id}", "descrição": "Cancela uma tarefa enfileirada ou em execução"},
             {"método": "POST", "caminho": "/diagnose_browser", "descrição": "Realiza diagnóstico de acesso a sites"},
+            {"método": "GET", "caminho": "/diagnose_browser/stats", "descrição": "Estado do navegador quente de diagnóstico"},
             {"método": "GET", "caminho": "/health", "descrição": "Verifica se a API está funcionando"},
-            {"método": "GET", "caminho": "/view_logs/{lines}", "descrição": "Visualiza logs recentes"}
+            {"método": "GET", "caminho": "/view_logs/{lines}", "descrição": "Visualiza logs recentes"},
+            {"método": "GET", "caminho": "/logs", "descrição": "Consulta o log de diagnóstico por task_id, nível e período"},
+            {"método": "GET", "caminho": "/log_pipeline", "descrição": "Métricas do pipeline de logging"},
+            {"método": "GET", "caminho": "/metrics", "descrição": "Métricas no formato Prometheus (latência por fase, navegadores, filas, RSS)"},
+            {"método": "GET", "caminho": "/browser_pool", "descrição": "Estado do pool de navegadores"},
+            {"método": "GET", "caminho": "/lifecycle", "descrição": "Tarefas em execução, timeouts, cancelamentos e processos órfãos"},
+            {"método": "GET", "caminho": "/admission", "descrição": "Estado do controle de admissão"},
+            {"método": "GET", "caminho": "/task_queue", "descrição": "Estado da fila de tarefas"},
+            {"método": "GET", "caminho": "/llm_clients", "descrição": "Cache de clientes LLM e reuso de conexões"},
+            {"método": "GET", "caminho": "/result_cache", "descrição": "Estatísticas do cache de resultados"},
+            {"método": "GET", "caminho": "/load_profiles", "descrição": "Perfis de carregamento aprendidos por domínio"},
+            {"método": "GET", "caminho": "/asset_cache", "descrição": "Cache compartilhado de assets estáticos"},
+            {"método": "GET", "caminho": "/llm_cache", "descrição": "Cache em disco das respostas do LLM"},
+            {"método": "GET", "caminho": "/render_profiles", "descrição": "Perfis de renderização: recursos bloqueados e bytes economizados"},
+            {"método": "GET", "caminho": "/recipes", "descrição": "Receitas de extração: taxa de acerto e tempo economizado"},
+            {"método": "GET", "caminho": "/replay_scripts", "descrição": "Execuções do agente gravadas para replay"}
         ]
     }
 
@@ -655,4 +1848,8 @@ if __name__ == "__main__":
     if os.getenv("ENVIRONMENT", "production").lower() != "production":
         print(f"Modo de desenvolvimento. API Keys disponíveis: {list(API_KEYS.keys())}")
     
-    uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
+    if MULTI_WORKER:
+        # Com vários workers o uvicorn precisa importar a aplicação em cada processo
+        uvicorn.run("api:app", host="0.0.0.0", port=8000, workers=API_WORKERS)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
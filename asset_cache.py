@@ -0,0 +1,330 @@
+"""
+Cache compartilhado de assets estáticos entre contextos isolados.
+
+Os navegadores do pool rodam com o cache HTTP desligado e cada tarefa recebe um
+contexto novo, então os mesmos bundles JS/CSS do gov.br e do bcb.gov.br são
+baixados em toda tarefa. Este cache (opt-in) intercepta apenas requisições GET
+de scripts, folhas de estilo, fontes e imagens, e só guarda respostas públicas:
+nada com Set-Cookie, Cache-Control private/no-store, Vary por cookie ou
+Authorization. Documentos HTML, XHR/fetch, cookies e storage nunca passam por
+aqui, de modo que o isolamento entre tarefas e tenants é mantido.
+
+O índice (SQLite) é chaveado pela URL e guarda os validadores (ETag e
+Last-Modified) e o prazo de validade; o corpo fica em disco endereçado pelo
+SHA-256 do conteúdo, de modo que o mesmo bundle servido por URLs diferentes é
+armazenado uma única vez. Respostas vencidas são revalidadas com requisição
+condicional (304 reaproveita o corpo). O tamanho total é limitado com descarte
+LRU.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional, Dict, Any, Iterable
+from urllib.parse import urlsplit
+
+logger = logging.getLogger("browser-use-api.asset_cache")
+
+CACHEABLE_TYPES = frozenset({"script", "stylesheet", "font", "image"})
+
+# last_access (ordem do descarte LRU) só é regravado em acertos se estiver mais velho
+# que isso: evita uma escrita no índice compartilhado a cada asset servido
+LAST_ACCESS_RESOLUTION = 300.0
+
+# Cabeçalhos reproduzidos ao servir do cache; Set-Cookie nunca é guardado e
+# Content-Encoding/Content-Length não valem para o corpo já decodificado
+STORED_HEADERS = (
+    "content-type",
+    "cache-control",
+    "etag",
+    "last-modified",
+    "expires",
+    "access-control-allow-origin",
+    "timing-allow-origin",
+    "cross-origin-resource-policy",
+)
+
+
+def parse_cache_control(value: str) -> Dict[str, Optional[str]]:
+    directives: Dict[str, Optional[str]] = {}
+    for part in value.lower().split(","):
+        name, _, arg = part.strip().partition("=")
+        if name:
+            directives[name] = arg.strip('"') or None
+    return directives
+
+
+def fresh_until(headers: Dict[str, str], now: float) -> Optional[float]:
+    """
+    Até quando a resposta pode ser servida sem revalidar, ou None se ela não
+    pode ser compartilhada. Sem prazo explícito, vale até `now` (revalida sempre).
+    """
+    cc = parse_cache_control(headers.get("cache-control", ""))
+    if "no-store" in cc or "private" in cc:
+        return None
+    if "set-cookie" in headers:
+        return None
+    vary = headers.get("vary", "").lower()
+    if "*" in vary or "cookie" in vary or "authorization" in vary:
+        return None
+    if "no-cache" in cc:
+        return now
+    for directive in ("s-maxage", "max-age"):
+        value = cc.get(directive)
+        if value and value.isdigit():
+            return now + int(value)
+    if headers.get("expires"):
+        try:
+            return max(now, parsedate_to_datetime(headers["expires"]).timestamp())
+        except (TypeError, ValueError):
+            return now
+    return now
+
+
+class AssetCache:
+    """
+    Índice SQLite + objetos em disco endereçados por conteúdo.
+
+    Args:
+        directory: Diretório do cache (índice e objetos)
+        max_bytes: Tamanho total máximo dos objetos
+        max_entry_bytes: Respostas maiores não são guardadas
+        hosts: Domínios cujos assets podem ser guardados (vazio: qualquer domínio)
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int = 500 * 1024 * 1024,
+        max_entry_bytes: int = 5 * 1024 * 1024,
+        hosts: Iterable[str] = (),
+    ):
+        self.directory = directory
+        self.objects_dir = os.path.join(directory, "objects")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.hosts = frozenset(h.strip().lower() for h in hosts if h.strip())
+        self._stats = {"hits": 0, "revalidated": 0, "misses": 0, "stored": 0, "not_storable": 0,
+                       "errors": 0, "evicted": 0, "bytes_served": 0}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(directory, "index.db"), check_same_thread=False, timeout=30)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS assets (
+                    url TEXT PRIMARY KEY,
+                    digest TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    headers TEXT NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    stored_at REAL NOT NULL,
+                    fresh_until REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_assets_last_access ON assets(last_access)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_assets_digest ON assets(digest)")
+            self._conn.commit()
+
+    def eligible(self, request) -> bool:
+        """Só GET de assets estáticos, sem credenciais explícitas, nos domínios permitidos"""
+        if request.method != "GET" or request.resource_type not in CACHEABLE_TYPES:
+            return False
+        parts = urlsplit(request.url)
+        if parts.scheme not in ("http", "https"):
+            return False
+        headers = request.headers
+        if "authorization" in headers or "range" in headers:
+            return False
+        if self.hosts:
+            host = (parts.hostname or "").lower()
+            return any(host == h or host.endswith("." + h) for h in self.hosts)
+        return True
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def _lookup(self, url: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT digest, headers, etag, last_modified, fresh_until, last_access FROM assets WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            if now - row[5] >= LAST_ACCESS_RESOLUTION:
+                self._conn.execute("UPDATE assets SET last_access = ? WHERE url = ?", (now, url))
+                self._conn.commit()
+        return {"digest": row[0], "headers": json.loads(row[1]), "etag": row[2], "last_modified": row[3], "fresh_until": row[4]}
+
+    def _read(self, digest: str) -> Optional[bytes]:
+        try:
+            with open(self._object_path(digest), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _store(self, url: str, headers: Dict[str, str], body: bytes, until: float):
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(body)
+            os.replace(tmp_path, path)
+        stored = {name: headers[name] for name in STORED_HEADERS if name in headers}
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO assets (url, digest, size, headers, etag, last_modified, stored_at, fresh_until, last_access)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (url, digest, len(body), json.dumps(stored), headers.get("etag"), headers.get("last-modified"), now, until, now),
+            )
+            self._conn.commit()
+        self._evict()
+
+    def _refresh(self, url: str, until: float):
+        with self._lock:
+            self._conn.execute("UPDATE assets SET fresh_until = ?, last_access = ? WHERE url = ?", (until, time.time(), url))
+            self._conn.commit()
+
+    def _forget(self, url: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM assets WHERE url = ?", (url,))
+            self._conn.commit()
+
+    def _total_bytes(self) -> int:
+        row = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT digest, size FROM assets)").fetchone()
+        return row[0]
+
+    def _evict(self):
+        """Descarta as URLs menos usadas até caber em max_bytes; objetos sem referência são apagados"""
+        removed = []
+        with self._lock:
+            total = self._total_bytes()
+            if total <= self.max_bytes:
+                return
+            for url, digest in self._conn.execute("SELECT url, digest FROM assets ORDER BY last_access").fetchall():
+                self._conn.execute("DELETE FROM assets WHERE url = ?", (url,))
+                self._stats["evicted"] += 1
+                if self._conn.execute("SELECT 1 FROM assets WHERE digest = ? LIMIT 1", (digest,)).fetchone() is None:
+                    removed.append(digest)
+                    total = self._total_bytes()
+                    if total <= self.max_bytes:
+                        break
+            self._conn.commit()
+        for digest in removed:
+            try:
+                os.remove(self._object_path(digest))
+            except FileNotFoundError:
+                pass
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._stats[name] += amount
+
+    async def handle(self, route, report: Dict[str, int]):
+        """Handler de context.route: serve do cache, revalida ou busca e guarda"""
+        request = route.request
+        if not self.eligible(request):
+            await route.fallback()
+            return
+        url = request.url
+        try:
+            entry = await asyncio.to_thread(self._lookup, url)
+            body = await asyncio.to_thread(self._read, entry["digest"]) if entry else None
+            if entry and body is None:
+                # Objeto removido por outro worker no descarte
+                await asyncio.to_thread(self._forget, url)
+                entry = None
+            if entry and entry["fresh_until"] > time.time():
+                await route.fulfill(status=200, headers=entry["headers"], body=body)
+                self._served("hits", report, len(body))
+                return
+
+            headers = dict(request.headers)
+            if entry:
+                if entry["etag"]:
+                    headers["if-none-match"] = entry["etag"]
+                if entry["last_modified"]:
+                    headers["if-modified-since"] = entry["last_modified"]
+            response = await route.fetch(headers=headers)
+            if entry and response.status == 304:
+                until = fresh_until({**entry["headers"], **response.headers}, time.time())
+                if until is not None:
+                    await asyncio.to_thread(self._refresh, url, until)
+                await route.fulfill(status=200, headers=entry["headers"], body=body)
+                self._served("revalidated", report, len(body))
+                return
+
+            fetched = await response.body()
+            self._count("misses")
+            report["misses"] += 1
+            until = fresh_until(response.headers, time.time()) if response.status == 200 else None
+            has_validators = "etag" in response.headers or "last-modified" in response.headers
+            if until is not None and (until > time.time() or has_validators) and len(fetched) <= self.max_entry_bytes:
+                await asyncio.to_thread(self._store, url, response.headers, fetched, until)
+                self._count("stored")
+            else:
+                self._count("not_storable")
+            await route.fulfill(response=response, body=fetched)
+        except Exception as e:
+            self._count("errors")
+            logger.debug(f"Cache de assets ignorado para {url}: {e}")
+            try:
+                await route.fallback()
+            except Exception:
+                # Requisição já respondida ou contexto fechado
+                pass
+
+    def _served(self, outcome: str, report: Dict[str, int], size: int):
+        self._count(outcome)
+        self._count("bytes_served", size)
+        report[outcome] += 1
+        report["bytes_served"] += size
+
+    async def attach(self, browser_context) -> Dict[str, int]:
+        """
+        Instala o cache no contexto Playwright da tarefa e retorna o relatório da
+        tarefa (atualizado enquanto ela roda).
+        """
+        report = {"hits": 0, "revalidated": 0, "misses": 0, "bytes_served": 0}
+        session = await browser_context.get_session()
+
+        async def handler(route):
+            await self.handle(route, report)
+
+        await session.context.route("**/*", handler)
+        return report
+
+    def _size(self) -> Dict[str, int]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM assets").fetchone()[0]
+            objects = self._conn.execute("SELECT COUNT(DISTINCT digest) FROM assets").fetchone()[0]
+            return {"entries": entries, "objects": objects, "bytes": self._total_bytes()}
+
+    async def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._stats)
+        lookups = counters["hits"] + counters["revalidated"] + counters["misses"]
+        return {
+            **(await asyncio.to_thread(self._size)),
+            "max_bytes": self.max_bytes,
+            "max_entry_bytes": self.max_entry_bytes,
+            "hosts": sorted(self.hosts),
+            **counters,
+            "hit_rate": round((counters["hits"] + counters["revalidated"]) / lookups, 3) if lookups else None,
+        }
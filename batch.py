@@ -0,0 +1,79 @@
+"""
+Execução de lotes de tarefas com paralelismo limitado.
+
+Cada item do lote roda como uma tarefa comum (contexto isolado do pool de
+navegadores, controle de admissão, cache de resultados), mas no máximo
+max_parallel itens ficam em execução ao mesmo tempo. Os resultados mantêm a
+ordem de entrada e cada conclusão pode ser notificada imediatamente (usado no
+modo streaming).
+"""
+
+import asyncio
+import logging
+import time
+from typing import Optional, Dict, Any, List, Sequence, Tuple, Callable, Awaitable, TypeVar
+
+from load_profiles import percentile
+
+logger = logging.getLogger("browser-use-api.batch")
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+async def run_batch(
+    items: Sequence[T],
+    run_item: Callable[[int, T], Awaitable[R]],
+    max_parallel: int,
+    on_result: Optional[Callable[[int, R, float], None]] = None,
+) -> List[Tuple[R, float]]:
+    """
+    Executa run_item para cada item com no máximo max_parallel em paralelo.
+
+    Args:
+        items: Itens do lote
+        run_item: Corrotina (índice, item) que executa o item; não deve levantar exceções
+        max_parallel: Itens executados simultaneamente
+        on_result: Chamado com (índice, resultado, latência) assim que cada item termina
+
+    Returns:
+        list: (resultado, latência em segundos) na ordem dos itens
+    """
+    semaphore = asyncio.Semaphore(max(1, max_parallel))
+    results: List[Optional[Tuple[R, float]]] = [None] * len(items)
+
+    async def run_one(index: int, item: T):
+        async with semaphore:
+            start = time.time()
+            result = await run_item(index, item)
+            latency = time.time() - start
+        results[index] = (result, latency)
+        if on_result is not None:
+            on_result(index, result, latency)
+
+    await asyncio.gather(*(run_one(i, item) for i, item in enumerate(items)))
+    return results
+
+
+def batch_stats(latencies: List[float], statuses: List[str], wall_time: float, max_parallel: int) -> Dict[str, Any]:
+    """Vazão e latência agregadas de um lote"""
+    count = len(latencies)
+    stats: Dict[str, Any] = {
+        "tasks": count,
+        "max_parallel": max_parallel,
+        "completed": sum(1 for s in statuses if s == "completed"),
+        "errors": sum(1 for s in statuses if s != "completed"),
+        "wall_time": round(wall_time, 3),
+        "throughput_per_minute": round(count / wall_time * 60, 2) if wall_time > 0 else 0.0,
+    }
+    if latencies:
+        stats["latency"] = {
+            "avg": round(sum(latencies) / count, 3),
+            "p50": round(percentile(latencies, 50), 3),
+            "p90": round(percentile(latencies, 90), 3),
+            "max": round(max(latencies), 3),
+            "sum": round(sum(latencies), 3),
+        }
+        # Quanto o paralelismo economizou em relação a executar os itens em sequência
+        stats["speedup"] = round(sum(latencies) / wall_time, 2) if wall_time > 0 else 0.0
+    return stats
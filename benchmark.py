@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Benchmark offline do /run_task: vazão, latência e memória sem sites reais nem LLM pago.
+
+A API roda neste processo (uvicorn em uma porta local) com o pool de navegadores,
+a admissão, as métricas e os logs reais; só o LLM e os sites são substituídos:
+- os sites são servidos pelo fixture_server.py (cópias sintéticas da CVM e do
+  BCB, com atraso configurável, carregamento via AJAX e paginação);
+- o LLM é o provider "mock:" da API (mock_llm.py), que executa um roteiro fixo
+  de ações (extrair, seguir "Próxima", concluir) com distribuição de latência
+  configurável.
+
+Para cada nível de concorrência são enviadas --tasks tarefas e reportados
+tarefas/s, latências p50/p95/p99, tarefas corretas (itens extraídos iguais aos
+servidos) e o pico de RSS do processo somado aos navegadores.
+
+Uso:
+    python benchmark.py --concurrency 1,4,8 --tasks 20 --scenario cvm,bcb --llm-latency lognormal:0.8:0.4
+
+O limite de agentes simultâneos e o tamanho do pool continuam vindo das
+variáveis de ambiente (MAX_CONCURRENT_AGENTS, BROWSER_POOL_MAX_SIZE, ...);
+ajuste-as para o nível de concorrência que quer medir.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import secrets
+import socket
+import sys
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+import psutil
+
+from load_profiles import percentile
+
+OUTPUT_DIR = "benchmark_results"
+
+# Cenários: página inicial, roteiro do LLM e seletor aguardado antes do agente
+SCENARIOS = {
+    "cvm": {"path": "/cvm/noticias", "task": "Extraia os títulos e links das notícias", "paginated": False, "wait_for_selector": ".titulo"},
+    "cvm-paginado": {"path": "/cvm/noticias", "task": "Extraia os títulos e links das notícias de todas as páginas", "paginated": True, "wait_for_selector": ".titulo"},
+    "bcb": {"path": "/bcb/normas", "task": "Extraia as normas listadas", "paginated": False, "wait_for_selector": "#resultados[data-carregado]"},
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def count_items(result: Any) -> int:
+    """Itens extraídos: tamanho da lista, ou da primeira lista dentro do objeto"""
+    if isinstance(result, list):
+        return len([item for item in result if not (isinstance(item, dict) and "raw_text" in item)])
+    if isinstance(result, dict):
+        for value in result.values():
+            if isinstance(value, list):
+                return len(value)
+    return 0
+
+
+class RSSSampler:
+    """Amostra periodicamente o RSS do processo e de todos os filhos (driver, Chromium, renderers)"""
+
+    def __init__(self, interval: float = 0.25):
+        self.interval = interval
+        self.peak = 0
+        self._task: Optional[asyncio.Task] = None
+        self._process = psutil.Process()
+
+    def sample(self) -> int:
+        total = 0
+        for proc in [self._process] + self._process.children(recursive=True):
+            try:
+                total += proc.memory_info().rss
+            except psutil.Error:
+                continue
+        self.peak = max(self.peak, total)
+        return total
+
+    async def _run(self):
+        while True:
+            self.sample()
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        self.peak = 0
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> float:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self.sample()
+        return round(self.peak / (1024 * 1024), 1)
+
+
+async def run_level(client, base_url: str, api_key: str, payloads: List[Tuple[Dict[str, Any], int]], concurrency: int,
+                    sampler: RSSSampler) -> Dict[str, Any]:
+    """
+    Envia as tarefas (payload, itens esperados) com até `concurrency` requisições
+    simultâneas e agrega os resultados
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    errors: List[str] = []
+    correct = 0
+
+    async def one(payload, expected):
+        nonlocal correct
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                response = await client.post(f"{base_url}/run_task", json=payload, headers={"Authorization": f"Bearer {api_key}"})
+                elapsed = time.perf_counter() - started
+                body = response.json() if response.status_code == 200 else {}
+                outcome = body.get("status", "error") if response.status_code == 200 else f"http_{response.status_code}"
+            except Exception as e:
+                elapsed = time.perf_counter() - started
+                body, outcome = {}, f"erro_{type(e).__name__}"
+                errors.append(str(e) or type(e).__name__)
+        statuses[outcome] = statuses.get(outcome, 0) + 1
+        if outcome == "completed":
+            latencies.append(elapsed)
+            if count_items(body.get("result")) == expected:
+                correct += 1
+
+    sampler.start()
+    started = time.perf_counter()
+    await asyncio.gather(*(one(payload, expected) for payload, expected in payloads))
+    wall = time.perf_counter() - started
+    peak_rss = await sampler.stop()
+    return {
+        "concurrency": concurrency,
+        "tasks": len(payloads),
+        "completed": statuses.get("completed", 0),
+        "correct": correct,
+        "statuses": statuses,
+        "wall_seconds": round(wall, 2),
+        "tasks_per_second": round(statuses.get("completed", 0) / wall, 3) if wall else None,
+        "latency_p50": round(percentile(latencies, 50), 3) if latencies else None,
+        "latency_p95": round(percentile(latencies, 95), 3) if latencies else None,
+        "latency_p99": round(percentile(latencies, 99), 3) if latencies else None,
+        "peak_rss_mb": peak_rss,
+        "errors": errors[:5],
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark offline do /run_task com sites e LLM simulados")
+    parser.add_argument("--concurrency", default="1,4,8", help="Níveis de concorrência separados por vírgula (padrão: 1,4,8)")
+    parser.add_argument("--tasks", type=int, default=20, help="Tarefas por nível (padrão: 20)")
+    parser.add_argument("--warmup", type=int, default=2, help="Tarefas de aquecimento, fora da medição (padrão: 2)")
+    parser.add_argument("--scenario", default="cvm,cvm-paginado,bcb", help=f"Cenários ({', '.join(SCENARIOS)}), alternados entre as tarefas")
+    parser.add_argument("--pages", type=int, default=3, help="Páginas das listagens (padrão: 3)")
+    parser.add_argument("--items", type=int, default=20, help="Itens por página (padrão: 20)")
+    parser.add_argument("--delay", type=float, default=0.1, help="Atraso das páginas HTML em segundos (padrão: 0.1)")
+    parser.add_argument("--ajax-delay", type=float, default=0.5, help="Atraso do AJAX das normas em segundos (padrão: 0.5)")
+    parser.add_argument("--llm-latency", default="0.3", help="Latência do LLM simulado: segundos ou distribuição, ex. lognormal:0.8:0.4 (padrão: 0.3)")
+    parser.add_argument("--seed", type=int, default=42, help="Semente das latências do LLM simulado (padrão: 42)")
+    parser.add_argument("--llm-cache", metavar="ARQUIVO", help="Cache de respostas do LLM (SQLite): a primeira execução grava, as seguintes reproduzem sem latência de LLM")
+    parser.add_argument("--load-wait", type=int, default=0, help="additional_load_wait_time das tarefas (padrão: 0)")
+    parser.add_argument("--recorded-dir", help="Diretório com cópias gravadas servidas em /recorded/")
+    parser.add_argument("--output", help="Arquivo JSON do resultado (padrão: benchmark_results/bench_<timestamp>.json)")
+    parser.add_argument("--verbose", action="store_true", help="Mantém os logs INFO da API")
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.concurrency.split(",") if level.strip()]
+    scenarios = [name.strip() for name in args.scenario.split(",") if name.strip()]
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"Cenário(s) desconhecido(s): {', '.join(unknown)}")
+
+    # A chave e as opções precisam estar no ambiente antes de importar a API
+    api_key = secrets.token_urlsafe(24)
+    os.environ["API_KEY"] = api_key
+    os.environ.setdefault("DIAGNOSE_PREWARM", "false")
+    os.environ["MOCK_LLM_ENABLED"] = "true"
+    os.environ["MOCK_LLM_LATENCY"] = args.llm_latency
+    os.environ["MOCK_LLM_SEED"] = str(args.seed)
+    if args.llm_cache:
+        os.environ["LLM_CACHE_ENABLED"] = "true"
+        os.environ["LLM_CACHE_PATH"] = args.llm_cache
+
+    from fixture_server import FixtureServer
+    from mock_llm import parse_latency
+    try:
+        parse_latency(args.llm_latency)
+    except ValueError as e:
+        parser.error(str(e))
+    import api
+    import httpx
+    import uvicorn
+    import logging
+
+    if not args.verbose:
+        # Só a saída no terminal fica mais silenciosa; os arquivos de log continuam completos
+        for handler in logging.getLogger().handlers + logging.getLogger("browser-use-api").handlers + api.diag_pipeline.targets:
+            if type(handler) is logging.StreamHandler:
+                handler.setLevel(logging.WARNING)
+        logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    fixtures = FixtureServer(pages=args.pages, items_per_page=args.items, delay=args.delay,
+                             ajax_delay=args.ajax_delay, directory=args.recorded_dir)
+    fixtures_url = fixtures.start()
+
+    def payload(i: int) -> Tuple[Dict[str, Any], int]:
+        name = scenarios[i % len(scenarios)]
+        scenario = SCENARIOS[name]
+        task = {
+            "url": fixtures_url + scenario["path"],
+            "task": scenario["task"],
+            "model": f"mock:paginated:{args.pages}" if scenario["paginated"] else "mock:scripted",
+            "wait_for_selector": scenario["wait_for_selector"],
+            "additional_load_wait_time": args.load_wait,
+            # Receitas e replay pulariam o agente; o benchmark mede o caminho completo
+            "use_recipes": False,
+        }
+        return task, fixtures.expected_items(None if scenario["paginated"] else 1)
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(api.app, host="127.0.0.1", port=port, log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        if server_task.done():
+            server_task.result()
+        await asyncio.sleep(0.1)
+    base_url = f"http://127.0.0.1:{port}"
+    print(f"API em {base_url}, fixtures em {fixtures_url}, cenários: {', '.join(scenarios)}")
+
+    sampler = RSSSampler()
+    results = []
+    try:
+        async with httpx.AsyncClient(timeout=httpx.Timeout(600.0), trust_env=False) as client:
+            if args.warmup:
+                await run_level(client, base_url, api_key, [payload(i) for i in range(args.warmup)], max(levels), sampler)
+            for level in levels:
+                print(f"Concorrência {level}: {args.tasks} tarefas...")
+                result = await run_level(client, base_url, api_key, [payload(i) for i in range(args.tasks)], level, sampler)
+                results.append(result)
+                print(f"  {result['tasks_per_second']} tarefas/s | p50 {result['latency_p50']}s p95 {result['latency_p95']}s "
+                      f"p99 {result['latency_p99']}s | {result['correct']}/{result['tasks']} corretas | pico RSS {result['peak_rss_mb']} MB"
+                      f" | {result['statuses']}")
+    finally:
+        server.should_exit = True
+        await server_task
+        fixtures.stop()
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    output = args.output or os.path.join(OUTPUT_DIR, f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "verbose")},
+        "environment": {k: os.getenv(k) for k in ("MAX_CONCURRENT_AGENTS", "BROWSER_POOL_MAX_SIZE", "BROWSER_POOL_CONTEXTS_PER_BROWSER", "RENDER_PROFILE", "ASSET_CACHE_ENABLED", "LLM_CACHE_ENABLED")},
+        "fixture_requests": fixtures.requests,
+        "levels": results,
+    }
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"Resultado salvo em {output}")
+    if any(level["correct"] < level["tasks"] for level in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -14,6 +14,8 @@ import time
 from datetime import datetime
 from playwright.async_api import async_playwright
 
+from load_profiles import percentile
+
 # Configuração
 DEFAULT_URL = "https://www.gov.br/cvm/pt-br/assuntos/noticias"
 OUTPUT_DIR = "diagnostic_results"
@@ -224,21 +226,214 @@ async def diagnose_site(url, selectors=None, wait_time=5, headless=True, verbose
     
     return result
 
+# Avalia todos os seletores em uma única ida e volta ao navegador
+SELECTORS_SCRIPT = """
+(selectors) => Object.fromEntries(selectors.map((selector) => {
+    let elements;
+    try {
+        elements = document.querySelectorAll(selector);
+    } catch (e) {
+        return [selector, {found: false, error: String(e)}];
+    }
+    if (!elements.length) return [selector, {found: false, count: 0}];
+    const el = elements[0];
+    const rect = el.getBoundingClientRect();
+    const style = window.getComputedStyle(el);
+    const visible = rect.width > 0 && rect.height > 0 && style.visibility !== 'hidden' && style.display !== 'none';
+    const text = (el.textContent || '').trim();
+    return [selector, {
+        found: true,
+        count: elements.length,
+        visible: visible,
+        text_preview: text.length > 100 ? text.slice(0, 100) + '...' : text,
+    }];
+}))
+"""
+
+ALL_SELECTORS_PRESENT = "(selectors) => selectors.every((s) => { try { return !!document.querySelector(s); } catch (e) { return true; } })"
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+def load_targets(urls=None, url_file=None, selectors=None):
+    """
+    Lista de alvos {"url", "selectors"} a partir de --urls e/ou de um arquivo.
+    O arquivo aceita uma URL por linha ou linhas JSON {"url": ..., "selectors": [...]};
+    linhas vazias e iniciadas por # são ignoradas.
+    """
+    targets = [{"url": url, "selectors": list(selectors or [])} for url in (urls or [])]
+    if url_file:
+        with open(url_file, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                if line.startswith("{"):
+                    entry = json.loads(line)
+                    targets.append({"url": entry["url"], "selectors": entry.get("selectors") or list(selectors or [])})
+                else:
+                    targets.append({"url": line, "selectors": list(selectors or [])})
+    return targets
+
+async def diagnose_in_context(browser, target, wait_time=0, timeout=60, wait_until="networkidle", artifacts="failures"):
+    """
+    Diagnóstico de uma URL em um contexto novo do navegador compartilhado.
+    Os seletores são aguardados juntos (até 5s) e avaliados em uma única chamada.
+
+    Args:
+        artifacts: "all", "failures" (screenshot e HTML só quando o diagnóstico falha) ou "none"
+    """
+    url = target["url"]
+    selectors = target.get("selectors") or []
+    started = time.time()
+    result = {
+        "timestamp": datetime.now().isoformat(),
+        "url": url,
+        "success": False,
+        "errors": [],
+        "page_info": {},
+        "selectors": {},
+    }
+    context = await browser.new_context(viewport={"width": 1280, "height": 800}, user_agent=DEFAULT_USER_AGENT)
+    try:
+        page = await context.new_page()
+        page_errors = []
+        page.on("pageerror", lambda err: page_errors.append(str(err)))
+        try:
+            nav_start = time.time()
+            response = await page.goto(url, wait_until=wait_until, timeout=timeout * 1000)
+            result["page_info"]["load_time_seconds"] = round(time.time() - nav_start, 2)
+            if response:
+                result["page_info"]["status_code"] = response.status
+            else:
+                result["errors"].append("Resposta nula")
+            if wait_time > 0:
+                await asyncio.sleep(wait_time)
+            if selectors:
+                try:
+                    await page.wait_for_function(ALL_SELECTORS_PRESENT, arg=selectors, timeout=5000)
+                except Exception:
+                    pass  # Os ausentes aparecem como found=false na avaliação
+                result["selectors"] = await page.evaluate(SELECTORS_SCRIPT, selectors)
+            result["page_info"]["title"] = await page.title()
+            result["page_info"]["final_url"] = page.url
+            result["page_info"]["frames_count"] = len(page.frames)
+            status_code = result["page_info"].get("status_code", 0)
+            result["success"] = bool(response) and status_code < 400 and all(
+                info.get("found") for info in result["selectors"].values()
+            )
+        except Exception as e:
+            result["errors"].append(str(e))
+        if page_errors:
+            result["page_info"]["page_errors"] = page_errors[:10]
+        if artifacts == "all" or (artifacts == "failures" and not result["success"]):
+            stamp = f"{int(time.time())}_{abs(hash(url)) % 100000}"
+            try:
+                screenshot_path = os.path.join(OUTPUT_DIR, f"screenshot_{stamp}.png")
+                await page.screenshot(path=screenshot_path)
+                result["page_info"]["screenshot_path"] = screenshot_path
+                html_path = os.path.join(OUTPUT_DIR, f"page_{stamp}.html")
+                with open(html_path, "w", encoding="utf-8") as f:
+                    f.write(await page.content())
+                result["page_info"]["html_path"] = html_path
+            except Exception as e:
+                result["errors"].append(f"Falha ao salvar artefatos: {e}")
+    finally:
+        await context.close()
+    result["duration_seconds"] = round(time.time() - started, 2)
+    return result
+
+async def diagnose_many(targets, concurrency=8, report_path=None, wait_time=0, timeout=60,
+                        wait_until="networkidle", artifacts="failures", headless=True, verbose=True):
+    """
+    Diagnostica vários sites em paralelo com um único navegador e até `concurrency`
+    contextos simultâneos. Cada resultado é gravado como uma linha do relatório JSONL
+    assim que termina; retorna o resumo da varredura.
+    """
+    report_path = report_path or os.path.join(OUTPUT_DIR, f"sweep_{int(time.time())}.jsonl")
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    started = time.time()
+    results = []
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=headless)
+        try:
+            with open(report_path, "w", encoding="utf-8") as report:
+                async def run(target):
+                    async with semaphore:
+                        try:
+                            result = await diagnose_in_context(browser, target, wait_time, timeout, wait_until, artifacts)
+                        except Exception as e:
+                            result = {"timestamp": datetime.now().isoformat(), "url": target["url"], "success": False, "errors": [str(e)]}
+                    report.write(json.dumps(result, ensure_ascii=False) + "\n")
+                    report.flush()
+                    results.append(result)
+                    if verbose:
+                        mark = "✅" if result["success"] else "❌"
+                        print(f"{mark} [{len(results)}/{len(targets)}] {target['url']} ({result.get('duration_seconds', '-')}s)")
+
+                await asyncio.gather(*(run(t) for t in targets))
+        finally:
+            await browser.close()
+
+    load_times = sorted(r["page_info"]["load_time_seconds"] for r in results if r.get("page_info", {}).get("load_time_seconds") is not None)
+    return {
+        "report_path": report_path,
+        "total": len(results),
+        "succeeded": sum(1 for r in results if r["success"]),
+        "failed": [r["url"] for r in results if not r["success"]],
+        "concurrency": concurrency,
+        "elapsed_seconds": round(time.time() - started, 2),
+        "load_time_p50": percentile(load_times, 50) if load_times else None,
+        "load_time_p90": percentile(load_times, 90) if load_times else None,
+    }
+
 async def main():
     parser = argparse.ArgumentParser(description="Ferramenta de diagnóstico para sites usando Playwright")
     parser.add_argument("--url", default=DEFAULT_URL, help=f"URL do site a ser diagnosticado (padrão: {DEFAULT_URL})")
     parser.add_argument("--selectors", nargs="+", help="Seletores CSS para verificar (ex: '.titulo' 'h1' 'header')")
-    parser.add_argument("--wait", type=int, default=5, help="Tempo de espera adicional em segundos (padrão: 5)")
+    parser.add_argument("--wait", type=int, default=None,
+                        help="Tempo de espera adicional em segundos (padrão: 5 para uma URL, 0 no modo de várias URLs)")
     parser.add_argument("--visible", action="store_true", help="Executar em modo visível (não headless)")
     parser.add_argument("--quiet", action="store_true", help="Modo silencioso (menos output)")
+    parser.add_argument("--urls", nargs="+", help="Várias URLs: diagnóstico em paralelo com relatório JSONL")
+    parser.add_argument("--url-file", help="Arquivo com uma URL por linha ou linhas JSON {\"url\": ..., \"selectors\": [...]}")
+    parser.add_argument("--concurrency", type=int, default=8, help="Contextos simultâneos no modo de várias URLs (padrão: 8)")
+    parser.add_argument("--report", help="Arquivo JSONL do relatório (padrão: diagnostic_results/sweep_<timestamp>.jsonl)")
+    parser.add_argument("--timeout", type=int, default=60, help="Timeout de navegação em segundos no modo de várias URLs (padrão: 60)")
+    parser.add_argument("--wait-until", default="networkidle", choices=["load", "domcontentloaded", "networkidle", "commit"],
+                        help="Evento de carregamento aguardado no modo de várias URLs (padrão: networkidle)")
+    parser.add_argument("--artifacts", default="failures", choices=["all", "failures", "none"],
+                        help="Screenshot e HTML no modo de várias URLs (padrão: só para falhas)")
     
     args = parser.parse_args()
     
+    if args.urls or args.url_file:
+        targets = load_targets(args.urls, args.url_file, args.selectors)
+        print(f"Iniciando diagnóstico de {len(targets)} site(s) com {args.concurrency} contexto(s) simultâneo(s)")
+        summary = await diagnose_many(
+            targets,
+            concurrency=args.concurrency,
+            report_path=args.report,
+            # No modo de varredura a espera adicional é opcional (padrão 0), não os 5s do modo de uma URL
+            wait_time=0 if args.wait is None else args.wait,
+            timeout=args.timeout,
+            wait_until=args.wait_until,
+            artifacts=args.artifacts,
+            headless=not args.visible,
+            verbose=not args.quiet,
+        )
+        print(f"\n{summary['succeeded']}/{summary['total']} site(s) OK em {summary['elapsed_seconds']}s "
+              f"(p50 {summary['load_time_p50']}s, p90 {summary['load_time_p90']}s de carregamento)")
+        for url in summary["failed"]:
+            print(f"❌ {url}")
+        print(f"Relatório JSONL: {summary['report_path']}")
+        return
+    
     print(f"Iniciando diagnóstico do site: {args.url}")
     result = await diagnose_site(
         url=args.url,
         selectors=args.selectors,
-        wait_time=args.wait,
+        wait_time=5 if args.wait is None else args.wait,
         headless=not args.visible,
         verbose=not args.quiet
     )
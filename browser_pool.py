@@ -0,0 +1,448 @@
+"""
+Pool de navegadores Chromium pré-inicializados para as tarefas da API.
+
+Em vez de lançar um Chromium novo a cada tarefa, o pool mantém processos
+"quentes" e entrega a cada tarefa um contexto novo e isolado (equivalente a uma
+janela anônima: cookies, storage e cache próprios, descartados ao final).
+Os navegadores são reciclados após N tarefas ou ao ultrapassar M MB de RSS.
+"""
+
+import asyncio
+import logging
+import secrets
+import time
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, Any, List, Tuple, Callable, Set
+
+import psutil
+from browser_use import Browser, BrowserConfig
+from browser_use.browser.context import BrowserContext
+
+logger = logging.getLogger("browser-use-api.pool")
+
+# Flags anti-cache aplicadas a todos os navegadores do pool.
+# O isolamento entre tarefas vem do contexto novo por tarefa; estas flags garantem
+# que nada seja persistido em disco ou reaproveitado da memória do processo.
+ISOLATION_CHROMIUM_ARGS = [
+    '--no-first-run',
+    '--no-default-browser-check',
+    '--disable-default-apps',
+    '--disable-extensions',
+    '--disable-features=TranslateUI,VizDisplayCompositor',
+    '--disable-web-security',
+    '--no-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-gpu',
+    '--disable-software-rasterizer',
+
+    # CACHE DESTRUCTION: Zero persistência entre execuções
+    '--disk-cache-size=0',
+    '--memory-cache-size=0',
+    '--disable-application-cache',
+    '--disable-offline-load-stale-cache',
+    '--disable-background-networking',
+    '--disable-background-timer-throttling',
+    '--disable-backgrounding-occluded-windows',
+    '--disable-renderer-backgrounding',
+
+    '--data-reduction-proxy-bypass',
+    '--disable-session-crashed-bubble',
+    '--disable-infobars',
+
+    # OTIMIZAÇÕES ADICIONAIS
+    '--disable-blink-features=AutomationControlled',
+    '--disable-ipc-flooding-protection',
+]
+
+
+class PooledBrowser:
+    """Um processo Chromium gerenciado pelo pool"""
+
+    def __init__(self, browser: Browser, launch_time: float):
+        self.browser_id = f"browser_{secrets.token_hex(4)}"
+        self.browser = browser
+        self.launch_time = launch_time
+        self.created_at = time.time()
+        self.tasks_served = 0
+        self.active_leases = 0
+        self.retiring = False
+        self.retire_reason: Optional[str] = None
+        # Última amostra de RSS (MB), atualizada fora do loop de eventos pelo health check
+        self.rss_mb = 0.0
+        self.rss_sampled_at: Optional[float] = None
+
+    def driver_process(self) -> Optional[psutil.Process]:
+        """Processo do driver Playwright deste navegador (pai da árvore do Chromium)"""
+        try:
+            transport = self.browser.playwright._impl_obj._connection._transport
+            return psutil.Process(transport._proc.pid)
+        except Exception:
+            return None
+
+    def process_tree(self) -> List[psutil.Process]:
+        """Todos os processos (driver + Chromium + renderers) deste navegador"""
+        driver = self.driver_process()
+        if driver is None:
+            return []
+        try:
+            return [driver] + driver.children(recursive=True)
+        except psutil.Error:
+            return []
+
+    def sample_rss(self) -> float:
+        """
+        Mede a memória residente total da árvore de processos, em MB, e guarda em rss_mb.
+        Percorre a árvore com psutil (bloqueante): chamar via asyncio.to_thread.
+        """
+        total = 0
+        for proc in self.process_tree():
+            try:
+                total += proc.memory_info().rss
+            except psutil.Error:
+                continue
+        self.rss_mb = total / (1024 * 1024)
+        self.rss_sampled_at = time.time()
+        return self.rss_mb
+
+    def is_connected(self) -> bool:
+        playwright_browser = getattr(self.browser, "playwright_browser", None)
+        return bool(playwright_browser and playwright_browser.is_connected())
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "browser_id": self.browser_id,
+            "tasks_served": self.tasks_served,
+            "active_leases": self.active_leases,
+            "age_seconds": round(time.time() - self.created_at, 1),
+            "launch_time": round(self.launch_time, 3),
+            "rss_mb": round(self.rss_mb, 1),
+            "connected": self.is_connected(),
+            "retiring": self.retiring,
+        }
+
+
+class BrowserLease:
+    """Contexto isolado emprestado de um navegador do pool para uma única tarefa"""
+
+    def __init__(self, pooled: PooledBrowser, context: BrowserContext, wait_time: float, cold_start: bool):
+        self.pooled = pooled
+        self.context = context
+        self.wait_time = wait_time
+        self.cold_start = cold_start
+
+    @property
+    def browser(self) -> Browser:
+        return self.pooled.browser
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "browser_id": self.pooled.browser_id,
+            "lease_wait_time": round(self.wait_time, 3),
+            "cold_start": self.cold_start,
+            "browser_tasks_served": self.pooled.tasks_served,
+        }
+
+
+class BrowserPool:
+    """
+    Pool de navegadores Chromium com tamanho mínimo/máximo, health check e reciclagem.
+
+    Args:
+        min_size: Navegadores mantidos quentes mesmo sem carga
+        max_size: Limite de processos Chromium simultâneos
+        contexts_per_browser: Tarefas (contextos) simultâneas por navegador
+        max_tasks_per_browser: Recicla o navegador após atender N tarefas
+        max_rss_mb: Recicla o navegador quando a árvore de processos passa de M MB (medido a cada health check)
+        health_check_interval: Intervalo, em segundos, entre verificações de saúde
+        headless: Executa o Chromium em modo headless
+        on_launch: Chamado com o tempo de lançamento (segundos) de cada navegador
+        context_close_timeout: Tempo máximo, em segundos, para fechar o contexto de uma tarefa;
+            se o fechamento falhar ou travar, a árvore de processos do navegador é encerrada
+    """
+
+    def __init__(
+        self,
+        min_size: int = 1,
+        max_size: int = 4,
+        contexts_per_browser: int = 2,
+        max_tasks_per_browser: int = 50,
+        max_rss_mb: int = 1500,
+        health_check_interval: float = 30.0,
+        headless: bool = True,
+        on_launch: Optional[Callable[[float], None]] = None,
+        context_close_timeout: float = 10.0,
+    ):
+        self.min_size = max(0, min_size)
+        self.max_size = max(1, max_size, self.min_size)
+        self.contexts_per_browser = max(1, contexts_per_browser)
+        self.max_tasks_per_browser = max_tasks_per_browser
+        self.max_rss_mb = max_rss_mb
+        self.health_check_interval = health_check_interval
+        self.headless = headless
+        self.on_launch = on_launch
+        self.context_close_timeout = context_close_timeout
+
+        self._browsers: List[PooledBrowser] = []
+        self._launching = 0
+        self._condition = asyncio.Condition()
+        self._health_task: Optional[asyncio.Task] = None
+        self._closed = False
+
+        self._stats = {
+            "launches": 0,
+            "launch_failures": 0,
+            "recycled": 0,
+            "force_killed": 0,
+            "leases": 0,
+            "cold_starts": 0,
+            "total_lease_wait_time": 0.0,
+        }
+
+    def _browser_config(self) -> BrowserConfig:
+        return BrowserConfig(
+            headless=self.headless,
+            extra_browser_args=list(ISOLATION_CHROMIUM_ARGS),
+        )
+
+    async def start(self):
+        """Pré-aquece min_size navegadores e inicia o health check periódico"""
+        self._closed = False
+        await self._ensure_min_size()
+        if self._health_task is None and self.health_check_interval > 0:
+            self._health_task = asyncio.create_task(self._health_check_loop())
+        logger.info(f"Pool de navegadores iniciado com {len(self._browsers)} navegador(es) quente(s)")
+
+    async def shutdown(self):
+        """Encerra o health check e fecha todos os navegadores"""
+        self._closed = True
+        if self._health_task:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+        async with self._condition:
+            browsers = list(self._browsers)
+            self._browsers.clear()
+            self._condition.notify_all()
+        await asyncio.gather(*(self._close_browser(b) for b in browsers), return_exceptions=True)
+        logger.info("Pool de navegadores encerrado")
+
+    async def _launch(self) -> PooledBrowser:
+        start = time.time()
+        browser = Browser(config=self._browser_config())
+        try:
+            await browser.get_playwright_browser()
+        except Exception:
+            self._stats["launch_failures"] += 1
+            try:
+                await browser.close()
+            except Exception:
+                pass
+            raise
+        pooled = PooledBrowser(browser, launch_time=time.time() - start)
+        self._stats["launches"] += 1
+        if self.on_launch is not None:
+            self.on_launch(pooled.launch_time)
+        logger.info(f"Navegador {pooled.browser_id} lançado em {pooled.launch_time:.2f}s")
+        return pooled
+
+    async def _close_browser(self, pooled: PooledBrowser):
+        """Fecha o navegador e garante que nenhum processo da árvore sobreviva"""
+        processes = pooled.process_tree()
+        try:
+            await asyncio.wait_for(pooled.browser.close(), timeout=self.context_close_timeout)
+        except Exception as e:
+            logger.warning(f"Erro ao fechar navegador {pooled.browser_id}: {e!r}")
+        for proc in processes:
+            try:
+                if proc.is_running():
+                    proc.kill()
+            except psutil.Error:
+                continue
+        logger.info(f"Navegador {pooled.browser_id} fechado ({pooled.retire_reason or 'encerramento'})")
+
+    def _pick_available(self) -> Optional[PooledBrowser]:
+        candidates = [
+            b for b in self._browsers
+            if not b.retiring and b.active_leases < self.contexts_per_browser
+        ]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda b: b.active_leases)
+
+    async def _acquire(self) -> Tuple[PooledBrowser, bool]:
+        async with self._condition:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Pool de navegadores encerrado")
+                pooled = self._pick_available()
+                if pooled is not None:
+                    pooled.active_leases += 1
+                    return pooled, False
+                if len(self._browsers) + self._launching < self.max_size:
+                    self._launching += 1
+                    break
+                await self._condition.wait()
+
+        # Lança fora do lock para não bloquear quem só precisa devolver contextos
+        try:
+            pooled = await self._launch()
+        except Exception:
+            async with self._condition:
+                self._launching -= 1
+                self._condition.notify_all()
+            raise
+
+        async with self._condition:
+            self._launching -= 1
+            pooled.active_leases += 1
+            self._browsers.append(pooled)
+        return pooled, True
+
+    def _recycle_reason(self, pooled: PooledBrowser) -> Optional[str]:
+        if not pooled.is_connected():
+            return "desconectado"
+        if self.max_tasks_per_browser and pooled.tasks_served >= self.max_tasks_per_browser:
+            return f"limite de {self.max_tasks_per_browser} tarefas"
+        # Só lê a última amostra do health check: nada de psutil sob o lock
+        if self.max_rss_mb and pooled.rss_mb > self.max_rss_mb:
+            return f"RSS de {pooled.rss_mb:.0f}MB acima de {self.max_rss_mb}MB"
+        return None
+
+    async def _release(self, pooled: PooledBrowser, force_kill: bool = False):
+        to_close = None
+        async with self._condition:
+            pooled.active_leases -= 1
+            pooled.tasks_served += 1
+            if force_kill and pooled in self._browsers:
+                # Navegador travado: encerrado já, sem esperar os outros contextos (que falhariam de qualquer forma)
+                if not pooled.retiring:
+                    self._retire(pooled, "falha ao fechar contexto")
+                self._browsers.remove(pooled)
+                self._stats["force_killed"] += 1
+                to_close = pooled
+            elif not pooled.retiring:
+                reason = self._recycle_reason(pooled)
+                if reason:
+                    self._retire(pooled, reason)
+            if pooled.retiring and pooled.active_leases == 0 and pooled in self._browsers:
+                self._browsers.remove(pooled)
+                to_close = pooled
+            self._condition.notify_all()
+
+        if to_close is not None:
+            await self._close_browser(to_close)
+            if not self._closed:
+                asyncio.create_task(self._ensure_min_size())
+
+    def _retire(self, pooled: PooledBrowser, reason: str):
+        pooled.retiring = True
+        pooled.retire_reason = reason
+        self._stats["recycled"] += 1
+        logger.info(f"Reciclando navegador {pooled.browser_id}: {reason}")
+
+    @asynccontextmanager
+    async def lease(self, task_id: str):
+        """
+        Empresta um contexto novo e isolado de um navegador quente.
+        O contexto é sempre fechado ao final, mesmo em caso de erro ou timeout.
+        """
+        start = time.time()
+        pooled, cold_start = await self._acquire()
+        wait_time = time.time() - start
+        self._stats["leases"] += 1
+        self._stats["total_lease_wait_time"] += wait_time
+        if cold_start:
+            self._stats["cold_starts"] += 1
+
+        context = None
+        force_kill = False
+        try:
+            context = await pooled.browser.new_context()
+            logger.debug(f"[{task_id}] Contexto isolado criado no navegador {pooled.browser_id}")
+            yield BrowserLease(pooled, context, wait_time=wait_time, cold_start=cold_start)
+        finally:
+            if context is not None:
+                try:
+                    await asyncio.wait_for(context.close(), timeout=self.context_close_timeout)
+                except Exception as e:
+                    logger.warning(f"[{task_id}] Erro ao fechar contexto, encerrando o navegador {pooled.browser_id}: {e!r}")
+                    force_kill = True
+            await self._release(pooled, force_kill=force_kill)
+
+    async def _ensure_min_size(self):
+        """Lança navegadores até atingir min_size"""
+        async with self._condition:
+            missing = self.min_size - (len(self._browsers) + self._launching)
+            missing = max(0, min(missing, self.max_size - len(self._browsers) - self._launching))
+            self._launching += missing
+        if missing <= 0:
+            return
+
+        results = await asyncio.gather(*(self._launch() for _ in range(missing)), return_exceptions=True)
+        async with self._condition:
+            self._launching -= missing
+            for result in results:
+                if isinstance(result, Exception):
+                    logger.error(f"Falha ao pré-aquecer navegador: {result}")
+                else:
+                    self._browsers.append(result)
+            self._condition.notify_all()
+
+    async def _health_check_loop(self):
+        while not self._closed:
+            await asyncio.sleep(self.health_check_interval)
+            try:
+                await self.health_check()
+            except Exception as e:
+                logger.error(f"Erro no health check do pool: {e}", exc_info=True)
+
+    async def health_check(self):
+        """Retira navegadores desconectados ou acima dos limites e repõe o tamanho mínimo"""
+        to_close = []
+        # Amostra o RSS em threads, fora do lock; _recycle_reason e stats() leem o valor guardado
+        await asyncio.gather(
+            *(asyncio.to_thread(b.sample_rss) for b in list(self._browsers) if not b.retiring),
+            return_exceptions=True,
+        )
+        async with self._condition:
+            for pooled in list(self._browsers):
+                if not pooled.retiring:
+                    reason = self._recycle_reason(pooled)
+                    if reason:
+                        self._retire(pooled, reason)
+                if pooled.retiring and pooled.active_leases == 0:
+                    self._browsers.remove(pooled)
+                    to_close.append(pooled)
+            self._condition.notify_all()
+
+        await asyncio.gather(*(self._close_browser(b) for b in to_close), return_exceptions=True)
+        await self._ensure_min_size()
+
+    def known_pids(self) -> Set[int]:
+        """PIDs de todas as árvores de processos do pool (usado pelo reaper de órfãos)"""
+        pids: Set[int] = set()
+        for pooled in list(self._browsers):
+            pids.update(proc.pid for proc in pooled.process_tree())
+        return pids
+
+    def stats(self) -> Dict[str, Any]:
+        leases = self._stats["leases"]
+        return {
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "contexts_per_browser": self.contexts_per_browser,
+            "size": len(self._browsers),
+            "launching": self._launching,
+            "active_leases": sum(b.active_leases for b in self._browsers),
+            "launches": self._stats["launches"],
+            "launch_failures": self._stats["launch_failures"],
+            "recycled": self._stats["recycled"],
+            "force_killed": self._stats["force_killed"],
+            "leases": leases,
+            "cold_starts": self._stats["cold_starts"],
+            "avg_lease_wait_time": round(self._stats["total_lease_wait_time"] / leases, 3) if leases else 0.0,
+            "browsers": [b.describe() for b in self._browsers],
+        }
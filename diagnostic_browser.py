@@ -0,0 +1,223 @@
+"""
+Navegador quente para o endpoint /diagnose_browser.
+
+O diagnóstico é chamado com frequência pelos monitores de disponibilidade, e
+iniciar o driver Playwright e lançar um Chromium a cada chamada custava mais
+que a própria navegação. Aqui o driver e o navegador são iniciados uma vez e
+mantidos; cada requisição recebe um contexto novo (cookies e storage próprios,
+descartados ao final), com um limite de diagnósticos simultâneos. O navegador
+é relançado se desconectar e reciclado após N contextos.
+
+O diagnóstico usa Playwright puro, independente do pool do browser-use, para
+continuar funcionando mesmo quando o pool está esgotado ou com problemas.
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, Any, List
+
+logger = logging.getLogger("browser-use-api.diagnostic_browser")
+
+DIAGNOSTIC_CHROMIUM_ARGS = [
+    '--no-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-gpu',
+    '--no-first-run',
+    '--no-default-browser-check',
+    '--disable-extensions',
+]
+
+
+class DiagnosticBusy(Exception):
+    """Todas as vagas de diagnóstico ocupadas durante a espera máxima"""
+
+    def __init__(self, concurrency: int, waited: float):
+        self.concurrency = concurrency
+        self.waited = waited
+        super().__init__(f"{concurrency} diagnósticos em andamento; nenhuma vaga em {waited:.1f}s")
+
+
+class DiagnosticBrowser:
+    """
+    Driver Playwright e Chromium persistentes com um contexto novo por diagnóstico.
+
+    Args:
+        concurrency: Diagnósticos (contextos) simultâneos
+        acquire_timeout: Espera máxima, em segundos, por uma vaga
+        max_contexts_per_browser: Recicla o navegador após N contextos
+        close_timeout: Tempo máximo, em segundos, para fechar um contexto ou o navegador
+        headless: Executa o Chromium em modo headless
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 4,
+        acquire_timeout: float = 10.0,
+        max_contexts_per_browser: int = 500,
+        close_timeout: float = 10.0,
+        headless: bool = True,
+    ):
+        self.concurrency = max(1, concurrency)
+        self.acquire_timeout = acquire_timeout
+        self.max_contexts_per_browser = max_contexts_per_browser
+        self.close_timeout = close_timeout
+        self.headless = headless
+
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._launch_lock = asyncio.Lock()
+        self._playwright = None
+        self._browser = None
+        self._browser_contexts = 0
+        self._active = 0
+        # Contextos abertos por navegador (id), para fechar os aposentados só quando vazios
+        self._open_contexts: Dict[int, int] = {}
+        self._retiring: List[Any] = []
+        self._closed = False
+        self._stats = {
+            "diagnostics": 0,
+            "rejected": 0,
+            "driver_starts": 0,
+            "launches": 0,
+            "launch_failures": 0,
+            "recycled": 0,
+            "disconnects": 0,
+            "total_queue_wait": 0.0,
+            "last_launch_time": None,
+        }
+
+    async def start(self):
+        """Inicia o driver e pré-aquece o navegador (chamado na inicialização da API)"""
+        await self._ensure_browser()
+
+    async def _ensure_browser(self) -> Dict[str, float]:
+        """Garante driver e navegador conectados; retorna os tempos gastos (0 quando já quentes)"""
+        timings = {"driver_start": 0.0, "browser_launch": 0.0}
+        async with self._launch_lock:
+            if self._closed:
+                raise RuntimeError("Navegador de diagnóstico encerrado")
+            if self._playwright is None:
+                from playwright.async_api import async_playwright
+
+                started = time.perf_counter()
+                self._playwright = await async_playwright().start()
+                timings["driver_start"] = time.perf_counter() - started
+                self._stats["driver_starts"] += 1
+            if self._browser is not None and not self._browser.is_connected():
+                logger.warning("Navegador de diagnóstico desconectado; relançando")
+                self._stats["disconnects"] += 1
+                self._browser = None
+            if self._browser is None:
+                started = time.perf_counter()
+                try:
+                    self._browser = await self._playwright.chromium.launch(
+                        headless=self.headless, args=list(DIAGNOSTIC_CHROMIUM_ARGS)
+                    )
+                except Exception:
+                    self._stats["launch_failures"] += 1
+                    raise
+                timings["browser_launch"] = time.perf_counter() - started
+                self._browser_contexts = 0
+                self._stats["launches"] += 1
+                self._stats["last_launch_time"] = round(timings["browser_launch"], 3)
+                logger.info(f"Navegador de diagnóstico lançado em {timings['browser_launch']:.2f}s")
+        return timings
+
+    async def _close_browser(self, browser):
+        try:
+            await asyncio.wait_for(browser.close(), timeout=self.close_timeout)
+        except Exception as e:
+            logger.warning(f"Falha ao fechar navegador de diagnóstico: {e}")
+
+    def _maybe_recycle(self):
+        """Aposenta o navegador atual após max_contexts_per_browser; fecha os aposentados sem contextos abertos"""
+        if self._browser is not None and self.max_contexts_per_browser and self._browser_contexts >= self.max_contexts_per_browser:
+            self._retiring.append(self._browser)
+            self._browser = None
+            self._stats["recycled"] += 1
+        idle = [b for b in self._retiring if not self._open_contexts.get(id(b))]
+        for browser in idle:
+            self._retiring.remove(browser)
+            asyncio.create_task(self._close_browser(browser))
+
+    @asynccontextmanager
+    async def context(self, **context_options):
+        """
+        Empresta um contexto novo do navegador quente. Produz (contexto, timings), em que
+        timings traz queue_wait, driver_start, browser_launch e context_create em segundos.
+        Levanta DiagnosticBusy se nenhuma vaga abrir em acquire_timeout segundos.
+        """
+        wait_start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.acquire_timeout)
+        except asyncio.TimeoutError:
+            self._stats["rejected"] += 1
+            raise DiagnosticBusy(self.concurrency, time.perf_counter() - wait_start)
+        queue_wait = time.perf_counter() - wait_start
+        self._stats["total_queue_wait"] += queue_wait
+        self._active += 1
+        browser = None
+        context = None
+        try:
+            timings = {"queue_wait": queue_wait, **(await self._ensure_browser())}
+            browser = self._browser
+            started = time.perf_counter()
+            try:
+                context = await browser.new_context(**context_options)
+            except Exception:
+                if browser.is_connected():
+                    raise
+                # O navegador caiu entre a verificação e a criação do contexto: relança uma vez
+                relaunch = await self._ensure_browser()
+                timings["browser_launch"] += relaunch["browser_launch"]
+                browser = self._browser
+                started = time.perf_counter()
+                context = await browser.new_context(**context_options)
+            self._open_contexts[id(browser)] = self._open_contexts.get(id(browser), 0) + 1
+            timings["context_create"] = time.perf_counter() - started
+            timings["cold_start"] = bool(timings["driver_start"] or timings["browser_launch"])
+            self._browser_contexts += 1
+            self._stats["diagnostics"] += 1
+            yield context, timings
+        finally:
+            if context is not None:
+                try:
+                    await asyncio.wait_for(context.close(), timeout=self.close_timeout)
+                except Exception as e:
+                    logger.warning(f"Falha ao fechar contexto de diagnóstico: {e}")
+                remaining = self._open_contexts.get(id(browser), 1) - 1
+                if remaining > 0:
+                    self._open_contexts[id(browser)] = remaining
+                else:
+                    self._open_contexts.pop(id(browser), None)
+            self._active -= 1
+            self._maybe_recycle()
+            self._semaphore.release()
+
+    async def shutdown(self):
+        """Fecha o navegador e o driver ao encerrar a API"""
+        async with self._launch_lock:
+            self._closed = True
+            browsers = self._retiring + ([self._browser] if self._browser is not None else [])
+            self._retiring, self._browser = [], None
+            for browser in browsers:
+                await self._close_browser(browser)
+            if self._playwright is not None:
+                try:
+                    await self._playwright.stop()
+                except Exception as e:
+                    logger.warning(f"Falha ao encerrar o driver Playwright de diagnóstico: {e}")
+                self._playwright = None
+
+    def stats(self) -> Dict[str, Any]:
+        diagnostics = self._stats["diagnostics"]
+        return {
+            "concurrency": self.concurrency,
+            "active": self._active,
+            "browser_running": bool(self._browser and self._browser.is_connected()),
+            "browser_contexts_served": self._browser_contexts,
+            "max_contexts_per_browser": self.max_contexts_per_browser,
+            **{k: v for k, v in self._stats.items() if k != "total_queue_wait"},
+            "avg_queue_wait": round(self._stats["total_queue_wait"] / diagnostics, 3) if diagnostics else None,
+        }
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Servidor HTTP local com cópias sintéticas das páginas da CVM e do BCB, para
+benchmarks e testes sem acesso aos sites reais.
+
+Páginas:
+    /cvm/noticias?pagina=N   lista de notícias (.titulo) com link "Próxima"
+    /bcb/normas?pagina=N     casca que carrega as normas via AJAX (fetch) após
+                             ajax_delay segundos, com link "Próxima"
+    /bcb/api/normas?pagina=N JSON consumido pela página de normas
+    /static/site.css|js      assets estáticos (asset_delay)
+    /recorded/<arquivo>      cópias gravadas em `directory` (ex.: HTML salvo
+                             pelo browser_diagnosis.py), servidas como estão
+
+Todo path aceita ?delay=S para sobrescrever o atraso da resposta.
+
+Uso:
+    python fixture_server.py --port 8765 --pages 3 --delay 0.2 --ajax-delay 1
+"""
+
+import argparse
+import html
+import json
+import mimetypes
+import os
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Optional, Dict, Any, List
+from urllib.parse import urlsplit, parse_qs
+
+SITE_CSS = "body{font-family:sans-serif;margin:2em}.titulo{font-size:1.1em}.data{color:#666}"
+SITE_JS = "window.siteReady = true;"
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="pt-br">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<link rel="stylesheet" href="/static/site.css">
+<script src="/static/site.js"></script>
+</head>
+<body>
+<header><a href="/">Início</a> | <a href="/cvm/noticias">Notícias</a> | <a href="/bcb/normas">Normas</a></header>
+<main id="content">
+<h1>{title}</h1>
+{body}
+</main>
+</body>
+</html>
+"""
+
+
+def news_items(page: int, per_page: int) -> List[Dict[str, str]]:
+    start = (page - 1) * per_page
+    return [
+        {
+            "titulo": f"CVM divulga comunicado número {start + i + 1} sobre o mercado de capitais",
+            "link": f"/cvm/noticias/comunicado-{start + i + 1}",
+            "data": f"{(start + i) % 28 + 1:02d}/06/2024",
+        }
+        for i in range(per_page)
+    ]
+
+
+def normas_items(page: int, per_page: int) -> List[Dict[str, str]]:
+    start = (page - 1) * per_page
+    return [
+        {
+            "titulo": f"Resolução BCB nº {400 + start + i}",
+            "link": f"/bcb/normas/resolucao-{400 + start + i}",
+            "assunto": "Dispõe sobre procedimentos aplicáveis às instituições autorizadas",
+        }
+        for i in range(per_page)
+    ]
+
+
+def pagination_link(path: str, page: int, pages: int) -> str:
+    if page >= pages:
+        return ""
+    return f'<nav class="paginacao"><a class="proximo" href="{path}?pagina={page + 1}">Próxima</a></nav>'
+
+
+class FixtureServer:
+    """
+    Servidor de fixtures em uma thread própria.
+
+    Args:
+        host: Endereço de escuta
+        port: Porta (0: escolhida pelo sistema)
+        pages: Páginas de cada listagem
+        items_per_page: Itens por página
+        delay: Atraso, em segundos, das páginas HTML
+        ajax_delay: Atraso, em segundos, das respostas AJAX das normas do BCB
+        asset_delay: Atraso, em segundos, dos assets estáticos
+        directory: Diretório de cópias gravadas servidas em /recorded/
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        pages: int = 3,
+        items_per_page: int = 20,
+        delay: float = 0.0,
+        ajax_delay: float = 0.5,
+        asset_delay: float = 0.0,
+        directory: Optional[str] = None,
+    ):
+        self.host = host
+        self.port = port
+        self.pages = max(1, pages)
+        self.items_per_page = max(1, items_per_page)
+        self.delay = delay
+        self.ajax_delay = ajax_delay
+        self.asset_delay = asset_delay
+        self.directory = directory
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def expected_items(self, pages: Optional[int] = None) -> int:
+        """Itens de uma listagem percorrida por `pages` páginas (padrão: todas)"""
+        return self.items_per_page * min(pages or self.pages, self.pages)
+
+    def start(self) -> str:
+        """Inicia o servidor e retorna a URL base"""
+        fixture = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                fixture._count()
+                fixture.handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fixture-server", daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def _count(self):
+        with self._lock:
+            self.requests += 1
+
+    def handle(self, request: BaseHTTPRequestHandler):
+        parts = urlsplit(request.path)
+        query = parse_qs(parts.query)
+        path = parts.path.rstrip("/") or "/"
+        try:
+            page = max(1, int(query.get("pagina", ["1"])[0]))
+        except ValueError:
+            page = 1
+        override = query.get("delay", [None])[0]
+
+        def wait(default: float):
+            seconds = float(override) if override is not None else default
+            if seconds > 0:
+                time.sleep(seconds)
+
+        if path == "/static/site.css":
+            wait(self.asset_delay)
+            return self._send(request, 200, SITE_CSS, "text/css", cacheable=True)
+        if path == "/static/site.js":
+            wait(self.asset_delay)
+            return self._send(request, 200, SITE_JS, "application/javascript", cacheable=True)
+        if path == "/bcb/api/normas":
+            wait(self.ajax_delay)
+            body = {"pagina": page, "paginas": self.pages, "itens": normas_items(page, self.items_per_page)}
+            return self._send(request, 200, json.dumps(body, ensure_ascii=False), "application/json")
+
+        wait(self.delay)
+        if path in ("/", "/index.html"):
+            return self._send(request, 200, self.index_page(), "text/html")
+        if path == "/cvm/noticias":
+            return self._send(request, 200, self.cvm_page(page), "text/html")
+        if path == "/bcb/normas":
+            return self._send(request, 200, self.bcb_page(page), "text/html")
+        if path.startswith("/cvm/noticias/") or path.startswith("/bcb/normas/"):
+            title = html.escape(path.rsplit("/", 1)[-1].replace("-", " ").capitalize())
+            return self._send(request, 200, PAGE_TEMPLATE.format(title=title, body="<p>Conteúdo do documento.</p>"), "text/html")
+        if path.startswith("/recorded/") and self.directory:
+            return self._send_recorded(request, path[len("/recorded/"):])
+        return self._send(request, 404, PAGE_TEMPLATE.format(title="Página não encontrada", body=""), "text/html")
+
+    def index_page(self) -> str:
+        links = [
+            '<li><a href="/cvm/noticias">Notícias da CVM</a></li>',
+            '<li><a href="/bcb/normas">Normas do BCB (AJAX)</a></li>',
+        ]
+        if self.directory and os.path.isdir(self.directory):
+            for name in sorted(os.listdir(self.directory)):
+                links.append(f'<li><a href="/recorded/{html.escape(name)}">{html.escape(name)}</a></li>')
+        return PAGE_TEMPLATE.format(title="Fixtures", body=f"<ul>{''.join(links)}</ul>")
+
+    def cvm_page(self, page: int) -> str:
+        items = "".join(
+            f'<li class="noticia"><h2 class="titulo"><a href="{item["link"]}">{html.escape(item["titulo"])}</a></h2>'
+            f'<span class="data">{item["data"]}</span></li>'
+            for item in news_items(page, self.items_per_page)
+        ) if page <= self.pages else ""
+        body = f'<ul class="noticias">{items}</ul>{pagination_link("/cvm/noticias", page, self.pages)}'
+        return PAGE_TEMPLATE.format(title=f"Notícias — página {page}", body=body)
+
+    def bcb_page(self, page: int) -> str:
+        # A lista chega depois do carregamento, como na busca de normas do BCB
+        script = f"""
+<script>
+fetch('/bcb/api/normas?pagina={page}').then(r => r.json()).then(data => {{
+    const list = document.getElementById('resultados');
+    list.innerHTML = data.itens.map(n => `<li class="norma"><a href="${{n.link}}">${{n.titulo}}</a> <span>${{n.assunto}}</span></li>`).join('');
+    list.setAttribute('data-carregado', 'true');
+}});
+</script>"""
+        body = f'<ul id="resultados"><li>Carregando...</li></ul>{pagination_link("/bcb/normas", page, self.pages)}{script}'
+        return PAGE_TEMPLATE.format(title=f"Normas — página {page}", body=body)
+
+    def _send_recorded(self, request: BaseHTTPRequestHandler, name: str):
+        root = os.path.realpath(self.directory)
+        path = os.path.realpath(os.path.join(root, name))
+        if not path.startswith(root + os.sep) or not os.path.isfile(path):
+            return self._send(request, 404, "", "text/plain")
+        with open(path, "rb") as f:
+            body = f.read()
+        content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        return self._send(request, 200, body, content_type)
+
+    def _send(self, request: BaseHTTPRequestHandler, status: int, body, content_type: str, cacheable: bool = False):
+        data = body.encode("utf-8") if isinstance(body, str) else body
+        request.send_response(status)
+        request.send_header("Content-Type", f"{content_type}; charset=utf-8" if content_type.startswith("text") or content_type.endswith("json") else content_type)
+        request.send_header("Content-Length", str(len(data)))
+        request.send_header("Cache-Control", "public, max-age=3600" if cacheable else "no-cache")
+        request.end_headers()
+        request.wfile.write(data)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"base_url": self.base_url, "requests": self.requests, "pages": self.pages, "items_per_page": self.items_per_page}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local de fixtures CVM/BCB para benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--pages", type=int, default=3, help="Páginas de cada listagem (padrão: 3)")
+    parser.add_argument("--items", type=int, default=20, help="Itens por página (padrão: 20)")
+    parser.add_argument("--delay", type=float, default=0.0, help="Atraso das páginas HTML em segundos")
+    parser.add_argument("--ajax-delay", type=float, default=0.5, help="Atraso das respostas AJAX em segundos")
+    parser.add_argument("--asset-delay", type=float, default=0.0, help="Atraso dos assets estáticos em segundos")
+    parser.add_argument("--recorded-dir", help="Diretório com cópias gravadas servidas em /recorded/")
+    args = parser.parse_args()
+
+    server = FixtureServer(args.host, args.port, args.pages, args.items, args.delay, args.ajax_delay, args.asset_delay, args.recorded_dir)
+    print(f"Servindo fixtures em {server.start()} (Ctrl+C para encerrar)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
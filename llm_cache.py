@@ -0,0 +1,247 @@
+"""
+Cache em disco das respostas do LLM, chaveado pelo hash de (modelo, mensagens).
+
+Execuções repetidas da mesma extração geram prompts quase idênticos (mesmo
+estado da página, mesmo texto da tarefa), e cada passo do agente pagava uma
+ida e volta completa ao DeepSeek/OpenAI. O cache (opt-in) é um BaseCache do
+LangChain passado como `cache=` aos modelos criados por get_llm_instance, de
+modo que vale para os passos do agente e para o extract_content.
+
+A chave é o SHA-256 da configuração do modelo (llm_string do LangChain: modelo,
+temperature, tools da saída estruturada, ...) e das mensagens serializadas.
+Partes voláteis do prompt que não mudam a resposta esperada (a data e hora que
+o browser-use coloca no estado de cada passo) são removidas antes do hash.
+
+As entradas expiram após o TTL e o tamanho total é limitado com descarte LRU.
+Respostas servidas do cache não trazem uso de tokens, para que orçamentos e
+custos reflitam só as chamadas reais.
+"""
+
+import asyncio
+import contextvars
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import warnings
+from typing import Optional, Dict, Any, Callable, Iterable, Sequence
+from urllib.parse import urlsplit
+
+from langchain_core.caches import BaseCache, RETURN_VAL_TYPE
+from langchain_core.load import dumps, loads
+
+from metrics import LLM_CACHE_HIT_KEY
+
+logger = logging.getLogger("browser-use-api.llm_cache")
+
+# langchain_core.load.loads ainda é marcado como beta; o aviso sairia em toda leitura do cache
+warnings.filterwarnings("ignore", message="The function `loads` is in beta")
+
+# False na tarefa que não deve usar o cache (BrowserTask.llm_cache=false ou domínio fora da lista)
+llm_cache_enabled: contextvars.ContextVar[bool] = contextvars.ContextVar("llm_cache_enabled", default=True)
+
+# Trechos do prompt que mudam a cada execução sem mudar a resposta esperada
+VOLATILE_PATTERNS = (
+    re.compile(r"Current date and time: \d{4}-\d{2}-\d{2} \d{2}:\d{2}"),
+)
+
+MODEL_PATTERN = re.compile(r"""['"]model(?:_name)?['"][,:]\s*['"]([^'"]+)['"]""")
+
+
+def normalize_prompt(prompt: str, patterns: Sequence[re.Pattern] = VOLATILE_PATTERNS) -> str:
+    for pattern in patterns:
+        prompt = pattern.sub("", prompt)
+    return prompt
+
+
+def cache_key(prompt: str, llm_string: str) -> str:
+    digest = hashlib.sha256()
+    digest.update(llm_string.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(normalize_prompt(prompt).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def model_from_llm_string(llm_string: str) -> str:
+    match = MODEL_PATTERN.search(llm_string)
+    return match.group(1) if match else "unknown"
+
+
+class DiskLLMCache(BaseCache):
+    """
+    Cache LangChain em SQLite com TTL e limite de tamanho.
+
+    Args:
+        path: Arquivo SQLite do cache
+        ttl: Validade, em segundos, de cada resposta
+        max_bytes: Tamanho total máximo das respostas guardadas
+        hosts: Domínios cujas tarefas usam o cache por padrão (vazio: qualquer domínio)
+        on_lookup: Chamado com "hit", "miss" ou "expired" a cada consulta (métricas)
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl: float = 86400.0,
+        max_bytes: int = 200 * 1024 * 1024,
+        hosts: Iterable[str] = (),
+        on_lookup: Optional[Callable[[str], None]] = None,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hosts = frozenset(h.strip().lower() for h in hosts if h.strip())
+        self.on_lookup = on_lookup
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "stored": 0, "evicted": 0, "errors": 0, "bypassed": 0}
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS completions (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    hits INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_completions_last_access ON completions(last_access)")
+            self._conn.commit()
+
+    def allows(self, url: str) -> bool:
+        """Se as tarefas nesta URL usam o cache quando a requisição não escolhe"""
+        if not self.hosts:
+            return True
+        host = (urlsplit(url).hostname or "").lower()
+        return any(host == h or host.endswith("." + h) for h in self.hosts)
+
+    def _count(self, name: str, outcome: Optional[str] = None):
+        with self._lock:
+            self._stats[name] += 1
+        if outcome and self.on_lookup is not None:
+            self.on_lookup(outcome)
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        if not llm_cache_enabled.get():
+            self._count("bypassed")
+            return None
+        key = cache_key(prompt, llm_string)
+        now = time.time()
+        try:
+            with self._lock:
+                row = self._conn.execute("SELECT value, expires_at FROM completions WHERE key = ?", (key,)).fetchone()
+                if row is not None and row[1] <= now:
+                    self._conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+                    self._conn.commit()
+                elif row is not None:
+                    self._conn.execute("UPDATE completions SET last_access = ?, hits = hits + 1 WHERE key = ?", (now, key))
+                    self._conn.commit()
+            if row is None:
+                self._count("misses", "miss")
+                return None
+            if row[1] <= now:
+                # Entrada vencida: conta como falta (e como entrada expirada removida)
+                with self._lock:
+                    self._stats["expired"] += 1
+                self._count("misses", "expired")
+                return None
+            generations = loads(row[0])
+        except Exception as e:
+            self._count("errors")
+            logger.warning(f"Falha ao ler o cache de LLM: {e}")
+            return None
+        for generation in generations:
+            # Marca lida pelos callbacks de latência e de uso, que ignoram acertos do cache
+            generation.generation_info = {**(generation.generation_info or {}), LLM_CACHE_HIT_KEY: True}
+            message = getattr(generation, "message", None)
+            if message is not None:
+                # Resposta sem custo: não entra na contagem de tokens da tarefa
+                message.usage_metadata = None
+                message.response_metadata = {k: v for k, v in message.response_metadata.items() if k != "token_usage"}
+        self._count("hits", "hit")
+        return generations
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        if not llm_cache_enabled.get():
+            return
+        try:
+            value = dumps(return_val)
+        except Exception as e:
+            self._count("errors")
+            logger.debug(f"Resposta do LLM não serializável, não guardada: {e}")
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO completions (key, model, value, size, created_at, expires_at, last_access, hits)
+                VALUES (?, ?, ?, ?, ?, ?, ?, 0)
+                """,
+                (cache_key(prompt, llm_string), model_from_llm_string(llm_string), value, len(value), now, now + self.ttl, now),
+            )
+            self._conn.commit()
+            self._stats["stored"] += 1
+        self._evict()
+
+    def _evict(self):
+        """Remove as vencidas e, se ainda passar de max_bytes, as menos usadas"""
+        with self._lock:
+            expired = self._conn.execute("DELETE FROM completions WHERE expires_at <= ?", (time.time(),)).rowcount
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM completions").fetchone()[0]
+            evicted = 0
+            if total > self.max_bytes:
+                for key, size in self._conn.execute("SELECT key, size FROM completions ORDER BY last_access").fetchall():
+                    self._conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+                    evicted += 1
+                    total -= size
+                    if total <= self.max_bytes:
+                        break
+            self._conn.commit()
+            self._stats["expired"] += expired
+            self._stats["evicted"] += evicted
+
+    async def alookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        return await asyncio.to_thread(self.lookup, prompt, llm_string)
+
+    async def aupdate(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        await asyncio.to_thread(self.update, prompt, llm_string, return_val)
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM completions")
+            self._conn.commit()
+
+    def _size(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM completions").fetchone()
+            by_model = {
+                model: {"entries": count, "hits": hits}
+                for model, count, hits in self._conn.execute(
+                    "SELECT model, COUNT(*), SUM(hits) FROM completions GROUP BY model ORDER BY COUNT(*) DESC LIMIT 20"
+                )
+            }
+        return {"entries": entries, "bytes": total, "by_model": by_model}
+
+    async def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._stats)
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            "path": self.path,
+            "ttl": self.ttl,
+            "max_bytes": self.max_bytes,
+            "hosts": sorted(self.hosts),
+            **(await asyncio.to_thread(self._size)),
+            **counters,
+            "hit_rate": round(counters["hits"] / lookups, 3) if lookups else None,
+        }
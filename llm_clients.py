@@ -0,0 +1,190 @@
+"""
+Cache de clientes LLM com pools de conexão HTTP compartilhados.
+
+Cada combinação (provider, modelo, temperature, max_tokens) é instanciada uma
+única vez por processo. Todos os clientes de um mesmo provider reutilizam o mesmo
+pool keep-alive (HTTP/2 quando o pacote h2 está disponível), evitando novos
+handshakes TLS a cada tarefa. As estatísticas de reuso de conexão são coletadas
+pela extensão "trace" do httpcore.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
+
+import httpx
+
+logger = logging.getLogger("browser-use-api.llm")
+
+try:
+    import h2  # noqa: F401 - necessário para HTTP/2 no httpx
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class ConnectionStats:
+    """Contadores de requisições e conexões abertas para um provider"""
+
+    def __init__(self):
+        self.requests = 0
+        self.new_connections = 0
+        self.tls_handshakes = 0
+        self.http2_requests = 0
+        self._lock = threading.Lock()
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def record_event(self, name: str):
+        with self._lock:
+            if name == "connection.connect_tcp.complete":
+                self.new_connections += 1
+            elif name == "connection.start_tls.complete":
+                self.tls_handshakes += 1
+            elif name == "http2.send_request_headers.started":
+                self.http2_requests += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        reused = max(0, self.requests - self.new_connections)
+        return {
+            "requests": self.requests,
+            "new_connections": self.new_connections,
+            "tls_handshakes": self.tls_handshakes,
+            "http2_requests": self.http2_requests,
+            "reused_connections": reused,
+            "reuse_ratio": round(reused / self.requests, 3) if self.requests else 0.0,
+        }
+
+
+class LLMClientCache:
+    """
+    Cache de instâncias LLM e dos clientes HTTP compartilhados por provider.
+
+    Args:
+        max_connections: Conexões simultâneas por provider
+        max_keepalive_connections: Conexões ociosas mantidas abertas por provider
+        keepalive_expiry: Tempo, em segundos, que uma conexão ociosa fica aberta
+        http2: Usa HTTP/2 quando o pacote h2 está instalado
+        max_llms: Instâncias LLM mantidas; acima disso a menos usada é descartada (LRU).
+            O modelo vem do corpo da requisição, então nomes arbitrários não podem crescer o cache
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 50,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 120.0,
+        http2: bool = True,
+        max_llms: int = 32,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = http2 and HTTP2_AVAILABLE
+        if http2 and not HTTP2_AVAILABLE:
+            logger.warning("Pacote h2 não instalado; clientes LLM usarão HTTP/1.1 keep-alive")
+
+        self.max_llms = max(1, max_llms)
+        self._llms: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self._http_clients: Dict[str, Tuple[httpx.Client, httpx.AsyncClient]] = {}
+        self._connection_stats: Dict[str, ConnectionStats] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    def _build_http_clients(self, provider: str) -> Tuple[httpx.Client, httpx.AsyncClient]:
+        stats = self._connection_stats.setdefault(provider, ConnectionStats())
+
+        def sync_trace(name, info):
+            stats.record_event(name)
+
+        async def async_trace(name, info):
+            stats.record_event(name)
+
+        def on_sync_request(request: httpx.Request):
+            stats.record_request()
+            request.extensions["trace"] = sync_trace
+
+        async def on_async_request(request: httpx.Request):
+            stats.record_request()
+            request.extensions["trace"] = async_trace
+
+        # O SDK da OpenAI define o timeout por requisição; este é apenas o padrão do pool
+        timeout = httpx.Timeout(600.0, connect=10.0)
+        sync_client = httpx.Client(
+            http2=self.http2, limits=self.limits, timeout=timeout,
+            event_hooks={"request": [on_sync_request]},
+        )
+        async_client = httpx.AsyncClient(
+            http2=self.http2, limits=self.limits, timeout=timeout,
+            event_hooks={"request": [on_async_request]},
+        )
+        logger.info(f"Pool HTTP criado para o provider {provider} (http2={self.http2})")
+        return sync_client, async_client
+
+    def http_clients(self, provider: str) -> Tuple[httpx.Client, httpx.AsyncClient]:
+        """Clientes HTTP (sync, async) compartilhados por todos os modelos do provider"""
+        with self._lock:
+            if provider not in self._http_clients:
+                self._http_clients[provider] = self._build_http_clients(provider)
+            return self._http_clients[provider]
+
+    def get(self, key: Tuple) -> Optional[Any]:
+        with self._lock:
+            llm = self._llms.get(key)
+            if llm is not None:
+                self._llms.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+            return llm
+
+    def put(self, key: Tuple, llm: Any) -> Any:
+        with self._lock:
+            # Outra requisição pode ter criado a mesma instância em paralelo
+            llm = self._llms.setdefault(key, llm)
+            self._llms.move_to_end(key)
+            while len(self._llms) > self.max_llms:
+                # Os pools HTTP são do provider, não da instância: descartar não fecha conexões
+                self._llms.popitem(last=False)
+                self.evicted += 1
+            return llm
+
+    def clear(self):
+        with self._lock:
+            self._llms.clear()
+
+    async def aclose(self):
+        """Fecha todos os pools HTTP (chamado no shutdown da API)"""
+        with self._lock:
+            clients = list(self._http_clients.values())
+            self._http_clients.clear()
+            self._llms.clear()
+        for sync_client, async_client in clients:
+            sync_client.close()
+            await async_client.aclose()
+
+    @staticmethod
+    def _describe(key: Tuple) -> Dict[str, Any]:
+        if key[0] == "mock":
+            return {"provider": "mock", "model": key[1], "latency": key[2]}
+        return {"provider": key[0], "model": key[1], "temperature": key[2], "max_tokens": key[3]}
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "cached_clients": [self._describe(key) for key in list(self._llms)],
+            "max_clients": self.max_llms,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evicted": self.evicted,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "http2_enabled": self.http2,
+            "connections": {p: s.to_dict() for p, s in self._connection_stats.items()},
+        }
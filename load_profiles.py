@@ -0,0 +1,192 @@
+"""
+Perfis de carregamento aprendidos por domínio.
+
+Cada execução registra o time_to_ready medido pelo detector de prontidão para o
+domínio da URL (ex.: bcb.gov.br, gov.br/cvm). Quando a requisição não informa
+additional_load_wait_time, o teto da espera é escolhido a partir de um
+percentil (p90 por padrão) das medições recentes do domínio, substituindo a
+tabela de tempos recomendados mantida à mão no DYNAMIC_TIMER_GUIDE.md.
+"""
+
+import asyncio
+import logging
+import math
+import sqlite3
+import threading
+import time
+from typing import Optional, Dict, Any, List, Iterable
+from urllib.parse import urlsplit
+
+logger = logging.getLogger("browser-use-api.load_profiles")
+
+# Hosts que hospedam vários sites independentes; o primeiro segmento do caminho
+# faz parte da chave do perfil (ex.: gov.br/cvm e gov.br/receitafederal)
+DEFAULT_PATH_HOSTS = ("gov.br",)
+
+
+def profile_key(url: str, path_hosts: Iterable[str] = DEFAULT_PATH_HOSTS) -> str:
+    """Chave do perfil: host sem 'www.' (+ primeiro segmento do caminho em hosts compartilhados)"""
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if host in path_hosts:
+        segment = next((s for s in parts.path.split("/") if s), "")
+        if segment:
+            return f"{host}/{segment.lower()}"
+    return host
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Percentil pelo método nearest-rank"""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class LoadProfileStore:
+    """
+    Medições de time_to_ready por domínio em SQLite, com janela deslizante.
+
+    Args:
+        db_path: Arquivo SQLite
+        window: Medições mais recentes mantidas por domínio
+        pct: Percentil usado para escolher a espera
+        min_samples: Medições necessárias antes de confiar no perfil
+        margin: Multiplicador aplicado ao percentil
+        min_wait: Espera mínima recomendada, em segundos
+        max_wait: Espera máxima recomendada, em segundos
+        default_wait: Espera usada enquanto o domínio não tem medições suficientes
+        path_hosts: Hosts cujo primeiro segmento do caminho entra na chave
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        window: int = 50,
+        pct: float = 90,
+        min_samples: int = 3,
+        margin: float = 1.2,
+        min_wait: float = 1.0,
+        max_wait: float = 60.0,
+        default_wait: float = 5.0,
+        path_hosts: Iterable[str] = DEFAULT_PATH_HOSTS,
+    ):
+        self.db_path = db_path
+        self.window = max(1, window)
+        self.pct = pct
+        self.min_samples = max(1, min_samples)
+        self.margin = margin
+        self.min_wait = min_wait
+        self.max_wait = max_wait
+        self.default_wait = default_wait
+        self.path_hosts = tuple(h.strip().lower() for h in path_hosts if h.strip())
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS samples (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    domain TEXT NOT NULL,
+                    time_to_ready REAL NOT NULL,
+                    ready INTEGER NOT NULL,
+                    recorded_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_samples_domain ON samples(domain, id)")
+            self._conn.commit()
+
+    def key_for(self, url: str) -> str:
+        return profile_key(url, self.path_hosts)
+
+    def _record(self, domain: str, value: float, ready: bool):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO samples (domain, time_to_ready, ready, recorded_at) VALUES (?, ?, ?, ?)",
+                (domain, value, int(ready), time.time()),
+            )
+            self._conn.execute(
+                """
+                DELETE FROM samples WHERE domain = ? AND id NOT IN (
+                    SELECT id FROM samples WHERE domain = ? ORDER BY id DESC LIMIT ?
+                )
+                """,
+                (domain, domain, self.window),
+            )
+            self._conn.commit()
+
+    def _samples(self, domain: str) -> List[tuple]:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT time_to_ready, ready FROM samples WHERE domain = ? ORDER BY id DESC LIMIT ?",
+                (domain, self.window),
+            ).fetchall()
+
+    def _domains(self) -> List[str]:
+        with self._lock:
+            return [r[0] for r in self._conn.execute("SELECT DISTINCT domain FROM samples ORDER BY domain")]
+
+    async def record(self, url: str, time_to_ready: float, ready: bool) -> None:
+        """
+        Registra uma medição. Se a página não ficou pronta dentro do teto, o valor
+        real é desconhecido (maior que o teto); a medição entra em dobro para que o
+        perfil cresça em vez de ficar preso ao teto usado.
+        """
+        value = time_to_ready if ready else min(self.max_wait, max(time_to_ready, self.min_wait) * 2)
+        try:
+            await asyncio.to_thread(self._record, self.key_for(url), value, ready)
+        except Exception as e:
+            logger.warning(f"Erro ao registrar perfil de carregamento: {e}")
+
+    def _summarize(self, domain: str, rows: List[tuple]) -> Dict[str, Any]:
+        values = [r[0] for r in rows]
+        summary: Dict[str, Any] = {"domain": domain, "samples": len(values)}
+        if values:
+            summary.update({
+                "p50": round(percentile(values, 50), 3),
+                f"p{self.pct:g}": round(percentile(values, self.pct), 3),
+                "max": round(max(values), 3),
+                "timeouts": sum(1 for r in rows if not r[1]),
+            })
+        if len(values) >= self.min_samples:
+            wait = percentile(values, self.pct) * self.margin
+            summary["recommended_wait"] = round(min(self.max_wait, max(self.min_wait, wait)), 1)
+        return summary
+
+    async def recommend(self, url: str) -> Dict[str, Any]:
+        """
+        Espera recomendada para a URL.
+
+        Returns:
+            dict: domain, samples, percentis e wait (com source "profile" ou "default")
+        """
+        domain = self.key_for(url)
+        try:
+            rows = await asyncio.to_thread(self._samples, domain)
+        except Exception as e:
+            logger.warning(f"Erro ao consultar perfil de carregamento: {e}")
+            rows = []
+        summary = self._summarize(domain, rows)
+        if "recommended_wait" in summary:
+            summary.update({"wait": summary["recommended_wait"], "source": "profile"})
+        else:
+            summary.update({"wait": self.default_wait, "source": "default"})
+        return summary
+
+    async def stats(self) -> Dict[str, Any]:
+        domains = await asyncio.to_thread(self._domains)
+        profiles = []
+        for domain in domains:
+            rows = await asyncio.to_thread(self._samples, domain)
+            profiles.append(self._summarize(domain, rows))
+        return {
+            "percentile": self.pct,
+            "margin": self.margin,
+            "window": self.window,
+            "min_samples": self.min_samples,
+            "default_wait": self.default_wait,
+            "profiles": profiles,
+        }
@@ -0,0 +1,229 @@
+"""
+Pipeline de logging não bloqueante para o log de diagnóstico.
+
+O handler anexado ao logger apenas enfileira o LogRecord (sem serializar nem
+tocar em disco) e retorna; uma thread dedicada drena a fila em lotes, serializa
+as mensagens estruturadas (dicts) com orjson e grava cada lote com uma única
+escrita nos handlers de destino (arquivo, CloudWatch). A fila é limitada: sob
+pressão, eventos DEBUG são amostrados e depois descartados, e com a fila cheia
+qualquer evento é descartado em vez de bloquear o loop de eventos.
+"""
+
+import copy
+import json
+import logging
+import queue
+import threading
+import time
+from typing import Optional, Dict, Any, List
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def dumps(value: Any) -> str:
+    """Serializa em JSON com orjson quando disponível"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    return json.dumps(value, default=str, ensure_ascii=False)
+
+
+class AsyncLogHandler(logging.Handler):
+    """
+    Handler que desacopla a emissão de logs da escrita.
+
+    Mensagens dict são serializadas como JSON na thread de escrita; por isso o
+    dict não deve ser alterado depois de logado.
+
+    Args:
+        targets: Handlers que efetivamente gravam os registros
+        max_queue: Registros aguardando escrita (limite de memória)
+        batch_size: Registros gravados por lote
+        flush_interval: Espera máxima, em segundos, antes de gravar um lote incompleto
+        sample_threshold: Ocupação da fila a partir da qual DEBUG é amostrado
+        debug_limit: Ocupação da fila a partir da qual DEBUG é descartado
+        debug_sample_every: Durante a amostragem, mantém 1 a cada N eventos DEBUG
+    """
+
+    def __init__(
+        self,
+        targets: Optional[List[logging.Handler]] = None,
+        max_queue: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 0.2,
+        sample_threshold: float = 0.5,
+        debug_limit: float = 0.8,
+        debug_sample_every: int = 10,
+    ):
+        super().__init__()
+        self.targets: List[logging.Handler] = list(targets or [])
+        self.max_queue = max(1, max_queue)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.sample_threshold = sample_threshold
+        self.debug_limit = debug_limit
+        self.debug_sample_every = max(1, debug_sample_every)
+        self._queue: "queue.Queue[Optional[logging.LogRecord]]" = queue.Queue(maxsize=self.max_queue)
+        self._debug_seen = 0
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "enqueued": 0,
+            "written": 0,
+            "dropped": {},
+            "sampled_out": 0,
+            "serialization_errors": 0,
+            "write_errors": 0,
+            "batches": 0,
+            "flush_ms_total": 0.0,
+            "flush_ms_max": 0.0,
+            "lag_ms_max": 0.0,
+        }
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="log-pipeline", daemon=True)
+        self._thread.start()
+
+    def add_target(self, handler: logging.Handler):
+        self.targets.append(handler)
+
+    def _drop(self, record: logging.LogRecord):
+        with self._stats_lock:
+            level = record.levelname
+            self._stats["dropped"][level] = self._stats["dropped"].get(level, 0) + 1
+
+    def emit(self, record: logging.LogRecord):
+        # Executado no loop de eventos: nenhuma serialização ou I/O aqui
+        if self._closed:
+            return
+        fill = self._queue.qsize() / self.max_queue
+        if record.levelno <= logging.DEBUG:
+            if fill >= self.debug_limit:
+                self._drop(record)
+                return
+            if fill >= self.sample_threshold:
+                self._debug_seen += 1
+                if self._debug_seen % self.debug_sample_every:
+                    with self._stats_lock:
+                        self._stats["sampled_out"] += 1
+                    return
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self._drop(record)
+            return
+        with self._stats_lock:
+            self._stats["enqueued"] += 1
+
+    def _next_batch(self) -> Optional[List[logging.LogRecord]]:
+        """Aguarda o primeiro registro e drena o que mais estiver disponível; None encerra a thread"""
+        try:
+            first = self._queue.get(timeout=self.flush_interval)
+        except queue.Empty:
+            return []
+        if first is None:
+            return None
+        batch = [first]
+        while len(batch) < self.batch_size:
+            try:
+                record = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if record is None:
+                self._queue.put_nowait(None)
+                break
+            batch.append(record)
+        return batch
+
+    def _serialize(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Cópia do registro com a mensagem estruturada serializada (o original pode estar em uso por outros handlers)"""
+        if not isinstance(record.msg, (dict, list)):
+            return record
+        record = copy.copy(record)
+        if isinstance(record.msg, dict) and "task_id" in record.msg:
+            # Usado pelo índice do log (IndexedRotatingFileHandler)
+            record.task_id = record.msg["task_id"]
+        try:
+            record.msg = dumps(record.msg)
+        except Exception:
+            with self._stats_lock:
+                self._stats["serialization_errors"] += 1
+            record.msg = str(record.msg)
+        record.args = None
+        return record
+
+    def _write_batch(self, batch: List[logging.LogRecord]):
+        start = time.time()
+        batch = [self._serialize(record) for record in batch]
+        for target in self.targets:
+            records = [r for r in batch if r.levelno >= target.level]
+            if not records:
+                continue
+            try:
+                if hasattr(target, "write_batch"):
+                    target.write_batch(records)
+                elif isinstance(target, logging.StreamHandler):
+                    # Uma única escrita e um único flush por lote
+                    text = "".join(target.format(r) + target.terminator for r in records)
+                    with target.lock:
+                        if target.stream is None and isinstance(target, logging.FileHandler):
+                            target.stream = target._open()
+                        target.stream.write(text)
+                        target.flush()
+                else:
+                    for record in records:
+                        target.handle(record)
+            except Exception:
+                with self._stats_lock:
+                    self._stats["write_errors"] += 1
+        now = time.time()
+        flush_ms = (now - start) * 1000
+        lag_ms = (now - min(r.created for r in batch)) * 1000
+        with self._stats_lock:
+            self._stats["written"] += len(batch)
+            self._stats["batches"] += 1
+            self._stats["flush_ms_total"] += flush_ms
+            self._stats["flush_ms_max"] = max(self._stats["flush_ms_max"], flush_ms)
+            self._stats["lag_ms_max"] = max(self._stats["lag_ms_max"], lag_ms)
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            if batch:
+                self._write_batch(batch)
+
+    def close(self):
+        """Grava o que estiver na fila e encerra a thread de escrita"""
+        if not self._closed:
+            self._closed = True
+            while True:
+                try:
+                    self._queue.put(None, timeout=1)
+                    break
+                except queue.Full:
+                    continue
+            self._thread.join(timeout=10)
+            for target in self.targets:
+                target.close()
+        super().close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+            stats["dropped"] = dict(self._stats["dropped"])
+        batches = stats.pop("batches")
+        flush_total = stats.pop("flush_ms_total")
+        stats.update({
+            "queue_depth": self._queue.qsize(),
+            "max_queue": self.max_queue,
+            "batches": batches,
+            "flush_ms_avg": round(flush_total / batches, 3) if batches else 0.0,
+            "flush_ms_max": round(stats["flush_ms_max"], 3),
+            "lag_ms_max": round(stats["lag_ms_max"], 3),
+            "dropped_total": sum(stats["dropped"].values()),
+            "encoder": "orjson" if ORJSON_AVAILABLE else "json",
+        })
+        return stats
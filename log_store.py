@@ -0,0 +1,297 @@
+"""
+Log de diagnóstico com rotação, índice em disco e leitura a partir do fim.
+
+Cada registro gravado no browser_use_debug.log tem sua posição (segmento do
+arquivo, offset e tamanho em bytes), timestamp, nível e task_id guardados em um
+índice SQLite. As consultas filtram pelo índice e leem do arquivo apenas os
+registros da página pedida, com memória proporcional ao tamanho da página e não
+ao tamanho do arquivo. Os segmentos acompanham a rotação: o arquivo atual é o
+segmento mais recente e o backup ".N" é o segmento atual - N.
+"""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from typing import Optional, Dict, Any, List, Tuple
+
+# Início de um registro no formato '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+RECORD_START = re.compile(rb"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3}) - [^ ]+ - ([A-Z]+) - (.*)", re.DOTALL)
+TASK_ID_PATTERN = re.compile(rb'"task_id":\s*"([^"]+)"')
+
+
+def parse_cursor(cursor: Optional[str]) -> Optional[Tuple[int, int]]:
+    """Converte o cursor 'segmento:offset' em tupla"""
+    if not cursor:
+        return None
+    try:
+        segment, offset = cursor.split(":", 1)
+        return int(segment), int(offset)
+    except ValueError:
+        raise ValueError(f"Cursor inválido: {cursor}")
+
+
+def tail_lines(path: str, lines: int, block_size: int = 65536) -> List[str]:
+    """Últimas `lines` linhas do arquivo, lendo blocos a partir do fim"""
+    if lines <= 0:
+        return []
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        data = b""
+        # +1: a última linha termina com '\n' e gera um item vazio no split
+        while position > 0 and data.count(b"\n") <= lines:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            data = f.read(read_size) + data
+    chunks = data.split(b"\n")
+    if chunks and chunks[-1] == b"":
+        chunks.pop()
+    return [c.decode("utf-8", errors="replace") + "\n" for c in chunks[-lines:]]
+
+
+class LogIndex:
+    """Índice SQLite dos registros do log de diagnóstico"""
+
+    def __init__(self, db_path: str, backup_count: int):
+        self.db_path = db_path
+        self.backup_count = backup_count
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS segments (segment INTEGER PRIMARY KEY, indexed_bytes INTEGER NOT NULL)"
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS entries (
+                    segment INTEGER NOT NULL,
+                    offset INTEGER NOT NULL,
+                    length INTEGER NOT NULL,
+                    ts REAL NOT NULL,
+                    levelno INTEGER NOT NULL,
+                    task_id TEXT,
+                    PRIMARY KEY (segment, offset)
+                ) WITHOUT ROWID
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_task ON entries(task_id, segment, offset)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_ts ON entries(ts)")
+            if self._conn.execute("SELECT COUNT(*) FROM segments").fetchone()[0] == 0:
+                self._conn.execute("INSERT INTO segments (segment, indexed_bytes) VALUES (0, 0)")
+            self._conn.commit()
+
+    def current(self) -> Tuple[int, int]:
+        """(segmento atual, bytes já indexados do arquivo atual)"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT segment, indexed_bytes FROM segments ORDER BY segment DESC LIMIT 1"
+            ).fetchone()
+
+    def add(self, segment: int, entries: List[Tuple[int, int, float, int, Optional[str]]], indexed_bytes: int):
+        """Registra (offset, tamanho, ts, levelno, task_id) e o total de bytes indexados do segmento"""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO entries (segment, offset, length, ts, levelno, task_id) VALUES (?, ?, ?, ?, ?, ?)",
+                [(segment, *entry) for entry in entries],
+            )
+            self._conn.execute("UPDATE segments SET indexed_bytes = ? WHERE segment = ?", (indexed_bytes, segment))
+            self._conn.commit()
+
+    def rotate(self) -> int:
+        """Inicia um novo segmento após a rotação e descarta os que saíram dos backups"""
+        with self._lock:
+            segment = self._conn.execute("SELECT MAX(segment) FROM segments").fetchone()[0] + 1
+            self._conn.execute("INSERT INTO segments (segment, indexed_bytes) VALUES (?, 0)", (segment,))
+            oldest = segment - self.backup_count
+            self._conn.execute("DELETE FROM entries WHERE segment < ?", (oldest,))
+            self._conn.execute("DELETE FROM segments WHERE segment < ?", (oldest,))
+            self._conn.commit()
+            return segment
+
+    def query(
+        self,
+        task_id: Optional[str] = None,
+        min_level: Optional[int] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        cursor: Optional[Tuple[int, int]] = None,
+        limit: int = 100,
+        forward: bool = False,
+    ) -> List[tuple]:
+        conditions, params = [], []
+        if task_id:
+            conditions.append("task_id = ?")
+            params.append(task_id)
+        if min_level:
+            conditions.append("levelno >= ?")
+            params.append(min_level)
+        if since is not None:
+            conditions.append("ts >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append("ts <= ?")
+            params.append(until)
+        if cursor is not None:
+            op = ">" if forward else "<"
+            conditions.append(f"(segment {op} ? OR (segment = ? AND offset {op} ?))")
+            params.extend([cursor[0], cursor[0], cursor[1]])
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        order = "ASC" if forward else "DESC"
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT segment, offset, length, ts, levelno, task_id FROM entries {where} "
+                f"ORDER BY segment {order}, offset {order} LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+
+class IndexedRotatingFileHandler(RotatingFileHandler):
+    """
+    RotatingFileHandler que grava lotes de registros (usado pelo AsyncLogHandler)
+    e mantém o LogIndex atualizado com a posição de cada registro.
+
+    Args:
+        filename: Arquivo de log
+        max_bytes: Tamanho que dispara a rotação (0 desabilita)
+        backup_count: Arquivos antigos mantidos (.1, .2, ...)
+        index_path: Arquivo SQLite do índice
+    """
+
+    def __init__(self, filename: str, max_bytes: int, backup_count: int, index_path: str):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+        self.index = LogIndex(index_path, backup_count)
+        self.catch_up()
+
+    def segment_path(self, segment: int, current: int) -> Optional[str]:
+        age = current - segment
+        if age == 0:
+            return self.baseFilename
+        if 0 < age <= self.backupCount:
+            return f"{self.baseFilename}.{age}"
+        return None
+
+    def catch_up(self):
+        """Indexa registros gravados no arquivo atual que ainda não estão no índice"""
+        segment, indexed_bytes = self.index.current()
+        size = os.path.getsize(self.baseFilename) if os.path.exists(self.baseFilename) else 0
+        if size < indexed_bytes:
+            # O arquivo foi substituído por fora (rotação manual, truncamento)
+            segment, indexed_bytes = self.index.rotate(), 0
+        if size == indexed_bytes:
+            return
+        entries = []
+        with open(self.baseFilename, "rb") as f:
+            f.seek(indexed_bytes)
+            offset = indexed_bytes
+            current = None
+            for line in f:
+                match = RECORD_START.match(line)
+                if match or current is None:
+                    if current is not None:
+                        entries.append(current)
+                    ts, levelno, task_id = self._parse_record_start(match)
+                    current = [offset, 0, ts, levelno, task_id]
+                current[1] += len(line)
+                offset += len(line)
+            if current is not None:
+                entries.append(current)
+        self.index.add(segment, [tuple(e) for e in entries], offset)
+
+    @staticmethod
+    def _parse_record_start(match) -> Tuple[float, int, Optional[str]]:
+        if match is None:
+            return 0.0, logging.INFO, None
+        ts = datetime.strptime(match.group(1).decode(), "%Y-%m-%d %H:%M:%S,%f").timestamp()
+        levelno = logging.getLevelName(match.group(2).decode())
+        task = TASK_ID_PATTERN.search(match.group(3)[:512])
+        return ts, levelno if isinstance(levelno, int) else logging.INFO, task.group(1).decode() if task else None
+
+    def write_batch(self, records: List[logging.LogRecord]):
+        """Grava o lote com uma única escrita e indexa cada registro"""
+        texts = [self.format(r) + self.terminator for r in records]
+        sizes = [len(t.encode("utf-8")) for t in texts]
+        batch_bytes = sum(sizes)
+        with self.lock:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.flush()
+            offset = os.fstat(self.stream.fileno()).st_size
+            if self.maxBytes > 0 and offset and offset + batch_bytes > self.maxBytes:
+                self.doRollover()
+                if self.stream is None:
+                    self.stream = self._open()
+                self.index.rotate()
+                offset = 0
+            segment = self.index.current()[0]
+            self.stream.write("".join(texts))
+            self.stream.flush()
+        entries = []
+        for record, size in zip(records, sizes):
+            entries.append((offset, size, record.created, record.levelno, getattr(record, "task_id", None)))
+            offset += size
+        self.index.add(segment, entries, offset)
+
+    def read_entries(self, rows: List[tuple]) -> List[Dict[str, Any]]:
+        """Lê do disco apenas os registros retornados pelo índice"""
+        current = self.index.current()[0]
+        files: Dict[int, Any] = {}
+        entries = []
+        try:
+            for segment, offset, length, ts, levelno, task_id in rows:
+                if segment not in files:
+                    path = self.segment_path(segment, current)
+                    files[segment] = open(path, "rb") if path and os.path.exists(path) else None
+                f = files[segment]
+                if f is None:
+                    continue
+                f.seek(offset)
+                line = f.read(length).decode("utf-8", errors="replace").rstrip("\n")
+                message = line.split(" - ", 3)[-1]
+                try:
+                    data = json.loads(message)
+                except ValueError:
+                    data = None
+                entries.append({
+                    "cursor": f"{segment}:{offset}",
+                    "timestamp": datetime.fromtimestamp(ts).isoformat(),
+                    "level": logging.getLevelName(levelno),
+                    "task_id": task_id,
+                    "line": line,
+                    "data": data,
+                })
+        finally:
+            for f in files.values():
+                if f is not None:
+                    f.close()
+        return entries
+
+    def search(
+        self,
+        task_id: Optional[str] = None,
+        min_level: Optional[int] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        forward: bool = False,
+    ) -> Dict[str, Any]:
+        """Página de registros filtrados; next_cursor continua a leitura na mesma direção"""
+        rows = self.index.query(task_id, min_level, since, until, parse_cursor(cursor), limit + 1, forward)
+        has_more = len(rows) > limit
+        entries = self.read_entries(rows[:limit])
+        return {
+            "entries": entries,
+            "count": len(entries),
+            "next_cursor": entries[-1]["cursor"] if has_more and entries else None,
+        }
@@ -0,0 +1,266 @@
+"""
+Métricas no formato de exposição de texto do Prometheus (GET /metrics).
+
+Implementação mínima de histogramas, contadores e gauges com labels, sem
+dependências externas. As durações de cada fase de uma tarefa (aquisição do
+navegador, prontidão da página, passos do agente, chamadas ao LLM, parsing do
+resultado e limpeza) são registradas com os labels de modelo e domínio, para
+identificar qual fase domina a cauda de latência.
+"""
+
+import contextvars
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, List, Sequence, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import AsyncCallbackHandler
+
+# Buckets (segundos) cobrindo de chamadas rápidas a tarefas de vários minutos
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 180, 300, 600)
+
+# Labels (model, domain) da tarefa em execução; lidos pelo callback do LLM, que
+# roda no mesmo contexto asyncio da tarefa
+task_labels: contextvars.ContextVar[Dict[str, str]] = contextvars.ContextVar("task_labels", default={})
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: labels esperados {self.labelnames}, recebidos {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        lines = self._header()
+        for key, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(dict(zip(self.labelnames, key)))} {_format_value(value)}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Gauge cujos valores são definidos no momento da coleta (set) ou substituídos por completo (replace)"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def replace(self, values: List[Tuple[Dict[str, Any], float]]):
+        """Substitui todas as séries (remove as que não aparecem mais, ex.: navegadores reciclados)"""
+        new_values = {self._key(labels): value for labels, value in values}
+        with self._lock:
+            self._values = new_values
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        lines = self._header()
+        for key, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(dict(zip(self.labelnames, key)))} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # Por série: [contagem por bucket (não cumulativa), soma, total]
+        self._series: Dict[Tuple[str, ...], List[Any]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = next(i for i, bound in enumerate(self.buckets) if value <= bound)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observa a duração do bloco, inclusive quando ele termina com exceção ou return"""
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.observe(time.time() - start, **labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = {k: ([*v[0]], v[1], v[2]) for k, v in self._series.items()}
+        lines = self._header()
+        for key, (counts, total, count) in sorted(series.items()):
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': _format_value(bound)})} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Conjunto de métricas expostas em /metrics"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def _register(self, metric: _Metric) -> Any:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class LabelLimiter:
+    """
+    Limita a cardinalidade de um label: os primeiros max_values valores distintos
+    são mantidos e os demais viram `overflow`.
+    """
+
+    def __init__(self, max_values: int, overflow: str = "other"):
+        self.max_values = max_values
+        self.overflow = overflow
+        self._seen: set = set()
+        self._lock = threading.Lock()
+
+    def __call__(self, value: str) -> str:
+        value = value or "unknown"
+        with self._lock:
+            if value in self._seen:
+                return value
+            if len(self._seen) < self.max_values:
+                self._seen.add(value)
+                return value
+        return self.overflow
+
+
+# Marca, em generation_info, das respostas servidas pelo cache de LLM (llm_cache.py)
+LLM_CACHE_HIT_KEY = "llm_cache_hit"
+
+
+def served_from_cache(response) -> bool:
+    """Se o LLMResult veio do cache de respostas, e não de uma chamada ao provider"""
+    return any(
+        (generation.generation_info or {}).get(LLM_CACHE_HIT_KEY)
+        for generations in response.generations
+        for generation in generations
+    )
+
+
+class LLMLatencyCallback(AsyncCallbackHandler):
+    """
+    Callback LangChain que mede a latência de cada chamada ao LLM.
+    O domínio vem de task_labels (contexto da tarefa que fez a chamada).
+    """
+
+    def __init__(self, histogram: Histogram, model: str):
+        self.histogram = histogram
+        self.model = model
+        self._started: Dict[UUID, Tuple[float, str]] = {}
+
+    def _start(self, run_id: UUID):
+        self._started[run_id] = (time.time(), task_labels.get().get("domain", "none"))
+
+    def _finish(self, run_id: UUID, outcome: str):
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            start, domain = started
+            self.histogram.observe(time.time() - start, model=self.model, domain=domain, outcome=outcome)
+
+    async def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs):
+        self._start(run_id)
+
+    async def on_llm_start(self, serialized, prompts, *, run_id: UUID, **kwargs):
+        self._start(run_id)
+
+    async def on_llm_end(self, response, *, run_id: UUID, **kwargs):
+        if served_from_cache(response):
+            # Acerto do cache não é latência do provider
+            self._started.pop(run_id, None)
+            return
+        self._finish(run_id, "ok")
+
+    async def on_llm_error(self, error, *, run_id: UUID, **kwargs):
+        self._finish(run_id, "error")
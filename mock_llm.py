@@ -0,0 +1,323 @@
+"""
+LLM roteirizado (sem rede) para benchmarks e testes de carga da camada de
+navegador/orquestração. Também disponível na API como provider "mock:"
+(ver create_mock_llm).
+
+O modelo responde de forma determinística a partir das próprias mensagens do
+agente do browser-use:
+
+- passos do agente: as ações do roteiro para o passo atual (lido de
+  "Current step: N/M" no estado da página), com marcadores resolvidos contra o
+  estado e o histórico:
+      "$index:<texto>"  índice do primeiro elemento interativo que contém o texto
+      "$extracted"      conteúdo extraído até aqui (listas JSON são concatenadas)
+  Se um "$index:" não é encontrado (ex.: não há próxima página), a tarefa é
+  concluída com o que já foi extraído;
+- extract_content: lista JSON {"titulo", "link"} com os links dos títulos e
+  itens de lista do markdown da página;
+- verificação de conexão do browser-use ("capital of France"): "Paris".
+
+O uso de tokens é estimado (4 caracteres por token) e reportado em
+usage_metadata, para que os callbacks de uso e métricas funcionem como com um
+provider real. A latência de cada chamada segue uma distribuição configurável.
+"""
+
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import RunnableLambda
+from pydantic import Field, PrivateAttr
+
+from usage import EXTRACTED_PREFIX
+
+EXTRACTION_PROMPT_PREFIX = "Your task is to extract the content of the page"
+STEP_PATTERN = re.compile(r"Current step: (\d+)/\d+")
+MARKDOWN_LINK = re.compile(r"\[([^\]\n]+)\]\(([^)\s]+)[^)]*\)")
+
+# Extrai a página já aberta pela API e conclui com o conteúdo extraído
+DEFAULT_SCRIPT: List[List[Dict[str, Any]]] = [
+    [{"extract_content": {"goal": "títulos e links", "should_strip_link_urls": False}}],
+    [{"done": {"text": "$extracted", "success": True}}],
+]
+
+
+def paginated_script(pages: int, next_label: str = "Próxima") -> List[List[Dict[str, Any]]]:
+    """Extrai cada página e segue o link de próxima página até `pages` páginas"""
+    extract = [{"extract_content": {"goal": "títulos e links", "should_strip_link_urls": False}}]
+    script = [extract]
+    for _ in range(pages - 1):
+        script.append([{"click_element_by_index": {"index": f"$index:{next_label}"}}])
+        script.append(extract)
+    script.append([{"done": {"text": "$extracted", "success": True}}])
+    return script
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """
+    Distribuição de latência (segundos) a partir de "tipo:parâmetros":
+        fixed:0.5            sempre 0,5 s
+        uniform:0.2:1.5      uniforme entre 0,2 e 1,5 s
+        normal:0.8:0.3       normal (média, desvio), truncada em 0
+        lognormal:1.2:0.5    log-normal (mediana, sigma): cauda longa, como um provider real
+        exp:0.8              exponencial com média 0,8 s
+    Um número sozinho equivale a fixed.
+    """
+    kind, _, args = spec.strip().partition(":")
+    arity = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2, "exp": 1}
+    try:
+        if not args:
+            value = float(kind)
+            if value >= 0:
+                return lambda rng: value
+        else:
+            params = [float(p) for p in args.split(":")]
+            if arity.get(kind) == len(params) and min(params) >= 0:
+                if kind == "fixed":
+                    return lambda rng: params[0]
+                if kind == "uniform":
+                    return lambda rng: rng.uniform(params[0], params[1])
+                if kind == "normal":
+                    return lambda rng: max(0.0, rng.gauss(params[0], params[1]))
+                if kind == "lognormal" and params[0] > 0:
+                    return lambda rng: rng.lognormvariate(math.log(params[0]), params[1])
+                if kind == "exp" and params[0] > 0:
+                    return lambda rng: rng.expovariate(1 / params[0])
+    except ValueError:
+        pass
+    raise ValueError(f"Distribuição de latência inválida: {spec}")
+
+
+def load_transcript(path: str) -> List[List[Dict[str, Any]]]:
+    """
+    Roteiro a partir de um arquivo JSON:
+    - histórico do browser-use (AgentHistoryList.save_to_file: {"history": [{"model_output": ...}]}):
+      as ações registradas de cada passo são repetidas na mesma ordem;
+    - lista de passos, cada um uma lista de ações (mesmo formato de DEFAULT_SCRIPT).
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict) and "history" in data:
+        script = []
+        for item in data["history"]:
+            actions = (item.get("model_output") or {}).get("action") or []
+            # Ações registradas trazem todos os campos; só a ação escolhida vem preenchida
+            actions = [{name: params for name, params in action.items() if params is not None} for action in actions]
+            if actions:
+                script.append(actions)
+        return script
+    if isinstance(data, list) and all(isinstance(step, list) for step in data):
+        return data
+    raise ValueError(f"Formato de roteiro não reconhecido: {path}")
+
+
+def message_text(message: BaseMessage) -> str:
+    content = message.content
+    if isinstance(content, list):
+        return "\n".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return str(content)
+
+
+def extracted_so_far(texts: List[str]) -> str:
+    """Conteúdo extraído nas mensagens (sem repetição); listas JSON viram uma lista só"""
+    pieces: List[str] = []
+    for text in texts:
+        for chunk in text.split("Action result")[1:]:
+            if "Extracted from page" not in chunk:
+                continue
+            chunk = chunk.split(":", 1)[1]
+            piece = EXTRACTED_PREFIX.sub("", chunk.strip()).strip()
+            if piece and piece not in pieces:
+                pieces.append(piece)
+    merged: List[Any] = []
+    for piece in pieces:
+        try:
+            value = json.loads(piece)
+        except ValueError:
+            return "\n".join(pieces)
+        if not isinstance(value, list):
+            return "\n".join(pieces)
+        merged.extend(value)
+    return json.dumps(merged, ensure_ascii=False) if pieces else ""
+
+
+def find_index(state: str, label: str) -> Optional[int]:
+    match = re.search(r"\*?\[(\d+)\]\*?<[^\n]*" + re.escape(label), state)
+    return int(match.group(1)) if match else None
+
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    Chat model LangChain roteirizado.
+
+    Args:
+        model_name: Nome reportado ao browser-use e às métricas
+        script: Ações por passo do agente (lista de listas de ações)
+        latency: Atraso, em segundos, de cada resposta (simula o provider)
+        latency_spec: Distribuição do atraso (ver parse_latency); tem precedência sobre latency
+        seed: Semente do sorteio das latências (None: não reproduzível)
+    """
+
+    model_name: str = "mock-scripted"
+    script: List[List[Dict[str, Any]]] = Field(default_factory=lambda: list(DEFAULT_SCRIPT))
+    latency: float = 0.0
+    latency_spec: Optional[str] = None
+    seed: Optional[int] = None
+    _sampler: Optional[Callable[[random.Random], float]] = PrivateAttr(default=None)
+    _rng: random.Random = PrivateAttr(default_factory=random.Random)
+
+    def model_post_init(self, __context: Any):
+        super().model_post_init(__context)
+        if self.latency_spec:
+            self._sampler = parse_latency(self.latency_spec)
+        self._rng = random.Random(self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-mock"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model_name": self.model_name}
+
+    def _delay(self) -> float:
+        if self._sampler is not None:
+            return self._sampler(self._rng)
+        return self.latency
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        content = self.respond(messages)
+        # A verificação de conexão do browser-use é síncrona e bloquearia o loop de eventos
+        delay = self._delay() if content != "Paris" else 0
+        if delay > 0:
+            time.sleep(delay)
+        return self._result(messages, content)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        delay = self._delay()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return self._result(messages, self.respond(messages))
+
+    def _result(self, messages: List[BaseMessage], content: str) -> ChatResult:
+        input_tokens = sum(len(message_text(m)) for m in messages) // 4
+        output_tokens = max(1, len(content) // 4)
+        message = AIMessage(
+            content=content,
+            usage_metadata={"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens},
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def respond(self, messages: List[BaseMessage]) -> str:
+        texts = [message_text(m) for m in messages]
+        last = texts[-1] if texts else ""
+        if "capital of France" in last:
+            return "Paris"
+        if last.startswith(EXTRACTION_PROMPT_PREFIX):
+            page = last.split("Page: ", 1)[1] if "Page: " in last else last
+            # Só links de títulos e itens de lista: menus e paginação ficam de fora
+            items = [line for line in page.splitlines() if line.lstrip().startswith(("#", "*", "-", "+"))]
+            links = [{"titulo": text.strip(), "link": href} for line in items for text, href in MARKDOWN_LINK.findall(line)]
+            return json.dumps(links, ensure_ascii=False)
+        return json.dumps(self.agent_step(texts), ensure_ascii=False)
+
+    def agent_step(self, texts: List[str]) -> Dict[str, Any]:
+        state = next((t for t in reversed(texts) if STEP_PATTERN.search(t)), "")
+        match = STEP_PATTERN.search(state)
+        step = int(match.group(1)) if match else 1
+        actions = self.script[min(step, len(self.script)) - 1] if self.script else []
+        resolved = []
+        for action in actions:
+            action = self._resolve(action, state, texts)
+            if action is None:
+                resolved = [{"done": {"text": extracted_so_far(texts), "success": True}}]
+                break
+            resolved.append(action)
+        return {
+            "current_state": {
+                "evaluation_previous_goal": "Success",
+                "memory": f"Passo {step} do roteiro",
+                "next_goal": ", ".join(name for action in resolved for name in action),
+            },
+            "action": resolved,
+        }
+
+    def _resolve(self, value: Any, state: str, texts: List[str]) -> Any:
+        if isinstance(value, dict):
+            resolved = {}
+            for key, item in value.items():
+                item = self._resolve(item, state, texts)
+                if item is None:
+                    return None
+                resolved[key] = item
+            return resolved
+        if isinstance(value, list):
+            return [self._resolve(item, state, texts) for item in value]
+        if value == "$extracted":
+            return extracted_so_far(texts)
+        if isinstance(value, str) and value.startswith("$index:"):
+            return find_index(state, value[len("$index:"):])
+        return value
+
+    def with_structured_output(self, schema, *, include_raw: bool = False, **kwargs):
+        """Saída estruturada sem tool calling: o JSON da resposta é validado no schema"""
+
+        def parse(message: AIMessage):
+            parsed, error = None, None
+            try:
+                data = json.loads(message.content)
+                parsed = schema(**data) if isinstance(schema, type) else data
+            except Exception as e:
+                error = e
+                if not include_raw:
+                    raise
+            if include_raw:
+                return {"raw": message, "parsed": parsed, "parsing_error": error}
+            return parsed
+
+        return self | RunnableLambda(parse)
+
+
+def create_mock_llm(spec: str, base_dir: str = "mock_transcripts", default_latency: Optional[str] = None,
+                    seed: Optional[int] = None, **kwargs) -> ScriptedChatModel:
+    """
+    Modelo do provider "mock:" a partir da especificação após o prefixo:
+
+        scripted                   extrai a página aberta e conclui (DEFAULT_SCRIPT)
+        paginated:N                extrai e segue "Próxima" por N páginas
+        script:<arquivo>           roteiro JSON (lista de passos) em base_dir
+        transcript:<arquivo>       histórico gravado do browser-use em base_dir
+
+    seguida opcionalmente de "@<latência>" (ver parse_latency), ex.:
+    "paginated:3@lognormal:1.2:0.5". Sem "@", vale default_latency.
+    Arquivos são sempre resolvidos dentro de base_dir.
+    """
+    source, _, latency_spec = spec.partition("@")
+    kind, _, arg = source.partition(":")
+    if kind == "scripted":
+        script = list(DEFAULT_SCRIPT)
+    elif kind == "paginated":
+        try:
+            script = paginated_script(max(1, int(arg or "1")))
+        except ValueError:
+            raise ValueError(f"Número de páginas inválido: {arg}")
+    elif kind in ("script", "transcript"):
+        root = os.path.realpath(base_dir)
+        path = os.path.realpath(os.path.join(root, arg))
+        if not arg or not path.startswith(root + os.sep):
+            raise ValueError(f"Arquivo fora de {base_dir}: {arg}")
+        script = load_transcript(path)
+    else:
+        raise ValueError(f"Modelo mock desconhecido: {spec}")
+    latency_spec = latency_spec or default_latency
+    if latency_spec:
+        parse_latency(latency_spec)
+    return ScriptedChatModel(model_name=f"mock:{spec}", script=script, latency_spec=latency_spec or None, seed=seed, **kwargs)
@@ -0,0 +1,178 @@
+"""
+Detecção de prontidão de página antes de o agente assumir o controle.
+
+Substitui a espera "por prompt" (pedir ao LLM que aguarde N segundos) por uma
+medição real: a página é considerada pronta quando a rede fica ociosa, o DOM
+para de sofrer mutações e, opcionalmente, um seletor aparece. O tempo
+informado em additional_load_wait_time passa a ser o teto da espera, não uma
+espera fixa.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Optional, Dict, Any
+
+from playwright.async_api import Page
+
+logger = logging.getLogger("browser-use-api.readiness")
+
+# Conexões de longa duração nunca "terminam" e não devem impedir a ociosidade da rede
+IGNORED_RESOURCE_TYPES = {"websocket", "eventsource"}
+
+# Instala (uma vez por documento) um MutationObserver e retorna há quantos ms o DOM
+# não muda. Observa apenas nós e texto: atributos mudam o tempo todo em carrosséis
+# e animações e fariam o DOM nunca parecer estável.
+DOM_QUIET_FOR_JS = """
+() => {
+    if (!window.__buReadiness) {
+        window.__buReadiness = {last: performance.now(), count: 0};
+        new MutationObserver(() => {
+            window.__buReadiness.last = performance.now();
+            window.__buReadiness.count++;
+        }).observe(document, {subtree: true, childList: true, characterData: true});
+    }
+    return [performance.now() - window.__buReadiness.last, window.__buReadiness.count];
+}
+"""
+
+
+class NetworkTracker:
+    """Conta requisições em andamento e o instante da última atividade de rede"""
+
+    def __init__(self, page: Page):
+        self.page = page
+        self.inflight = set()
+        self.last_activity = time.time()
+        self.total_requests = 0
+
+    def _on_request(self, request):
+        if request.resource_type in IGNORED_RESOURCE_TYPES:
+            return
+        self.inflight.add(request)
+        self.total_requests += 1
+        self.last_activity = time.time()
+
+    def _on_request_done(self, request):
+        if request in self.inflight:
+            self.inflight.discard(request)
+            self.last_activity = time.time()
+
+    def attach(self):
+        self.page.on("request", self._on_request)
+        self.page.on("requestfinished", self._on_request_done)
+        self.page.on("requestfailed", self._on_request_done)
+
+    def detach(self):
+        self.page.remove_listener("request", self._on_request)
+        self.page.remove_listener("requestfinished", self._on_request_done)
+        self.page.remove_listener("requestfailed", self._on_request_done)
+
+    def idle_for(self) -> float:
+        """Segundos desde que a rede ficou ociosa (0 se há requisições em andamento)"""
+        if self.inflight:
+            return 0.0
+        return time.time() - self.last_activity
+
+
+async def navigate_and_wait_ready(
+    page: Page,
+    url: str,
+    max_wait: float,
+    wait_for_selector: Optional[str] = None,
+    network_idle_ms: int = 500,
+    dom_quiet_ms: int = 500,
+    navigation_timeout: float = 60.0,
+    poll_interval: float = 0.1,
+) -> Dict[str, Any]:
+    """
+    Navega até a URL e aguarda a página ficar pronta.
+
+    Args:
+        page: Página Playwright do contexto da tarefa
+        url: URL inicial da tarefa
+        max_wait: Teto, em segundos, da espera após o DOMContentLoaded
+        wait_for_selector: Seletor CSS que precisa estar visível (opcional)
+        network_idle_ms: Janela sem requisições em andamento para considerar a rede ociosa
+        dom_quiet_ms: Janela sem mutações no DOM para considerar o conteúdo estável
+        navigation_timeout: Tempo máximo para o DOMContentLoaded
+
+    Returns:
+        dict: Medições de prontidão (time_to_ready, motivo, estado da rede/DOM/seletor)
+    """
+    tracker = NetworkTracker(page)
+    tracker.attach()
+    start = time.time()
+    report: Dict[str, Any] = {
+        "url": url,
+        "max_wait": max_wait,
+        "wait_for_selector": wait_for_selector,
+        "ready": False,
+    }
+
+    selector_task = None
+    try:
+        response = await page.goto(url, wait_until="domcontentloaded", timeout=navigation_timeout * 1000)
+        navigated_at = time.time()
+        report["status_code"] = response.status if response else None
+        report["navigation_time"] = round(navigated_at - start, 3)
+
+        if wait_for_selector:
+            selector_task = asyncio.create_task(
+                page.wait_for_selector(wait_for_selector, state="visible", timeout=max(max_wait, 0.001) * 1000)
+            )
+
+        deadline = navigated_at + max(0.0, max_wait)
+        network_idle = dom_quiet = False
+        mutations = 0
+        reason = "timeout"
+
+        while True:
+            now = time.time()
+
+            network_idle = tracker.idle_for() * 1000 >= network_idle_ms
+
+            try:
+                quiet_for_ms, mutations = await page.evaluate(DOM_QUIET_FOR_JS)
+                dom_quiet = quiet_for_ms >= dom_quiet_ms
+            except Exception:
+                # Navegação em andamento (ex.: redirect via JavaScript) destruiu o contexto de execução
+                dom_quiet = False
+
+            selector_ready = True
+            if selector_task is not None:
+                selector_ready = selector_task.done() and selector_task.exception() is None
+
+            if network_idle and dom_quiet and selector_ready:
+                reason = "ready"
+                break
+            if now >= deadline:
+                break
+            await asyncio.sleep(poll_interval)
+
+        ready_at = time.time()
+        report.update({
+            "ready": reason == "ready",
+            "reason": reason,
+            "time_to_ready": round(ready_at - navigated_at, 3),
+            "total_time": round(ready_at - start, 3),
+            "network_idle": network_idle,
+            "inflight_requests": len(tracker.inflight),
+            "total_requests": tracker.total_requests,
+            "dom_quiet": dom_quiet,
+            "dom_mutations": mutations,
+            "final_url": page.url,
+        })
+        if selector_task is not None:
+            report["selector_found"] = selector_task.done() and selector_task.exception() is None
+        return report
+    finally:
+        if selector_task is not None and not selector_task.done():
+            selector_task.cancel()
+            try:
+                await selector_task
+            except (asyncio.CancelledError, Exception):
+                pass
+        elif selector_task is not None:
+            selector_task.exception()  # evita aviso de exceção não recuperada
+        tracker.detach()
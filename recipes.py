@@ -0,0 +1,221 @@
+"""
+Receitas de extração determinística para páginas de layout conhecido.
+
+Uma receita associa um padrão de URL (e, opcionalmente, um padrão do texto da
+tarefa) a seletores CSS e ao schema JSON esperado do resultado. Quando uma
+tarefa casa com uma receita, a extração é feita diretamente com Playwright na
+página já carregada, sem chamar o LLM; se a extração falhar ou o resultado não
+passar na validação, a tarefa segue normalmente com o agente.
+
+Formato do arquivo (lista JSON):
+
+    [{
+        "name": "cvm_noticias",
+        "url_pattern": "^https?://(www\\.)?gov\\.br/cvm/pt-br/assuntos/noticias",
+        "task_pattern": "(?i)not[ií]cias",
+        "wait_for_selector": ".titulo",
+        "items": ".titulo",
+        "max_items": 30,
+        "fields": {
+            "titulo": {"selector": ":scope"},
+            "link": {"selector": ["a", ":scope"], "attr": "href"}
+        },
+        "schema": {"type": "array", "minItems": 1, "items": {"type": "object", "required": ["titulo", "link"]}}
+    }]
+
+`attr` pode ser "text" (padrão, innerText), "html" ou qualquer atributo; "href"
+e "src" retornam a URL absoluta. ":scope" é o próprio item.
+"""
+
+import json
+import logging
+import re
+import threading
+import time
+from typing import Optional, Dict, Any, List
+
+logger = logging.getLogger("browser-use-api.recipes")
+
+# Executado na página: uma única ida e volta ao navegador para todos os campos
+EXTRACT_SCRIPT = """
+({items, fields, maxItems}) => {
+    const read = (el, attr) => {
+        if (!attr || attr === 'text') return (el.innerText || el.textContent || '').trim();
+        if (attr === 'html') return el.innerHTML;
+        if (attr === 'href' || attr === 'src') return el[attr] || el.getAttribute(attr);
+        return el.getAttribute(attr);
+    };
+    const pick = (root, field) => {
+        const selectors = Array.isArray(field.selector) ? field.selector : [field.selector || ':scope'];
+        for (const selector of selectors) {
+            const el = selector === ':scope' ? root : root.querySelector(selector);
+            if (el) {
+                const value = read(el, field.attr);
+                if (value !== null && value !== '') return value;
+            }
+        }
+        return null;
+    };
+    const extract = (root) => Object.fromEntries(Object.entries(fields).map(([name, field]) => [name, pick(root, field)]));
+    if (!items) return extract(document.documentElement);
+    let roots = Array.from(document.querySelectorAll(items));
+    if (maxItems) roots = roots.slice(0, maxItems);
+    return roots.map(extract);
+}
+"""
+
+JSON_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "number": (int, float),
+    "integer": int,
+    "boolean": bool,
+    "null": type(None),
+}
+
+
+def _is_type(value: Any, name: str) -> bool:
+    if isinstance(value, bool) and name in ("number", "integer"):
+        return False
+    return isinstance(value, JSON_TYPES[name])
+
+
+def validate_schema(value: Any, schema: Dict[str, Any], path: str = "$") -> List[str]:
+    """
+    Valida `value` contra o subconjunto de JSON Schema usado pelas receitas
+    (type, required, properties, items, minItems, maxItems, minLength, pattern).
+    Retorna a lista de erros (vazia se válido).
+    """
+    errors: List[str] = []
+    expected = schema.get("type")
+    if expected:
+        types = expected if isinstance(expected, list) else [expected]
+        if not any(_is_type(value, name) for name in types):
+            return [f"{path}: esperado {expected}, obtido {type(value).__name__}"]
+    if isinstance(value, dict):
+        for name in schema.get("required", []):
+            if value.get(name) in (None, ""):
+                errors.append(f"{path}.{name}: campo obrigatório ausente")
+        for name, subschema in schema.get("properties", {}).items():
+            if value.get(name) is not None:
+                errors.extend(validate_schema(value[name], subschema, f"{path}.{name}"))
+    if isinstance(value, list):
+        if "minItems" in schema and len(value) < schema["minItems"]:
+            errors.append(f"{path}: {len(value)} itens, mínimo {schema['minItems']}")
+        if "maxItems" in schema and len(value) > schema["maxItems"]:
+            errors.append(f"{path}: {len(value)} itens, máximo {schema['maxItems']}")
+        if "items" in schema:
+            for i, item in enumerate(value):
+                errors.extend(validate_schema(item, schema["items"], f"{path}[{i}]"))
+    if isinstance(value, str):
+        if "minLength" in schema and len(value) < schema["minLength"]:
+            errors.append(f"{path}: menor que {schema['minLength']} caracteres")
+        if "pattern" in schema and not re.search(schema["pattern"], value):
+            errors.append(f"{path}: não casa com {schema['pattern']}")
+    return errors
+
+
+class Recipe:
+    def __init__(self, spec: Dict[str, Any]):
+        self.name: str = spec["name"]
+        self.url_pattern = re.compile(spec["url_pattern"])
+        self.task_pattern = re.compile(spec["task_pattern"]) if spec.get("task_pattern") else None
+        self.wait_for_selector: Optional[str] = spec.get("wait_for_selector")
+        self.items: Optional[str] = spec.get("items")
+        self.max_items: Optional[int] = spec.get("max_items")
+        self.fields: Dict[str, Dict[str, Any]] = spec["fields"]
+        self.schema: Dict[str, Any] = spec.get("schema", {})
+        if not self.fields:
+            raise ValueError(f"Receita {self.name} sem campos")
+
+    def matches(self, url: str, task: str) -> bool:
+        if not self.url_pattern.search(url):
+            return False
+        return self.task_pattern is None or bool(self.task_pattern.search(task))
+
+    async def extract(self, page) -> Any:
+        return await page.evaluate(EXTRACT_SCRIPT, {"items": self.items, "fields": self.fields, "maxItems": self.max_items})
+
+
+class RecipeRegistry:
+    """
+    Receitas carregadas de um arquivo JSON, com estatísticas por receita.
+
+    O tempo economizado é estimado pela diferença entre a duração média do agente
+    nas tarefas da receita que caíram no fallback e a duração média da receita.
+    """
+
+    def __init__(self, recipes: List[Recipe]):
+        self.recipes = recipes
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, Any]] = {
+            r.name: {"attempts": 0, "hits": 0, "validation_failures": 0, "errors": 0,
+                     "recipe_time_total": 0.0, "agent_runs": 0, "agent_time_total": 0.0}
+            for r in recipes
+        }
+
+    @classmethod
+    def from_file(cls, path: str) -> "RecipeRegistry":
+        with open(path, "r", encoding="utf-8") as f:
+            specs = json.load(f)
+        recipes = []
+        for spec in specs:
+            try:
+                recipes.append(Recipe(spec))
+            except (KeyError, ValueError, re.error) as e:
+                logger.error(f"Receita inválida ignorada ({spec.get('name', '?')}): {e}")
+        logger.info(f"{len(recipes)} receita(s) de extração carregada(s) de {path}")
+        return cls(recipes)
+
+    def match(self, url: str, task: str) -> Optional[Recipe]:
+        return next((r for r in self.recipes if r.matches(url, task)), None)
+
+    async def run(self, recipe: Recipe, page) -> Dict[str, Any]:
+        """
+        Extrai e valida. Retorna {"ok": bool, "result", "errors", "duration"};
+        nunca levanta exceção (falhas viram ok=False para o fallback ao agente).
+        """
+        start = time.time()
+        result, errors, outcome = None, [], "hit"
+        try:
+            result = await recipe.extract(page)
+            errors = validate_schema(result, recipe.schema)
+            if errors:
+                outcome = "validation_failures"
+        except Exception as e:
+            errors = [str(e)]
+            outcome = "errors"
+        duration = time.time() - start
+        with self._lock:
+            stats = self._stats[recipe.name]
+            stats["attempts"] += 1
+            stats["hits" if outcome == "hit" else outcome] += 1
+            stats["recipe_time_total"] += duration
+        return {"ok": outcome == "hit", "result": result, "errors": errors[:10], "duration": duration}
+
+    def record_agent_time(self, recipe: Recipe, seconds: float):
+        """Duração do agente em uma tarefa da receita (fallback), base da estimativa de economia"""
+        with self._lock:
+            stats = self._stats[recipe.name]
+            stats["agent_runs"] += 1
+            stats["agent_time_total"] += seconds
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshot = {name: dict(s) for name, s in self._stats.items()}
+        recipes = {}
+        for name, s in snapshot.items():
+            recipe_avg = s["recipe_time_total"] / s["attempts"] if s["attempts"] else None
+            agent_avg = s["agent_time_total"] / s["agent_runs"] if s["agent_runs"] else None
+            recipes[name] = {
+                "attempts": s["attempts"],
+                "hits": s["hits"],
+                "validation_failures": s["validation_failures"],
+                "errors": s["errors"],
+                "hit_rate": round(s["hits"] / s["attempts"], 3) if s["attempts"] else None,
+                "avg_recipe_time": round(recipe_avg, 3) if recipe_avg is not None else None,
+                "avg_agent_time": round(agent_avg, 3) if agent_avg is not None else None,
+                "time_saved": round(s["hits"] * (agent_avg - recipe_avg), 1) if agent_avg is not None and recipe_avg is not None else None,
+            }
+        return {"recipes": recipes, "count": len(self.recipes)}
@@ -0,0 +1,272 @@
+"""
+Perfis de renderização: bloqueio de recursos por interceptação de requisições.
+
+As flags do Chromium desligam os caches, mas as páginas do gov.br continuam
+baixando imagens, fontes, vídeos e rastreadores de terceiros que o agente não
+usa. Cada tarefa escolhe um perfil, aplicado com context.route no contexto
+Playwright emprestado do pool:
+
+    full       nada é bloqueado (comportamento anterior)
+    no-media   imagens, vídeo/áudio, fontes e rastreadores conhecidos
+    text-only  no-media + folhas de estilo, legendas e manifestos
+
+Listas por domínio complementam os perfis: domínios liberados nunca são
+bloqueados (ex.: captcha) e domínios negados são bloqueados em qualquer perfil.
+
+Os bytes economizados são estimados pelo tamanho médio (Content-Length) das
+respostas do mesmo tipo observadas nas execuções anteriores, e o ganho no tempo
+de carregamento é comparado com a média do perfil "full" no mesmo domínio.
+"""
+
+import logging
+import threading
+from collections import deque
+from typing import Optional, Dict, Any, Iterable, Tuple, FrozenSet
+from urllib.parse import urlsplit
+
+logger = logging.getLogger("browser-use-api.render_profiles")
+
+DEFAULT_PROFILE = "full"
+
+PROFILES: Dict[str, Dict[str, Any]] = {
+    "full": {"block_types": frozenset(), "block_trackers": False},
+    "no-media": {"block_types": frozenset({"image", "media", "font"}), "block_trackers": True},
+    "text-only": {
+        "block_types": frozenset({"image", "media", "font", "stylesheet", "texttrack", "manifest"}),
+        "block_trackers": True,
+    },
+}
+
+# Analytics, anúncios e gravação de sessão frequentes em páginas governamentais
+TRACKER_DOMAINS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "googlesyndication.com",
+    "googleadservices.com",
+    "facebook.net",
+    "connect.facebook.com",
+    "hotjar.com",
+    "clarity.ms",
+    "scorecardresearch.com",
+    "nr-data.net",
+    "newrelic.com",
+    "siteimproveanalytics.com",
+    "analytics.tiktok.com",
+)
+
+# Tamanho presumido (bytes) por tipo enquanto não há respostas observadas
+DEFAULT_TYPE_BYTES = {
+    "image": 40_000,
+    "media": 500_000,
+    "font": 40_000,
+    "stylesheet": 25_000,
+    "script": 30_000,
+    "texttrack": 5_000,
+    "manifest": 2_000,
+}
+FALLBACK_BYTES = 10_000
+
+
+def host_matches(host: str, domains: Iterable[str]) -> bool:
+    """True se o host é um dos domínios ou subdomínio de algum deles"""
+    host = host.lower()
+    return any(host == d or host.endswith("." + d) for d in domains)
+
+
+def parse_domain_profiles(value: str) -> Dict[str, str]:
+    """'bcb.gov.br=text-only,gov.br/cvm=no-media' -> {chave do domínio: perfil}"""
+    mapping = {}
+    for item in value.split(","):
+        if "=" not in item:
+            continue
+        domain, profile = (part.strip() for part in item.split("=", 1))
+        if profile not in PROFILES:
+            logger.warning(f"Perfil de renderização desconhecido para {domain}: {profile}")
+            continue
+        mapping[domain.lower()] = profile
+    return mapping
+
+
+class RenderProfiles:
+    """
+    Configuração dos perfis e estatísticas aprendidas (tamanho médio por tipo de
+    recurso e tempo até a página ficar pronta por domínio e perfil), em memória.
+
+    Args:
+        default_profile: Perfil usado quando a requisição e o domínio não definem um
+        domain_profiles: Perfil por chave de domínio (mesma chave dos perfis de carregamento)
+        allow_domains: Domínios nunca bloqueados
+        block_domains: Domínios bloqueados em qualquer perfil
+        window: Medições de time_to_ready mantidas por (domínio, perfil)
+    """
+
+    def __init__(
+        self,
+        default_profile: str = DEFAULT_PROFILE,
+        domain_profiles: Optional[Dict[str, str]] = None,
+        allow_domains: Iterable[str] = (),
+        block_domains: Iterable[str] = (),
+        window: int = 50,
+    ):
+        if default_profile not in PROFILES:
+            raise ValueError(f"Perfil de renderização desconhecido: {default_profile}")
+        self.default_profile = default_profile
+        self.domain_profiles = domain_profiles or {}
+        self.allow_domains: FrozenSet[str] = frozenset(d.strip().lower() for d in allow_domains if d.strip())
+        self.block_domains: FrozenSet[str] = frozenset(d.strip().lower() for d in block_domains if d.strip())
+        self.window = max(1, window)
+        self._lock = threading.Lock()
+        # Por tipo de recurso: [bytes somados, respostas]
+        self._type_bytes: Dict[str, list] = {}
+        self._load_times: Dict[Tuple[str, str], deque] = {}
+        self._totals = {"sessions": 0, "blocked_requests": 0, "bytes_saved_estimate": 0}
+        self._by_profile: Dict[str, int] = {name: 0 for name in PROFILES}
+
+    def resolve(self, requested: Optional[str], site: str) -> str:
+        """Perfil da tarefa: o da requisição, o configurado para o domínio ou o padrão"""
+        if requested:
+            return requested
+        return self.domain_profiles.get(site) or self.domain_profiles.get(site.split("/")[0]) or self.default_profile
+
+    def session(self, requested: Optional[str], site: str) -> "RenderSession":
+        profile = self.resolve(requested, site)
+        with self._lock:
+            self._totals["sessions"] += 1
+            self._by_profile[profile] += 1
+        return RenderSession(self, profile, site)
+
+    def learn_size(self, resource_type: str, size: int):
+        with self._lock:
+            entry = self._type_bytes.setdefault(resource_type, [0, 0])
+            entry[0] += size
+            entry[1] += 1
+
+    def average_size(self, resource_type: str) -> int:
+        with self._lock:
+            entry = self._type_bytes.get(resource_type)
+        if entry and entry[1]:
+            return entry[0] // entry[1]
+        return DEFAULT_TYPE_BYTES.get(resource_type, FALLBACK_BYTES)
+
+    def record_load(self, site: str, profile: str, time_to_ready: float):
+        with self._lock:
+            samples = self._load_times.setdefault((site, profile), deque(maxlen=self.window))
+            samples.append(time_to_ready)
+
+    def average_load(self, site: str, profile: str) -> Optional[float]:
+        with self._lock:
+            samples = list(self._load_times.get((site, profile), ()))
+        return sum(samples) / len(samples) if samples else None
+
+    def record_blocked(self, count: int, bytes_saved: int):
+        with self._lock:
+            self._totals["blocked_requests"] += count
+            self._totals["bytes_saved_estimate"] += bytes_saved
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            totals = dict(self._totals)
+            by_profile = dict(self._by_profile)
+            type_bytes = {t: v[0] // v[1] for t, v in self._type_bytes.items() if v[1]}
+            load_times = {k: list(v) for k, v in self._load_times.items()}
+        domains: Dict[str, Dict[str, Any]] = {}
+        for (site, profile), samples in sorted(load_times.items()):
+            domains.setdefault(site, {})[profile] = {
+                "samples": len(samples),
+                "avg_time_to_ready": round(sum(samples) / len(samples), 3),
+            }
+        return {
+            "default_profile": self.default_profile,
+            "domain_profiles": self.domain_profiles,
+            "allow_domains": sorted(self.allow_domains),
+            "block_domains": sorted(self.block_domains),
+            "sessions_by_profile": by_profile,
+            **totals,
+            "avg_bytes_by_type": type_bytes,
+            "domains": domains,
+        }
+
+
+class RenderSession:
+    """
+    Perfil aplicado a um contexto de uma tarefa. `report` é atualizado enquanto a
+    tarefa roda (bloqueios continuam contando durante os passos do agente) e pode
+    ser colocado diretamente no debug_info.
+    """
+
+    def __init__(self, profiles: RenderProfiles, profile: str, site: str):
+        self.profiles = profiles
+        self.profile = profile
+        self.site = site
+        self.block_types: FrozenSet[str] = PROFILES[profile]["block_types"]
+        self.block_trackers: bool = PROFILES[profile]["block_trackers"]
+        self.blocked: Dict[str, int] = {}
+        self.report: Dict[str, Any] = {
+            "profile": profile,
+            "blocked_requests": 0,
+            "blocked_by_reason": self.blocked,
+            "bytes_transferred": 0,
+            "bytes_saved_estimate": 0,
+        }
+
+    @property
+    def intercepts(self) -> bool:
+        return bool(self.block_types or self.block_trackers or self.profiles.block_domains)
+
+    def block_reason(self, url: str, resource_type: str) -> Optional[str]:
+        """Motivo do bloqueio da requisição (tipo, rastreador ou domínio negado), ou None"""
+        host = urlsplit(url).hostname or ""
+        if not host or host_matches(host, self.profiles.allow_domains):
+            return None
+        if host_matches(host, self.profiles.block_domains):
+            return "domain"
+        if self.block_trackers and host_matches(host, TRACKER_DOMAINS):
+            return "tracker"
+        if resource_type in self.block_types:
+            return resource_type
+        return None
+
+    async def attach(self, browser_context):
+        """Instala a interceptação no contexto Playwright por trás do BrowserContext do browser-use"""
+        session = await browser_context.get_session()
+        context = session.context
+        context.on("response", self._on_response)
+        if self.intercepts:
+            await context.route("**/*", self._handle_route)
+
+    async def _handle_route(self, route):
+        request = route.request
+        reason = self.block_reason(request.url, request.resource_type)
+        try:
+            if reason is None:
+                # fallback (e não continue) para que outras rotas do contexto ainda tratem a requisição
+                await route.fallback()
+                return
+            await route.abort("blockedbyclient")
+        except Exception as e:
+            # Contexto fechado no meio da requisição (fim da tarefa)
+            logger.debug(f"Interceptação ignorada para {request.url}: {e}")
+            return
+        estimate = self.profiles.average_size(request.resource_type)
+        self.blocked[reason] = self.blocked.get(reason, 0) + 1
+        self.report["blocked_requests"] += 1
+        self.report["bytes_saved_estimate"] += estimate
+        self.profiles.record_blocked(1, estimate)
+
+    def _on_response(self, response):
+        length = response.headers.get("content-length")
+        if not length or not length.isdigit():
+            return
+        size = int(length)
+        self.report["bytes_transferred"] += size
+        self.profiles.learn_size(response.request.resource_type, size)
+
+    def record_ready(self, time_to_ready: float):
+        """Registra o tempo até a página ficar pronta e o compara com a média do perfil full no domínio"""
+        baseline = self.profiles.average_load(self.site, "full")
+        self.profiles.record_load(self.site, self.profile, time_to_ready)
+        self.report["time_to_ready"] = time_to_ready
+        self.report["full_avg_time_to_ready"] = round(baseline, 3) if baseline is not None else None
+        # Positivo: a página ficou pronta mais rápido que a média sem bloqueios
+        self.report["load_time_delta"] = round(baseline - time_to_ready, 3) if baseline is not None else None
@@ -0,0 +1,454 @@
+"""
+Receitas aprendidas: gravação de execuções bem-sucedidas do agente e replay sem o loop do LLM.
+
+Quando o agente conclui uma tarefa com sucesso, as ações que ele executou
+(navegações, cliques, preenchimentos, seleções e os pontos em que leu o
+conteúdo da página) são gravadas como um script, indexado pelo "modelo" da
+tarefa: URL e texto com datas e números substituídos por parâmetros. Uma tarefa
+posterior com o mesmo modelo (ex.: a mesma consulta no buscanormas do BCB com
+outra data) executa o script diretamente no Playwright, com os novos valores
+dos parâmetros, e só volta ao agente se o replay falhar.
+
+O conteúdo lido depende da data da execução, então o resultado final não é
+reaproveitado: o texto das páginas lidas no replay é entregue ao LLM em uma
+única chamada de extração, com o resultado gravado como exemplo do formato.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Tuple, Callable, Awaitable
+
+import markdownify
+
+logger = logging.getLogger("browser-use-api.replay")
+
+# Datas (dd/mm/aaaa, aaaa-mm-dd) e números no texto da tarefa e na URL
+PARAM_PATTERN = re.compile(r"\d{1,2}/\d{1,2}/\d{4}|\d{4}-\d{2}-\d{2}|\d+")
+PLACEHOLDER_PATTERN = re.compile(r"\{\{(url|p\d+)(?:\|(br|iso))?\}\}")
+
+# Ações do browser-use que apenas leem a página ou rolam a tela: não precisam de replay
+PASSIVE_ACTIONS = {"scroll_down", "scroll_up", "scroll_to_text", "get_dropdown_options", "done"}
+# Passos cujo efeito pode depender dos parâmetros da tarefa
+INTERACTIVE_OPS = {"click", "fill", "select", "press"}
+
+EXTRACTION_PROMPT = """Você recebe uma tarefa de extração e o conteúdo (markdown) das páginas relevantes, já visitadas.
+Responda APENAS com JSON válido, sem comentários, no mesmo formato do exemplo (mesma estrutura e mesmas chaves).
+Se não houver dados que atendam à tarefa, responda com uma estrutura vazia do mesmo tipo do exemplo.
+
+Tarefa:
+{task}
+
+Exemplo de formato (resultado de uma execução anterior):
+{example}
+
+Conteúdo das páginas:
+{content}"""
+
+
+class ReplayError(Exception):
+    """Um passo do script não pôde ser reproduzido na página atual"""
+
+
+def _parse_date(value: str) -> Optional[datetime]:
+    for fmt in ("%d/%m/%Y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def _variants(value: str) -> List[Tuple[str, str]]:
+    """(texto, formato) pelos quais um parâmetro pode aparecer nas ações; datas em dd/mm/aaaa e aaaa-mm-dd"""
+    date = _parse_date(value)
+    if date is None:
+        return [(value, "")]
+    return [(date.strftime("%d/%m/%Y"), "br"), (date.strftime("%Y-%m-%d"), "iso")]
+
+
+def task_template(url: str, task: str) -> Tuple[str, List[str]]:
+    """
+    Chave do modelo da tarefa e os valores dos parâmetros.
+    Datas e números viram {pN}; o restante do texto é normalizado (espaços).
+    """
+    params: List[str] = []
+
+    def replace(match):
+        params.append(match.group(0))
+        return f"{{p{len(params) - 1}}}"
+
+    task_tpl = PARAM_PATTERN.sub(replace, " ".join(task.split()))
+    url_tpl = PARAM_PATTERN.sub(replace, url.strip())
+    key = hashlib.sha256(f"{url_tpl}\n{task_tpl}".encode("utf-8")).hexdigest()
+    return key, params
+
+
+def _templatize(text: str, url: str, params: List[str]) -> str:
+    """Substitui a URL da tarefa e os valores dos parâmetros por placeholders"""
+    if text == url:
+        return "{{url}}"
+    # Valores mais longos primeiro; números de um dígito são ambíguos demais para substituir
+    candidates = []
+    for index, value in enumerate(params):
+        for variant, fmt in _variants(value):
+            if len(variant) >= 2:
+                candidates.append((variant, f"{{{{p{index}|{fmt}}}}}" if fmt else f"{{{{p{index}}}}}"))
+    for variant, placeholder in sorted(candidates, key=lambda c: -len(c[0])):
+        text = text.replace(variant, placeholder)
+    return text
+
+
+def render(text: str, url: str, params: List[str]) -> str:
+    """Preenche os placeholders com a URL e os parâmetros da tarefa atual"""
+    def replace(match):
+        name, fmt = match.group(1), match.group(2)
+        if name == "url":
+            return url
+        value = params[int(name[1:])]
+        date = _parse_date(value) if fmt else None
+        if date is None:
+            return value
+        return date.strftime("%d/%m/%Y" if fmt == "br" else "%Y-%m-%d")
+
+    return PLACEHOLDER_PATTERN.sub(replace, text)
+
+
+def _bound_params(steps: List[Dict[str, Any]]) -> List[int]:
+    """Índices dos parâmetros usados pelo script"""
+    bound = set()
+    for step in steps:
+        for field in ("url", "text", "keys"):
+            for match in PLACEHOLDER_PATTERN.finditer(step.get(field) or ""):
+                if match.group(1).startswith("p"):
+                    bound.add(int(match.group(1)[1:]))
+    return sorted(bound)
+
+
+def script_from_history(history, url: str, params: List[str]) -> Optional[List[Dict[str, Any]]]:
+    """
+    Converte o histórico do agente browser-use em passos reproduzíveis.
+    Ações que falharam são descartadas; retorna None se houver ações sem replay
+    possível (abas, Google, arrastar etc.).
+    """
+    steps: List[Dict[str, Any]] = []
+    for item in history.history:
+        if item.model_output is None:
+            continue
+        elements = item.state.interacted_element if item.state else []
+        for position, action in enumerate(item.model_output.action):
+            if position < len(item.result) and item.result[position].error:
+                continue
+            data = action.model_dump(exclude_unset=True)
+            if not data:
+                continue
+            name, arguments = next(iter(data.items()))
+            arguments = arguments or {}
+            element = elements[position] if position < len(elements) else None
+            locator = {"xpath": element.xpath, "css": element.css_selector} if element is not None else None
+            if name in PASSIVE_ACTIONS:
+                continue
+            if name in ("go_to_url", "open_tab"):
+                steps.append({"op": "goto", "url": _templatize(arguments["url"], url, params)})
+            elif name == "go_back":
+                steps.append({"op": "back"})
+            elif name == "wait":
+                steps.append({"op": "wait", "seconds": arguments.get("seconds", 3)})
+            elif name == "send_keys":
+                steps.append({"op": "press", "keys": _templatize(arguments["keys"], url, params)})
+            elif name == "extract_content":
+                steps.append({"op": "read"})
+            elif name in ("click_element", "click_element_by_index") and locator:
+                steps.append({"op": "click", **locator})
+            elif name == "input_text" and locator:
+                steps.append({"op": "fill", "text": _templatize(arguments["text"], url, params), **locator})
+            elif name == "select_dropdown_option" and locator:
+                steps.append({"op": "select", "text": _templatize(arguments["text"], url, params), **locator})
+            else:
+                logger.debug(f"Ação {name} não suporta replay; execução não gravada")
+                return None
+    return steps
+
+
+def result_matches_example(result: Any, example: Any) -> bool:
+    """O resultado do replay tem a mesma estrutura do resultado gravado"""
+    if isinstance(example, list):
+        if not isinstance(result, list) or not all(isinstance(r, dict) for r in result):
+            return False
+        if result and example and isinstance(example[0], dict):
+            return bool(set(result[0]) & set(example[0]))
+        return True
+    if isinstance(example, dict):
+        return isinstance(result, dict) and (not example or bool(set(result) & set(example)))
+    return False
+
+
+def parse_json_output(text: str) -> Any:
+    """JSON da resposta do LLM, tolerando blocos ```json"""
+    text = text.strip()
+    fenced = re.search(r"```(?:json)?\s*(.*?)```", text, re.DOTALL)
+    if fenced:
+        text = fenced.group(1).strip()
+    return json.loads(text)
+
+
+class ScriptReplayer:
+    """
+    Executa um script gravado em uma página Playwright.
+
+    Args:
+        navigate: Corrotina (page, url) usada nas navegações (inclui a espera de prontidão)
+        step_timeout: Tempo máximo, em segundos, para encontrar cada elemento
+        settle_timeout: Espera máxima pela rede ociosa após cada ação
+        max_content_chars: Limite do conteúdo lido entregue ao LLM
+    """
+
+    def __init__(
+        self,
+        navigate: Callable[[Any, str], Awaitable[Any]],
+        step_timeout: float = 10.0,
+        settle_timeout: float = 3.0,
+        max_content_chars: int = 60000,
+    ):
+        self.navigate = navigate
+        self.step_timeout = step_timeout
+        self.settle_timeout = settle_timeout
+        self.max_content_chars = max_content_chars
+
+    async def _locate(self, page, step: Dict[str, Any]):
+        selectors = []
+        if step.get("xpath"):
+            xpath = step["xpath"] if step["xpath"].startswith("/") else f"/{step['xpath']}"
+            selectors.append(f"xpath={xpath}")
+        if step.get("css"):
+            selectors.append(step["css"])
+        for selector in selectors:
+            locator = page.locator(selector).first
+            try:
+                await locator.wait_for(state="visible", timeout=self.step_timeout * 1000 / len(selectors))
+                return locator
+            except Exception:
+                continue
+        raise ReplayError(f"Elemento não encontrado: {selectors}")
+
+    async def _settle(self, page):
+        try:
+            await page.wait_for_load_state("networkidle", timeout=self.settle_timeout * 1000)
+        except Exception:
+            pass
+
+    async def _read(self, page) -> str:
+        return markdownify.markdownify(await page.content())
+
+    async def run(self, page, steps: List[Dict[str, Any]], url: str, params: List[str], pre_navigated: bool) -> List[str]:
+        """
+        Reproduz os passos e retorna o conteúdo (markdown) das páginas lidas.
+        Levanta ReplayError se algum passo falhar.
+        """
+        contents: List[str] = []
+        for index, step in enumerate(steps):
+            op = step["op"]
+            try:
+                if op == "goto":
+                    target = render(step["url"], url, params)
+                    # A página inicial já foi aberta e aguardada antes do replay
+                    if not (index == 0 and pre_navigated and target == url):
+                        await self.navigate(page, target)
+                elif op == "back":
+                    await page.go_back()
+                    await self._settle(page)
+                elif op == "wait":
+                    await asyncio.sleep(min(float(step.get("seconds", 3)), 10))
+                elif op == "press":
+                    await page.keyboard.press(render(step["keys"], url, params))
+                    await self._settle(page)
+                elif op == "read":
+                    contents.append(await self._read(page))
+                elif op == "click":
+                    await (await self._locate(page, step)).click(timeout=self.step_timeout * 1000)
+                    await self._settle(page)
+                elif op == "fill":
+                    await (await self._locate(page, step)).fill(render(step["text"], url, params), timeout=self.step_timeout * 1000)
+                elif op == "select":
+                    await (await self._locate(page, step)).select_option(label=render(step["text"], url, params), timeout=self.step_timeout * 1000)
+                    await self._settle(page)
+            except ReplayError:
+                raise
+            except Exception as e:
+                raise ReplayError(f"Passo {index} ({op}) falhou: {e}")
+        # O agente encerra na página que contém a resposta: ela sempre entra no conteúdo
+        contents.append(await self._read(page))
+        content = "\n\n---\n\n".join(dict.fromkeys(contents))
+        return [content[: self.max_content_chars]]
+
+    async def extract(self, llm, task: str, contents: List[str], example: Any) -> Any:
+        """Uma única chamada ao LLM para montar o resultado a partir do conteúdo lido"""
+        example_text = json.dumps(example[:2] if isinstance(example, list) else example, ensure_ascii=False)
+        prompt = EXTRACTION_PROMPT.format(task=task, example=example_text[:2000], content="\n\n".join(contents))
+        output = await llm.ainvoke(prompt)
+        return parse_json_output(output.content)
+
+
+class ReplayStore:
+    """
+    Scripts gravados em SQLite, um por modelo de tarefa (o mais recente prevalece).
+
+    Args:
+        db_path: Arquivo SQLite
+        max_failures: Falhas consecutivas de replay após as quais o script é descartado
+    """
+
+    def __init__(self, db_path: str, max_failures: int = 3):
+        self.db_path = db_path
+        self.max_failures = max(1, max_failures)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS scripts (
+                    key TEXT PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    task TEXT NOT NULL,
+                    params TEXT NOT NULL,
+                    steps TEXT NOT NULL,
+                    example TEXT NOT NULL,
+                    agent_time REAL NOT NULL,
+                    created_at REAL NOT NULL,
+                    replays INTEGER NOT NULL DEFAULT 0,
+                    failures INTEGER NOT NULL DEFAULT 0,
+                    consecutive_failures INTEGER NOT NULL DEFAULT 0,
+                    replay_time_total REAL NOT NULL DEFAULT 0
+                )
+                """
+            )
+            self._conn.commit()
+
+    def _save(self, key: str, url: str, task: str, params: List[str], steps: List[Dict[str, Any]], example: Any, agent_time: float):
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO scripts (key, url, task, params, steps, example, agent_time, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (key, url, task, json.dumps(params), json.dumps(steps, ensure_ascii=False),
+                 json.dumps(example, ensure_ascii=False), agent_time, time.time()),
+            )
+            self._conn.commit()
+
+    def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, task, params, steps, example, agent_time FROM scripts WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "key": key,
+            "recorded_url": row[0],
+            "recorded_task": row[1],
+            "recorded_params": json.loads(row[2]),
+            "steps": json.loads(row[3]),
+            "example": json.loads(row[4]),
+            "agent_time": row[5],
+        }
+
+    def _report(self, key: str, ok: bool, duration: float):
+        with self._lock:
+            if ok:
+                self._conn.execute(
+                    "UPDATE scripts SET replays = replays + 1, consecutive_failures = 0, "
+                    "replay_time_total = replay_time_total + ? WHERE key = ?",
+                    (duration, key),
+                )
+            else:
+                self._conn.execute(
+                    "UPDATE scripts SET failures = failures + 1, consecutive_failures = consecutive_failures + 1 WHERE key = ?",
+                    (key,),
+                )
+                self._conn.execute(
+                    "DELETE FROM scripts WHERE key = ? AND consecutive_failures >= ?", (key, self.max_failures)
+                )
+            self._conn.commit()
+
+    def _stats(self) -> Dict[str, Any]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, url, task, replays, failures, agent_time, replay_time_total, created_at FROM scripts ORDER BY created_at DESC"
+            ).fetchall()
+        scripts = []
+        for key, url, task, replays, failures, agent_time, replay_total, created_at in rows:
+            avg_replay = replay_total / replays if replays else None
+            scripts.append({
+                "key": key[:16],
+                "url": url,
+                "task": task[:200],
+                "replays": replays,
+                "failures": failures,
+                "agent_time": round(agent_time, 1),
+                "avg_replay_time": round(avg_replay, 2) if avg_replay is not None else None,
+                "time_saved": round(replays * (agent_time - avg_replay), 1) if avg_replay is not None else 0.0,
+                "recorded_at": datetime.fromtimestamp(created_at).isoformat(),
+            })
+        return {
+            "scripts": len(scripts),
+            "replays": sum(s["replays"] for s in scripts),
+            "failures": sum(s["failures"] for s in scripts),
+            "time_saved": round(sum(s["time_saved"] for s in scripts), 1),
+            "by_script": scripts,
+        }
+
+    async def record(self, url: str, task: str, history, example: Any, agent_time: float) -> bool:
+        """Grava o script de uma execução bem-sucedida; retorna False se ela não é reproduzível"""
+        key, params = task_template(url, task)
+        steps = script_from_history(history, url, params)
+        if steps is None:
+            return False
+        try:
+            await asyncio.to_thread(self._save, key, url, task, params, steps, example, agent_time)
+        except sqlite3.Error as e:
+            logger.warning(f"Falha ao gravar script de replay: {e}")
+            return False
+        return True
+
+    async def lookup(self, url: str, task: str) -> Optional[Dict[str, Any]]:
+        """
+        Script aplicável à tarefa, com os parâmetros atuais. Se algum parâmetro que
+        mudou não é usado por um script com interações (o agente pode tê-lo digitado
+        em outro formato ou clicado nele), o replay não é confiável e None é retornado.
+        """
+        key, params = task_template(url, task)
+        try:
+            script = await asyncio.to_thread(self._load, key)
+        except sqlite3.Error as e:
+            logger.warning(f"Falha ao consultar scripts de replay: {e}")
+            return None
+        if script is None:
+            return None
+        bound = set(_bound_params(script["steps"]))
+        interactive = any(step["op"] in INTERACTIVE_OPS for step in script["steps"])
+        task_param_count = len(PARAM_PATTERN.findall(" ".join(task.split())))
+        for index, (old, new) in enumerate(zip(script["recorded_params"], params)):
+            # Parâmetros da URL são aplicados pela própria navegação para a URL da tarefa;
+            # em scripts sem interação, os do texto só afetam a extração final
+            if old != new and index not in bound and index < task_param_count and interactive:
+                logger.info(f"Parâmetro {index} mudou ({old} -> {new}) e não é usado pelo script; replay ignorado")
+                return None
+        script["params"] = params
+        return script
+
+    async def report(self, key: str, ok: bool, duration: float) -> None:
+        try:
+            await asyncio.to_thread(self._report, key, ok, duration)
+        except sqlite3.Error as e:
+            logger.warning(f"Falha ao registrar resultado do replay: {e}")
+
+    async def stats(self) -> Dict[str, Any]:
+        return await asyncio.to_thread(self._stats)
@@ -0,0 +1,206 @@
+"""
+Cache de resultados para submissões idênticas de tarefas.
+
+A chave é um hash dos campos normalizados do BrowserTask que influenciam o
+resultado (URL, texto da tarefa, modelo e parâmetros). O cache é opt-in por
+requisição, com TTL por requisição e descarte LRU limitado por número de
+entradas, em memória ou em disco (SQLite).
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+logger = logging.getLogger("browser-use-api.cache")
+
+# Campos que não mudam o resultado da extração e por isso ficam fora da chave
+IGNORED_TASK_FIELDS = {"timeout", "navigation_timeout", "step_timeout", "debug_mode", "cache", "cache_ttl", "llm_cache"}
+
+
+def normalize_url(url: str) -> str:
+    """Normaliza esquema/host, remove fragmento e barra final e ordena a query string"""
+    parts = urlsplit(url.strip())
+    path = parts.path.rstrip("/") or "/"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, query, ""))
+
+
+def task_cache_key(task: Dict[str, Any]) -> str:
+    """Hash estável dos campos normalizados de um BrowserTask"""
+    normalized = {}
+    for field, value in task.items():
+        if field in IGNORED_TASK_FIELDS or value is None:
+            continue
+        if field == "url":
+            value = normalize_url(value)
+        elif field == "task":
+            value = " ".join(value.split())
+        elif field == "model":
+            value = value.strip().lower()
+        normalized[field] = value
+    payload = json.dumps(normalized, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MemoryResultCache:
+    """Cache LRU em memória (por processo)"""
+
+    def __init__(self, max_entries: int = 500):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, float, Dict[str, Any]]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[Tuple[float, Dict[str, Any]]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        created_at, expires_at, value = entry
+        if expires_at < time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return created_at, value
+
+    async def set(self, key: str, value: Dict[str, Any], ttl: float) -> None:
+        now = time.time()
+        self._entries[key] = (now, now + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def size(self) -> int:
+        return len(self._entries)
+
+
+class DiskResultCache:
+    """Cache LRU em disco (SQLite), preservado entre reinícios"""
+
+    def __init__(self, db_path: str, max_entries: int = 500):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS results (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_results_last_access ON results(last_access)")
+            self._conn.commit()
+
+    def _get(self, key: str) -> Optional[Tuple[float, Dict[str, Any]]]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at, expires_at FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[2] < now:
+                self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE results SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return row[1], json.loads(row[0])
+
+    def _set(self, key: str, value: Dict[str, Any], ttl: float):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, value, created_at, expires_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now, now + ttl, now),
+            )
+            self._conn.execute("DELETE FROM results WHERE expires_at < ?", (now,))
+            self._conn.execute(
+                """
+                DELETE FROM results WHERE key IN (
+                    SELECT key FROM results ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def _size(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    async def get(self, key: str) -> Optional[Tuple[float, Dict[str, Any]]]:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, value: Dict[str, Any], ttl: float) -> None:
+        await asyncio.to_thread(self._set, key, value, ttl)
+
+    async def size(self) -> int:
+        return await asyncio.to_thread(self._size)
+
+
+class ResultCache:
+    """
+    Fachada do cache de resultados com estatísticas de acerto.
+
+    Args:
+        backend: MemoryResultCache ou DiskResultCache
+        default_ttl: TTL, em segundos, quando a requisição não especifica cache_ttl
+        max_ttl: TTL máximo aceito por requisição
+    """
+
+    def __init__(self, backend, default_ttl: float = 600, max_ttl: float = 86400):
+        self.backend = backend
+        self.default_ttl = default_ttl
+        self.max_ttl = max_ttl
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def ttl_for(self, requested_ttl: Optional[int]) -> float:
+        if requested_ttl is None or requested_ttl <= 0:
+            return self.default_ttl
+        return min(float(requested_ttl), self.max_ttl)
+
+    async def lookup(self, key: str) -> Optional[Tuple[float, Dict[str, Any]]]:
+        try:
+            entry = await self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"Erro ao consultar o cache de resultados: {e}")
+            entry = None
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    async def store(self, key: str, value: Dict[str, Any], ttl: float) -> None:
+        try:
+            await self.backend.set(key, value, ttl)
+            self.stores += 1
+        except Exception as e:
+            logger.warning(f"Erro ao gravar no cache de resultados: {e}")
+
+    async def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "entries": await self.backend.size(),
+            "max_entries": self.backend.max_entries,
+            "default_ttl": self.default_ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
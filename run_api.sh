@@ -65,5 +65,11 @@ echo "===================================="
 echo ""
 
 # Iniciar a API
-echo "Iniciando a API..."
-uvicorn api:app --reload --host 0.0.0.0 --port 8000 
\ No newline at end of file
+# API_WORKERS > 1 inicia vários processos uvicorn (sem --reload, que não suporta múltiplos workers)
+API_WORKERS=${API_WORKERS:-1}
+echo "Iniciando a API com $API_WORKERS worker(s)..."
+if [ "$API_WORKERS" -gt 1 ]; then
+    uvicorn api:app --workers "$API_WORKERS" --host 0.0.0.0 --port 8000
+else
+    uvicorn api:app --reload --host 0.0.0.0 --port 8000
+fi
@@ -0,0 +1,143 @@
+"""
+Estado compartilhado entre processos uvicorn (modo multi-worker).
+
+Cada worker tem seu próprio loop de eventos e seu próprio pool de navegadores;
+o que precisa ser global (fila de tarefas, cache de resultados, limite de agentes
+simultâneos) fica em arquivos SQLite locais. Este módulo identifica os workers e
+implementa o limite global de execuções simultâneas.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from typing import Optional, Dict, Any
+
+import psutil
+
+logger = logging.getLogger("browser-use-api.shared")
+
+
+def worker_identity() -> str:
+    """Identificador do processo atual: host:pid"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def is_worker_alive(worker: Optional[str]) -> bool:
+    """
+    Verifica se o processo dono de um registro ainda existe. Processos de outros
+    hosts são considerados vivos, pois não há como verificá-los localmente.
+    """
+    if not worker or ":" not in worker:
+        return False
+    host, pid = worker.rsplit(":", 1)
+    if host != socket.gethostname():
+        return True
+    try:
+        return psutil.pid_exists(int(pid))
+    except ValueError:
+        return False
+
+
+class SharedSlotGate:
+    """
+    Semáforo global (SQLite) que limita as execuções simultâneas somadas de todos os workers.
+
+    Args:
+        db_path: Arquivo SQLite compartilhado pelos workers
+        max_slots: Execuções simultâneas permitidas no total
+        poll_interval: Intervalo, em segundos, entre tentativas quando não há vaga
+    """
+
+    def __init__(self, db_path: str, max_slots: int, poll_interval: float = 0.2):
+        self.db_path = db_path
+        self.max_slots = max(1, max_slots)
+        self.poll_interval = poll_interval
+        self.holder = worker_identity()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30, isolation_level=None)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS admission_slots (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    holder TEXT NOT NULL,
+                    tenant TEXT NOT NULL,
+                    acquired_at REAL NOT NULL
+                )
+                """
+            )
+            # Vagas deixadas por uma execução anterior deste mesmo processo não são válidas
+            self._conn.execute("DELETE FROM admission_slots WHERE holder = ?", (self.holder,))
+
+    def _purge_dead_holders(self):
+        holders = [r[0] for r in self._conn.execute("SELECT DISTINCT holder FROM admission_slots")]
+        for holder in holders:
+            if not is_worker_alive(holder):
+                logger.warning(f"Liberando vagas de admissão do worker encerrado {holder}")
+                self._conn.execute("DELETE FROM admission_slots WHERE holder = ?", (holder,))
+
+    def _try_acquire(self, tenant: str) -> Optional[int]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                in_use = self._conn.execute("SELECT COUNT(*) FROM admission_slots").fetchone()[0]
+                if in_use >= self.max_slots:
+                    self._purge_dead_holders()
+                    in_use = self._conn.execute("SELECT COUNT(*) FROM admission_slots").fetchone()[0]
+                if in_use >= self.max_slots:
+                    self._conn.execute("COMMIT")
+                    return None
+                cursor = self._conn.execute(
+                    "INSERT INTO admission_slots (holder, tenant, acquired_at) VALUES (?, ?, ?)",
+                    (self.holder, tenant, time.time()),
+                )
+                self._conn.execute("COMMIT")
+                return cursor.lastrowid
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _release(self, slot_id: int):
+        with self._lock:
+            self._conn.execute("DELETE FROM admission_slots WHERE id = ?", (slot_id,))
+
+    async def acquire(self, tenant: str, timeout: Optional[float] = None) -> int:
+        """Aguarda uma vaga global; levanta asyncio.TimeoutError após `timeout` segundos"""
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            attempt = asyncio.ensure_future(asyncio.to_thread(self._try_acquire, tenant))
+            try:
+                slot_id = await asyncio.shield(attempt)
+            except asyncio.CancelledError:
+                # A thread pode concluir a inserção depois do cancelamento: devolve a vaga
+                attempt.add_done_callback(
+                    lambda f: f.cancelled() or f.exception() or f.result() is None or self._release(f.result())
+                )
+                raise
+            if slot_id is not None:
+                return slot_id
+            if deadline is not None and time.time() >= deadline:
+                raise asyncio.TimeoutError()
+            await asyncio.sleep(self.poll_interval)
+
+    async def release(self, slot_id: int) -> None:
+        await asyncio.to_thread(self._release, slot_id)
+
+    def _stats(self) -> Dict[str, Any]:
+        with self._lock:
+            by_holder = dict(self._conn.execute("SELECT holder, COUNT(*) FROM admission_slots GROUP BY holder").fetchall())
+            by_tenant = dict(self._conn.execute("SELECT tenant, COUNT(*) FROM admission_slots GROUP BY tenant").fetchall())
+        return {
+            "max_slots": self.max_slots,
+            "in_use": sum(by_holder.values()),
+            "in_use_by_worker": by_holder,
+            "in_use_by_tenant": by_tenant,
+        }
+
+    async def stats(self) -> Dict[str, Any]:
+        return await asyncio.to_thread(self._stats)
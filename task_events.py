@@ -0,0 +1,175 @@
+"""
+Eventos de progresso por tarefa, transmitidos via Server-Sent Events.
+
+Os eventos gravados por log_detailed_info e os passos do agente (navegação,
+ações, tokens, conteúdo extraído e tempos) são publicados em um barramento em
+memória. Cada tarefa mantém um histórico limitado, para que clientes que se
+conectam depois (ou reconectam com Last-Event-ID) recebam os eventos perdidos,
+e um conjunto de assinantes que recebem os novos eventos em tempo real.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from typing import Optional, Dict, Any, List, AsyncIterator
+
+logger = logging.getLogger("browser-use-api.events")
+
+# Tamanho máximo do conteúdo extraído enviado em cada evento de passo
+MAX_EXTRACTED_CHARS = 4000
+
+
+class _TaskStream:
+    def __init__(self, history_size: int, owner: Optional[str] = None):
+        self.history_size = history_size
+        self.owner = owner
+        self.events: List[Dict[str, Any]] = []
+        self.subscribers: List[asyncio.Queue] = []
+        self.next_id = 1
+        self.closed_at: Optional[float] = None
+        self.dropped = 0
+
+
+class TaskEventBus:
+    """
+    Barramento de eventos por task_id.
+
+    Args:
+        history_size: Eventos mantidos por tarefa para replay
+        retention: Tempo, em segundos, que o histórico fica disponível após o fim da tarefa
+    """
+
+    def __init__(self, history_size: int = 1000, retention: float = 600):
+        self.history_size = history_size
+        self.retention = retention
+        self._streams: Dict[str, _TaskStream] = {}
+
+    def open(self, task_id: str, owner: Optional[str] = None) -> None:
+        """Passa a registrar eventos da tarefa (idempotente); owner é o tenant que a submeteu"""
+        self._purge_expired()
+        stream = self._streams.get(task_id)
+        if stream is None:
+            self._streams[task_id] = _TaskStream(self.history_size, owner)
+        elif owner is not None and stream.owner is None:
+            stream.owner = owner
+
+    def exists(self, task_id: str) -> bool:
+        return task_id in self._streams
+
+    def owner(self, task_id: str) -> Optional[str]:
+        stream = self._streams.get(task_id)
+        return stream.owner if stream is not None else None
+
+    def publish(self, task_id: str, event: str, data: Any = None) -> None:
+        """Publica um evento; ignorado se a tarefa não tem stream aberto ou já terminou"""
+        stream = self._streams.get(task_id)
+        if stream is None or stream.closed_at is not None:
+            return
+        entry = {"id": stream.next_id, "event": event, "timestamp": time.time(), "data": data}
+        stream.next_id += 1
+        stream.events.append(entry)
+        if len(stream.events) > stream.history_size:
+            stream.events.pop(0)
+            stream.dropped += 1
+        for queue in stream.subscribers:
+            queue.put_nowait(entry)
+
+    def close(self, task_id: str, event: str, data: Any = None) -> None:
+        """Publica o evento final (result/error) e encerra os assinantes"""
+        self.publish(task_id, event, data)
+        stream = self._streams.get(task_id)
+        if stream is None or stream.closed_at is not None:
+            return
+        stream.closed_at = time.time()
+        for queue in stream.subscribers:
+            queue.put_nowait(None)
+
+    async def subscribe(
+        self, task_id: str, last_event_id: int = 0, heartbeat: float = 15.0
+    ) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Itera sobre os eventos da tarefa a partir de last_event_id: primeiro o
+        histórico, depois os eventos novos até o evento final. Gera None a cada
+        `heartbeat` segundos sem eventos (usado para manter a conexão aberta).
+        """
+        stream = self._streams.get(task_id)
+        if stream is None:
+            return
+        # Sem await entre a cópia do histórico e a inscrição: nenhum evento se perde
+        backlog = [e for e in stream.events if e["id"] > last_event_id]
+        queue: asyncio.Queue = asyncio.Queue()
+        subscribed = stream.closed_at is None
+        if subscribed:
+            stream.subscribers.append(queue)
+        try:
+            for entry in backlog:
+                yield entry
+            if not subscribed:
+                return
+            while True:
+                try:
+                    entry = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if entry is None:
+                    return
+                yield entry
+        finally:
+            if queue in stream.subscribers:
+                stream.subscribers.remove(queue)
+
+    def _purge_expired(self):
+        limit = time.time() - self.retention
+        expired = [k for k, s in self._streams.items() if s.closed_at and s.closed_at < limit]
+        for task_id in expired:
+            del self._streams[task_id]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "streams": len(self._streams),
+            "open_streams": sum(1 for s in self._streams.values() if s.closed_at is None),
+            "subscribers": sum(len(s.subscribers) for s in self._streams.values()),
+        }
+
+
+def format_sse(entry: Optional[Dict[str, Any]]) -> str:
+    """Serializa um evento no formato text/event-stream (None vira um comentário de keep-alive)"""
+    if entry is None:
+        return ": keep-alive\n\n"
+    payload = json.dumps({"timestamp": entry["timestamp"], "data": entry["data"]}, ensure_ascii=False, default=str)
+    return f"id: {entry['id']}\nevent: {entry['event']}\ndata: {payload}\n\n"
+
+
+def summarize_agent_step(agent) -> Optional[Dict[str, Any]]:
+    """Resumo do último passo do agente browser-use: página, ações, resultado, tokens e tempo"""
+    history = agent.state.history
+    if not history.history:
+        return None
+    item = history.history[-1]
+    summary: Dict[str, Any] = {
+        "step": agent.state.n_steps - 1,
+        "url": item.state.url if item.state else None,
+        "title": item.state.title if item.state else None,
+    }
+    if item.model_output is not None:
+        brain = item.model_output.current_state
+        summary["evaluation_previous_goal"] = brain.evaluation_previous_goal
+        summary["next_goal"] = brain.next_goal
+        summary["actions"] = [a.model_dump(exclude_unset=True) for a in item.model_output.action]
+    summary["results"] = [
+        {
+            "is_done": r.is_done,
+            "success": r.success,
+            "extracted_content": r.extracted_content[:MAX_EXTRACTED_CHARS] if r.extracted_content else None,
+            "error": r.error,
+        }
+        for r in item.result
+    ]
+    if item.metadata is not None:
+        summary["duration"] = round(item.metadata.duration_seconds, 3)
+        summary["input_tokens"] = item.metadata.input_tokens
+    summary["total_input_tokens"] = history.total_input_tokens()
+    summary["total_duration"] = round(history.total_duration_seconds(), 3)
+    return summary
@@ -0,0 +1,359 @@
+"""
+Ciclo de vida das tarefas: orçamentos de tempo em camadas, cancelamento e
+limpeza de processos órfãos.
+
+Cada tarefa tem três limites: navegação (pré-navegação + espera de
+prontidão), duração de cada passo do agente e tempo total. Ao estourar um
+limite, ou quando o cliente cancela a tarefa (DELETE /tasks/{id}), o agente
+recebe primeiro um pedido de parada cooperativa (termina o passo atual); se
+não parar dentro do período de tolerância, a execução é cancelada. Em ambos os
+casos o contexto do navegador é fechado na saída do lease, e o pool mata a
+árvore de processos do navegador se o fechamento falhar.
+
+O OrphanReaper varre periodicamente os processos Chromium de automação
+(Playwright) que perderam o processo pai ou não pertencem a nenhum navegador do
+pool, encerra a árvore, remove o diretório de perfil temporário e contabiliza a
+memória recuperada.
+"""
+
+import asyncio
+import logging
+import os
+import shutil
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Optional, Dict, Any, Callable, Set, List
+
+import psutil
+
+logger = logging.getLogger("browser-use-api.lifecycle")
+
+
+class TaskTimeout(asyncio.TimeoutError):
+    """Um dos limites de tempo da tarefa foi atingido (kind: navigation, step ou total)"""
+
+    def __init__(self, kind: str, limit: float):
+        super().__init__(f"Limite de tempo de {kind} ({limit:g}s) atingido")
+        self.kind = kind
+        self.limit = limit
+
+
+class TaskCancelled(Exception):
+    """A tarefa foi cancelada pelo cliente"""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class TaskBudgets:
+    """Limites de tempo, em segundos, de uma tarefa (None: sem limite)"""
+
+    def __init__(self, total: float, navigation: Optional[float] = None, step: Optional[float] = None):
+        self.total = total
+        self.navigation = navigation
+        self.step = step
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"total": self.total, "navigation": self.navigation, "step": self.step}
+
+
+class TaskHandle:
+    """Estado de uma tarefa em execução, consultado pelo watchdog e pelo cancelamento"""
+
+    def __init__(self, task_id: str, budgets: TaskBudgets):
+        self.task_id = task_id
+        self.budgets = budgets
+        self.started_at = time.time()
+        self.deadline = self.started_at + budgets.total
+        self.phase = "starting"
+        self.step = 0
+        self.step_started_at: Optional[float] = None
+        self.cancel_reason: Optional[str] = None
+        # Histórico do agente, atualizado a cada passo: base do resultado parcial em caso de timeout
+        self.history = None
+        self._cancelled = asyncio.Event()
+
+    def remaining(self) -> float:
+        return max(0.0, self.deadline - time.time())
+
+    def cancel(self, reason: str):
+        if self.cancel_reason is None:
+            self.cancel_reason = reason
+            self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_reason is not None
+
+    def check_cancelled(self):
+        if self.cancel_reason is not None:
+            raise TaskCancelled(self.cancel_reason)
+
+    def step_started(self):
+        self.step += 1
+        self.step_started_at = time.time()
+
+    def step_finished(self):
+        self.step_started_at = None
+
+    def violation(self) -> Optional[Exception]:
+        """Cancelamento ou limite estourado neste instante, ou None"""
+        if self.cancel_reason is not None:
+            return TaskCancelled(self.cancel_reason)
+        now = time.time()
+        if now >= self.deadline:
+            return TaskTimeout("total", self.budgets.total)
+        if self.budgets.step and self.step_started_at is not None and now - self.step_started_at >= self.budgets.step:
+            return TaskTimeout("step", self.budgets.step)
+        return None
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "task_id": self.task_id,
+            "phase": self.phase,
+            "step": self.step,
+            "elapsed": round(time.time() - self.started_at, 1),
+            "remaining": round(self.remaining(), 1),
+            "budgets": self.budgets.to_dict(),
+            "cancel_reason": self.cancel_reason,
+        }
+
+
+class LifecycleManager:
+    """
+    Registro das tarefas em execução neste processo e aplicação dos limites.
+
+    Args:
+        cancel_grace: Segundos entre o pedido de parada cooperativa e o cancelamento forçado
+        tick: Intervalo, em segundos, de verificação dos limites durante a execução do agente
+    """
+
+    def __init__(self, cancel_grace: float = 10.0, tick: float = 0.5):
+        self.cancel_grace = cancel_grace
+        self.tick = tick
+        self._handles: Dict[str, TaskHandle] = {}
+        self._stats = {"tasks": 0, "cancelled": 0, "forced_cancellations": 0,
+                       "timeouts": {"navigation": 0, "step": 0, "total": 0}}
+
+    @asynccontextmanager
+    async def track(self, task_id: str, budgets: TaskBudgets):
+        handle = TaskHandle(task_id, budgets)
+        self._handles[task_id] = handle
+        self._stats["tasks"] += 1
+        try:
+            yield handle
+        finally:
+            if handle.cancelled:
+                self._stats["cancelled"] += 1
+            self._handles.pop(task_id, None)
+
+    def cancel(self, task_id: str, reason: str = "Tarefa cancelada pelo cliente") -> bool:
+        """Pede o cancelamento de uma tarefa em execução neste processo; False se ela não está aqui"""
+        handle = self._handles.get(task_id)
+        if handle is None:
+            return False
+        handle.cancel(reason)
+        logger.info(f"Cancelamento solicitado para a tarefa {task_id}: {reason}")
+        return True
+
+    async def navigation(self, handle: TaskHandle, coro):
+        """Executa a pré-navegação dentro do limite de navegação (e do tempo total restante)"""
+        handle.check_cancelled()
+        handle.phase = "navigation"
+        limit = handle.remaining()
+        kind = "total"
+        if handle.budgets.navigation is not None and handle.budgets.navigation < limit:
+            limit, kind = handle.budgets.navigation, "navigation"
+        runner = asyncio.ensure_future(coro)
+        cancelled = asyncio.ensure_future(handle._cancelled.wait())
+        done: Set[asyncio.Future] = set()
+        try:
+            done, _ = await asyncio.wait({runner, cancelled}, timeout=limit, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            cancelled.cancel()
+            if runner not in done:
+                runner.cancel()
+        if runner in done:
+            return runner.result()
+        await asyncio.gather(runner, return_exceptions=True)
+        handle.check_cancelled()
+        self._stats["timeouts"][kind] += 1
+        raise TaskTimeout(kind, handle.budgets.navigation if kind == "navigation" else handle.budgets.total)
+
+    async def run_agent(self, handle: TaskHandle, agent, run: Callable[[], Any]):
+        """
+        Executa o agente (run() deve chamar agent.run) com o watchdog de limites.
+        Estouro ou cancelamento: agent.stop() e, após cancel_grace, cancelamento da execução.
+        """
+        violation = handle.violation()
+        if violation is not None:
+            raise self._count(violation)
+        handle.phase = "agent"
+        runner = asyncio.ensure_future(run())
+        stop_requested_at: Optional[float] = None
+        try:
+            while True:
+                done, _ = await asyncio.wait({runner}, timeout=self.tick)
+                if runner in done:
+                    result = runner.result()
+                    finished = getattr(result, "is_done", None)
+                    if violation is not None and not (finished and finished()):
+                        # Parou cooperativamente após o estouro, sem concluir: o resultado é parcial
+                        raise self._count(violation)
+                    return result
+                if violation is None:
+                    violation = handle.violation()
+                    if violation is not None:
+                        stop_requested_at = time.time()
+                        logger.warning(f"[{handle.task_id}] Parando o agente: {violation}")
+                        agent.stop()
+                elif time.time() - stop_requested_at >= self.cancel_grace:
+                    logger.warning(f"[{handle.task_id}] Agente não parou em {self.cancel_grace:g}s; cancelando a execução")
+                    self._stats["forced_cancellations"] += 1
+                    runner.cancel()
+                    # Uma execução presa que ignora o cancelamento é abandonada: o contexto será fechado mesmo assim
+                    await asyncio.wait({runner}, timeout=self.cancel_grace)
+                    raise self._count(violation)
+        finally:
+            handle.phase = "cleanup"
+            if not runner.done():
+                runner.cancel()
+
+    def _count(self, violation: Exception) -> Exception:
+        if isinstance(violation, TaskTimeout):
+            self._stats["timeouts"][violation.kind] += 1
+        return violation
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "cancel_grace": self.cancel_grace,
+            "running": [h.describe() for h in self._handles.values()],
+            **self._stats,
+            "timeouts": dict(self._stats["timeouts"]),
+        }
+
+
+def _is_automation_browser(cmdline: List[str]) -> bool:
+    """Processo raiz de um Chromium lançado pelo Playwright (não os renderers/GPU, que têm --type=)"""
+    if not any(arg.startswith("--user-data-dir=") and "playwright" in arg for arg in cmdline):
+        return False
+    return not any(arg.startswith("--type=") for arg in cmdline)
+
+
+def _is_playwright_driver(cmdline: List[str]) -> bool:
+    return any("playwright" in arg for arg in cmdline) and "run-driver" in cmdline
+
+
+class OrphanReaper:
+    """
+    Encerra navegadores de automação órfãos: sem driver Playwright vivo como pai,
+    ou cujo driver perdeu o processo Python dono, e que não pertencem ao pool.
+
+    Args:
+        known_pids: Função que retorna os PIDs das árvores de processos do pool
+        interval: Intervalo, em segundos, entre varreduras
+        min_age: Idade mínima, em segundos, para um processo ser considerado órfão
+    """
+
+    def __init__(self, known_pids: Callable[[], Set[int]], interval: float = 60.0, min_age: float = 120.0):
+        self.known_pids = known_pids
+        self.interval = interval
+        self.min_age = min_age
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {"runs": 0, "processes_killed": 0, "reclaimed_mb": 0.0, "profiles_removed": 0,
+                       "last_run": None, "last_reclaimed_mb": 0.0}
+
+    def _orphan_roots(self) -> List[psutil.Process]:
+        known = self.known_pids()
+        uid = os.getuid() if hasattr(os, "getuid") else None
+        now = time.time()
+        roots = []
+        for proc in psutil.process_iter(["pid", "ppid", "cmdline", "create_time", "uids"]):
+            info = proc.info
+            if info["pid"] in known or not info["cmdline"]:
+                continue
+            if uid is not None and info["uids"] and info["uids"].real != uid:
+                continue
+            if now - (info["create_time"] or now) < self.min_age:
+                continue
+            cmdline = info["cmdline"]
+            try:
+                if _is_automation_browser(cmdline):
+                    parent = proc.parent()
+                    if parent is None or parent.pid == 1 or not _is_playwright_driver(parent.cmdline()):
+                        roots.append(proc)
+                elif _is_playwright_driver(cmdline):
+                    parent = proc.parent()
+                    if parent is None or parent.pid == 1:
+                        roots.append(proc)
+            except psutil.Error:
+                continue
+        return roots
+
+    def reap(self) -> Dict[str, Any]:
+        """Uma varredura síncrona (chamada em thread); retorna o que foi encerrado"""
+        killed, reclaimed, profiles = 0, 0, []
+        for root in self._orphan_roots():
+            try:
+                tree = [root] + root.children(recursive=True)
+                cmdline = root.cmdline()
+            except psutil.Error:
+                continue
+            for proc in tree:
+                try:
+                    reclaimed += proc.memory_info().rss
+                    proc.kill()
+                    killed += 1
+                except psutil.Error:
+                    continue
+            psutil.wait_procs(tree, timeout=5)
+            for arg in cmdline:
+                if arg.startswith("--user-data-dir="):
+                    path = arg.split("=", 1)[1]
+                    # Só perfis temporários do Playwright
+                    if os.path.dirname(os.path.abspath(path)) == os.path.abspath(tempfile.gettempdir()) and "playwright" in os.path.basename(path):
+                        shutil.rmtree(path, ignore_errors=True)
+                        profiles.append(path)
+            logger.warning(f"Processo órfão {root.pid} encerrado ({len(tree)} processo(s))")
+        reclaimed_mb = reclaimed / (1024 * 1024)
+        self._stats["runs"] += 1
+        self._stats["processes_killed"] += killed
+        self._stats["reclaimed_mb"] += reclaimed_mb
+        self._stats["profiles_removed"] += len(profiles)
+        self._stats["last_run"] = time.time()
+        self._stats["last_reclaimed_mb"] = reclaimed_mb
+        if killed:
+            logger.warning(f"Reaper: {killed} processo(s) órfão(s) encerrado(s), {reclaimed_mb:.0f}MB recuperados")
+        return {"processes_killed": killed, "reclaimed_mb": round(reclaimed_mb, 1), "profiles_removed": profiles}
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await asyncio.to_thread(self.reap)
+            except Exception as e:
+                logger.error(f"Erro na varredura de processos órfãos: {e}", exc_info=True)
+
+    def start(self):
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        stats = dict(self._stats)
+        stats["reclaimed_mb"] = round(stats["reclaimed_mb"], 1)
+        stats["last_reclaimed_mb"] = round(stats["last_reclaimed_mb"], 1)
+        if stats["last_run"] is not None:
+            stats["last_run"] = datetime.fromtimestamp(stats["last_run"]).isoformat()
+        return {"interval": self.interval, "min_age": self.min_age, **stats}
@@ -0,0 +1,398 @@
+"""
+Fila assíncrona de tarefas de navegação.
+
+O cliente submete a tarefa e recebe um task_id imediatamente; um conjunto limitado
+de workers executa as tarefas em segundo plano e grava status e resultado em um
+backend plugável (memória por padrão, SQLite para sobreviver a reinícios).
+
+Os workers reivindicam as tarefas diretamente no backend. Com SQLite, vários
+processos uvicorn compartilham a mesma fila: qualquer processo pode executar uma
+tarefa e qualquer processo responde às consultas de status e resultado.
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Optional, Dict, Any, List, Callable, Awaitable
+
+from shared_state import worker_identity, is_worker_alive
+
+logger = logging.getLogger("browser-use-api.queue")
+
+# Estados possíveis de uma tarefa na fila
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_CANCELLED = "cancelled"
+FINISHED_STATUSES = ("completed", "completed_with_parsing_error", "partial", "error", "budget_exceeded", STATUS_CANCELLED)
+
+
+class QueueFullError(Exception):
+    """A fila atingiu a capacidade máxima configurada"""
+
+
+class InMemoryJobStore:
+    """Backend padrão: mantém as tarefas em memória (perdidas ao reiniciar)"""
+
+    def __init__(self, result_ttl: float = 86400):
+        self.result_ttl = result_ttl
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+
+    async def create(self, task_id: str, request: Dict[str, Any], owner: Optional[str] = None) -> Dict[str, Any]:
+        self._purge_expired()
+        job = {
+            "task_id": task_id,
+            "status": STATUS_QUEUED,
+            "owner": owner,
+            "worker": None,
+            "request": request,
+            "response": None,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "cancel_requested": False,
+        }
+        self._jobs[task_id] = job
+        return dict(job)
+
+    async def update(self, task_id: str, **fields) -> None:
+        if task_id in self._jobs:
+            self._jobs[task_id].update(fields)
+
+    async def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        job = self._jobs.get(task_id)
+        return dict(job) if job else None
+
+    async def list_unfinished(self) -> List[Dict[str, Any]]:
+        return [dict(j) for j in self._jobs.values() if j["status"] not in FINISHED_STATUSES]
+
+    async def claim_next(self, worker: str) -> Optional[Dict[str, Any]]:
+        """Marca a tarefa enfileirada mais antiga como em execução por `worker` e a retorna"""
+        for job in self._jobs.values():
+            if job["status"] == STATUS_QUEUED:
+                job.update(status=STATUS_RUNNING, worker=worker, started_at=time.time())
+                return dict(job)
+        return None
+
+    async def count_queued(self) -> int:
+        return sum(1 for j in self._jobs.values() if j["status"] == STATUS_QUEUED)
+
+    async def request_cancel(self, task_id: str) -> Optional[str]:
+        """
+        Cancela uma tarefa enfileirada ou marca uma em execução para cancelamento.
+        Retorna o status resultante (None se a tarefa não existe).
+        """
+        job = self._jobs.get(task_id)
+        if job is None:
+            return None
+        if job["status"] == STATUS_QUEUED:
+            job.update(status=STATUS_CANCELLED, finished_at=time.time(),
+                       response={"task_id": task_id, "status": STATUS_CANCELLED, "error": "Tarefa cancelada antes de iniciar"})
+        elif job["status"] == STATUS_RUNNING:
+            job["cancel_requested"] = True
+        return job["status"]
+
+    async def is_cancel_requested(self, task_id: str) -> bool:
+        job = self._jobs.get(task_id)
+        return bool(job and job["cancel_requested"])
+
+    def _purge_expired(self):
+        if not self.result_ttl:
+            return
+        limit = time.time() - self.result_ttl
+        expired = [k for k, j in self._jobs.items() if j["finished_at"] and j["finished_at"] < limit]
+        for task_id in expired:
+            del self._jobs[task_id]
+
+
+class SQLiteJobStore:
+    """Backend durável: as tarefas sobrevivem a reinícios da API"""
+
+    def __init__(self, db_path: str, result_ttl: float = 86400):
+        self.db_path = db_path
+        self.result_ttl = result_ttl
+        self._lock = threading.Lock()
+        # timeout: espera pelo lock de escrita quando vários processos usam o mesmo arquivo
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    task_id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    owner TEXT,
+                    worker TEXT,
+                    request TEXT NOT NULL,
+                    response TEXT,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    cancel_requested INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+            columns = [r[1] for r in self._conn.execute("PRAGMA table_info(jobs)")]
+            if "worker" not in columns:
+                self._conn.execute("ALTER TABLE jobs ADD COLUMN worker TEXT")
+            if "cancel_requested" not in columns:
+                self._conn.execute("ALTER TABLE jobs ADD COLUMN cancel_requested INTEGER NOT NULL DEFAULT 0")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at)")
+            self._conn.commit()
+
+    def _row_to_job(self, row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job["request"] = json.loads(job["request"])
+        job["response"] = json.loads(job["response"]) if job["response"] else None
+        return job
+
+    def _execute(self, sql: str, params: tuple = (), fetch: bool = False):
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            rows = cursor.fetchall() if fetch else None
+            self._conn.commit()
+            return rows
+
+    async def create(self, task_id: str, request: Dict[str, Any], owner: Optional[str] = None) -> Dict[str, Any]:
+        now = time.time()
+        if self.result_ttl:
+            await asyncio.to_thread(
+                self._execute, "DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?", (now - self.result_ttl,)
+            )
+        await asyncio.to_thread(
+            self._execute,
+            "INSERT INTO jobs (task_id, status, owner, request, created_at) VALUES (?, ?, ?, ?, ?)",
+            (task_id, STATUS_QUEUED, owner, json.dumps(request), now),
+        )
+        return await self.get(task_id)
+
+    async def update(self, task_id: str, **fields) -> None:
+        if not fields:
+            return
+        if "response" in fields and fields["response"] is not None:
+            fields["response"] = json.dumps(fields["response"])
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        await asyncio.to_thread(
+            self._execute, f"UPDATE jobs SET {columns} WHERE task_id = ?", (*fields.values(), task_id)
+        )
+
+    async def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        rows = await asyncio.to_thread(self._execute, "SELECT * FROM jobs WHERE task_id = ?", (task_id,), True)
+        return self._row_to_job(rows[0]) if rows else None
+
+    async def list_unfinished(self) -> List[Dict[str, Any]]:
+        placeholders = ", ".join("?" for _ in FINISHED_STATUSES)
+        rows = await asyncio.to_thread(
+            self._execute,
+            f"SELECT * FROM jobs WHERE status NOT IN ({placeholders}) ORDER BY created_at",
+            FINISHED_STATUSES,
+            True,
+        )
+        return [self._row_to_job(r) for r in rows]
+
+    async def claim_next(self, worker: str) -> Optional[Dict[str, Any]]:
+        """Marca atomicamente (entre processos) a tarefa enfileirada mais antiga como em execução"""
+        rows = await asyncio.to_thread(
+            self._execute,
+            """
+            UPDATE jobs SET status = ?, worker = ?, started_at = ?
+            WHERE task_id = (SELECT task_id FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1)
+            RETURNING *
+            """,
+            (STATUS_RUNNING, worker, time.time(), STATUS_QUEUED),
+            True,
+        )
+        return self._row_to_job(rows[0]) if rows else None
+
+    async def count_queued(self) -> int:
+        rows = await asyncio.to_thread(
+            self._execute, "SELECT COUNT(*) FROM jobs WHERE status = ?", (STATUS_QUEUED,), True
+        )
+        return rows[0][0]
+
+    async def request_cancel(self, task_id: str) -> Optional[str]:
+        """
+        Cancela uma tarefa enfileirada ou marca uma em execução para cancelamento
+        (o worker dono, em qualquer processo, observa a marca). Retorna o status resultante.
+        """
+        response = json.dumps({"task_id": task_id, "status": STATUS_CANCELLED, "error": "Tarefa cancelada antes de iniciar"})
+        await asyncio.to_thread(
+            self._execute,
+            "UPDATE jobs SET status = ?, finished_at = ?, response = ? WHERE task_id = ? AND status = ?",
+            (STATUS_CANCELLED, time.time(), response, task_id, STATUS_QUEUED),
+        )
+        await asyncio.to_thread(
+            self._execute,
+            "UPDATE jobs SET cancel_requested = 1 WHERE task_id = ? AND status = ?",
+            (task_id, STATUS_RUNNING),
+        )
+        job = await self.get(task_id)
+        return job["status"] if job else None
+
+    async def is_cancel_requested(self, task_id: str) -> bool:
+        rows = await asyncio.to_thread(
+            self._execute, "SELECT cancel_requested FROM jobs WHERE task_id = ?", (task_id,), True
+        )
+        return bool(rows and rows[0][0])
+
+
+class TaskScheduler:
+    """
+    Executa tarefas da fila com um número limitado de workers.
+
+    Args:
+        store: Backend de persistência (InMemoryJobStore ou SQLiteJobStore)
+        executor: Corrotina (task_id, request, owner) que executa a tarefa e retorna o TaskResponse serializado
+        max_workers: Tarefas executadas simultaneamente (por processo)
+        max_queue_size: Tarefas aguardando execução antes de recusar novas submissões
+        poll_interval: Intervalo, em segundos, para buscar tarefas submetidas por outros processos
+            e verificar pedidos de cancelamento das tarefas em execução
+        on_cancel: Chamado com o task_id quando o cancelamento de uma tarefa em execução é pedido
+        shared: Fila compartilhada por vários processos (multi-worker); com False, toda tarefa
+            em execução encontrada na inicialização é de uma execução anterior
+    """
+
+    def __init__(
+        self,
+        store,
+        executor: Callable[[str, Dict[str, Any], Optional[str]], Awaitable[Dict[str, Any]]],
+        max_workers: int = 2,
+        max_queue_size: int = 100,
+        poll_interval: float = 1.0,
+        on_cancel: Optional[Callable[[str], Any]] = None,
+        shared: bool = False,
+    ):
+        self.store = store
+        self.executor = executor
+        self.max_workers = max(1, max_workers)
+        self.max_queue_size = max_queue_size
+        self.poll_interval = poll_interval
+        self.on_cancel = on_cancel
+        self.shared = shared
+        self.worker_id = worker_identity()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._workers: List[asyncio.Task] = []
+        self._running: Dict[str, float] = {}
+
+    async def start(self):
+        """Inicia os workers; tarefas pendentes de execuções anteriores continuam na fila"""
+        self._wakeup = asyncio.Event()
+        pending = 0
+        for job in await self.store.list_unfinished():
+            if job["status"] == STATUS_RUNNING and self._is_orphaned(job):
+                # O processo que executava a tarefa morreu no meio: não há como retomar o agente
+                await self.store.update(
+                    job["task_id"],
+                    status="error",
+                    finished_at=time.time(),
+                    response={"task_id": job["task_id"], "status": "error", "error": "Tarefa interrompida por reinício da API"},
+                )
+            elif job["status"] == STATUS_QUEUED:
+                pending += 1
+        if pending:
+            logger.info(f"{pending} tarefa(s) pendente(s) na fila")
+        self._workers = [asyncio.create_task(self._worker(i)) for i in range(self.max_workers)]
+
+    def _is_orphaned(self, job: Dict[str, Any]) -> bool:
+        """
+        Se a tarefa em execução ficou sem processo dono. O próprio host:pid é sempre de uma
+        execução anterior (após um docker restart o PID se repete); sem fila compartilhada,
+        nenhum outro processo pode estar executando a tarefa.
+        """
+        worker = job.get("worker")
+        if not self.shared or worker == self.worker_id:
+            return True
+        return not is_worker_alive(worker)
+
+    async def shutdown(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def queue_depth(self) -> int:
+        return await self.store.count_queued()
+
+    async def submit(self, task_id: str, request: Dict[str, Any], owner: Optional[str] = None) -> Dict[str, Any]:
+        """Registra a tarefa na fila; retorna o registro criado"""
+        if self._wakeup is None:
+            raise RuntimeError("Fila de tarefas não iniciada")
+        depth = await self.queue_depth()
+        if self.max_queue_size and depth >= self.max_queue_size:
+            raise QueueFullError(f"Fila cheia ({self.max_queue_size} tarefas aguardando)")
+        job = await self.store.create(task_id, request, owner=owner)
+        self._wakeup.set()
+        logger.info(f"Tarefa {task_id} enfileirada (profundidade da fila: {depth + 1})")
+        return job
+
+    async def _next_job(self) -> Dict[str, Any]:
+        """Aguarda e reivindica a próxima tarefa (submetida por este ou por outro processo)"""
+        while True:
+            job = await self.store.claim_next(self.worker_id)
+            if job is not None:
+                return job
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def _worker(self, worker_id: int):
+        while True:
+            job = await self._next_job()
+            task_id, request, owner = job["task_id"], job["request"], job["owner"]
+            self._running[task_id] = time.time()
+            watcher = asyncio.create_task(self._watch_cancel(task_id))
+            try:
+                response = await self.executor(task_id, request, owner)
+                await self.store.update(
+                    task_id,
+                    status=response.get("status", "completed"),
+                    response=response,
+                    finished_at=time.time(),
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Worker {worker_id}: erro ao executar tarefa {task_id}: {e}", exc_info=True)
+                await self.store.update(
+                    task_id,
+                    status="error",
+                    response={"task_id": task_id, "status": "error", "error": str(e)},
+                    finished_at=time.time(),
+                )
+            finally:
+                watcher.cancel()
+                self._running.pop(task_id, None)
+
+    async def _watch_cancel(self, task_id: str):
+        """Repassa ao executor o pedido de cancelamento feito em qualquer processo"""
+        if self.on_cancel is None:
+            return
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                if await self.store.is_cancel_requested(task_id):
+                    self.on_cancel(task_id)
+                    return
+            except Exception as e:
+                logger.warning(f"Erro ao verificar cancelamento da tarefa {task_id}: {e}")
+
+    async def cancel(self, task_id: str) -> Optional[str]:
+        """Cancela a tarefa na fila ou pede o cancelamento da execução; retorna o status (None: inexistente)"""
+        status = await self.store.request_cancel(task_id)
+        if status == STATUS_RUNNING and task_id in self._running and self.on_cancel is not None:
+            self.on_cancel(task_id)
+        return status
+
+    async def stats(self) -> Dict[str, Any]:
+        return {
+            "worker_id": self.worker_id,
+            "workers": self.max_workers,
+            "max_queue_size": self.max_queue_size,
+            "queue_depth": await self.queue_depth(),
+            "running": len(self._running),
+        }
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Testes offline das funções puras do replay de scripts, da validação de schema
+das receitas e da chave do cache de resultados. Não usam rede, navegador nem LLM.
+
+Uso:
+    python -m pytest -q test_replay.py
+"""
+import asyncio
+
+from recipes import validate_schema
+from replay import ReplayStore, _templatize, render, task_template
+from result_cache import task_cache_key
+
+URL = "https://www.bcb.gov.br/estabilidadefinanceira/buscanormas"
+TASK = "Extraia as normas publicadas entre 01/02/2024 e 15/03/2024"
+
+
+def test_task_template_same_key_for_new_parameters():
+    key, params = task_template(URL, TASK)
+    other_key, other_params = task_template(URL, "Extraia   as normas publicadas entre 01/04/2024 e 30/04/2024")
+    assert key == other_key
+    assert params == ["01/02/2024", "15/03/2024"]
+    assert other_params == ["01/04/2024", "30/04/2024"]
+
+
+def test_task_template_different_text_changes_key():
+    key, _ = task_template(URL, TASK)
+    other_key, _ = task_template(URL, "Extraia as resoluções publicadas entre 01/02/2024 e 15/03/2024")
+    assert key != other_key
+
+
+def test_task_template_url_numbers_are_parameters():
+    _, params = task_template("https://example.com/noticias?pagina=2", "Extraia as notícias")
+    assert params == ["2"]
+
+
+def test_templatize_dates_in_both_formats():
+    params = ["01/02/2024", "15/03/2024"]
+    assert _templatize(URL, URL, params) == "{{url}}"
+    assert _templatize("01/02/2024", URL, params) == "{{p0|br}}"
+    assert _templatize("de 2024-02-01 até 2024-03-15", URL, params) == "de {{p0|iso}} até {{p1|iso}}"
+
+
+def test_templatize_ignores_single_digit_numbers():
+    assert _templatize("página 2 de 3", URL, ["2"]) == "página 2 de 3"
+    assert _templatize("ano 2024", URL, ["2024"]) == "ano {{p0}}"
+
+
+def test_render_rewrites_dates_in_recorded_format():
+    params = ["2024-04-01", "30/04/2024"]
+    assert render("{{p0|br}}", URL, params) == "01/04/2024"
+    assert render("{{p1|iso}}", URL, params) == "2024-04-30"
+    assert render("{{url}}?ano={{p0}}", URL, params) == f"{URL}?ano=2024-04-01"
+
+
+def test_templatize_render_round_trip():
+    recorded = ["01/02/2024", "15/03/2024"]
+    text = _templatize("2024-02-01 a 15/03/2024", URL, recorded)
+    assert render(text, URL, ["01/04/2024", "30/04/2024"]) == "2024-04-01 a 30/04/2024"
+
+
+def _store_with_script(tmp_path, steps):
+    store = ReplayStore(str(tmp_path / "replay.db"))
+    key, params = task_template(URL, TASK)
+    store._save(key, URL, TASK, params, steps, example=[{"titulo": "x"}], agent_time=30.0)
+    return store
+
+
+FILL_FIRST_DATE = [
+    {"op": "goto", "url": "{{url}}"},
+    {"op": "fill", "text": "{{p0|br}}", "xpath": "//input[1]", "css": "#inicio"},
+    {"op": "read"},
+]
+
+
+def test_lookup_renders_bound_parameter(tmp_path):
+    store = _store_with_script(tmp_path, FILL_FIRST_DATE)
+    script = asyncio.run(store.lookup(URL, "Extraia as normas publicadas entre 01/04/2024 e 15/03/2024"))
+    assert script is not None
+    assert script["params"] == ["01/04/2024", "15/03/2024"]
+    assert render(script["steps"][1]["text"], URL, script["params"]) == "01/04/2024"
+
+
+def test_lookup_refuses_changed_unbound_parameter(tmp_path):
+    store = _store_with_script(tmp_path, FILL_FIRST_DATE)
+    # p1 mudou, mas o script com interações não o usa: o agente pode tê-lo digitado de outra forma
+    assert asyncio.run(store.lookup(URL, "Extraia as normas publicadas entre 01/02/2024 e 30/04/2024")) is None
+
+
+def test_lookup_without_interactions_accepts_changed_parameter(tmp_path):
+    store = _store_with_script(tmp_path, [{"op": "goto", "url": "{{url}}"}, {"op": "read"}])
+    script = asyncio.run(store.lookup(URL, "Extraia as normas publicadas entre 01/02/2024 e 30/04/2024"))
+    assert script is not None
+    assert script["params"] == ["01/02/2024", "30/04/2024"]
+
+
+def test_lookup_unknown_task(tmp_path):
+    store = _store_with_script(tmp_path, FILL_FIRST_DATE)
+    assert asyncio.run(store.lookup(URL, "Liste os normativos revogados")) is None
+
+
+def test_validate_schema():
+    schema = {
+        "type": "array",
+        "minItems": 1,
+        "items": {
+            "type": "object",
+            "required": ["titulo"],
+            "properties": {"titulo": {"type": "string"}, "link": {"type": "string"}},
+        },
+    }
+    assert validate_schema([{"titulo": "Norma", "link": "https://x"}], schema) == []
+    assert validate_schema([], schema) == ["$: 0 itens, mínimo 1"]
+    assert validate_schema([{"link": "https://x"}], schema) == ["$[0].titulo: campo obrigatório ausente"]
+    assert validate_schema({"titulo": "Norma"}, schema) == ["$: esperado array, obtido dict"]
+
+
+def test_task_cache_key_normalization():
+    base = {"url": "https://Example.com/noticias/?b=2&a=1#topo", "task": "Extraia  as notícias", "model": "DeepSeek-Chat"}
+    same = {"url": "https://example.com/noticias?a=1&b=2", "task": "Extraia as notícias", "model": "deepseek-chat",
+            "timeout": 120, "debug_mode": True, "llm_cache": False}
+    assert task_cache_key(base) == task_cache_key(same)
+    assert task_cache_key(base) != task_cache_key({**base, "task": "Extraia os comunicados"})
@@ -0,0 +1,184 @@
+"""
+Contabilização de uso do LLM por tarefa e orçamentos com parada antecipada.
+
+Um callback LangChain anexado às instâncias de LLM (compartilhadas entre as
+tarefas) soma tokens de entrada/saída, chamadas e tempo de espera no TaskUsage
+da tarefa em execução, obtido de um contextvar. A cada passo do agente o
+orçamento da requisição (tokens, passos ou tempo) é verificado; ao esgotar, o
+agente é parado no fim do passo e a tarefa retorna o que já foi extraído.
+"""
+
+import contextvars
+import json
+import re
+import time
+from typing import Optional, Dict, Any, List, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import AsyncCallbackHandler
+
+from metrics import served_from_cache
+
+# Prefixo que a ação extract_content do browser-use coloca no conteúdo extraído
+EXTRACTED_PREFIX = re.compile(r"^\s*📄\s*Extracted from page\s*:?\s*")
+
+# TaskUsage da tarefa em execução (None fora de uma tarefa)
+current_usage: contextvars.ContextVar[Optional["TaskUsage"]] = contextvars.ContextVar("current_usage", default=None)
+
+
+class TaskUsage:
+    """Uso acumulado de uma tarefa: tokens, chamadas ao LLM, tempo de espera e passos"""
+
+    def __init__(self, model: str):
+        self.model = model
+        self.started_at = time.time()
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.llm_calls = 0
+        self.llm_errors = 0
+        self.llm_cache_hits = 0
+        self.llm_time = 0.0
+        self.steps = 0
+        self.stop_reason: Optional[str] = None
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+    def elapsed(self) -> float:
+        return time.time() - self.started_at
+
+    def cost(self, prices: Dict[str, Dict[str, float]]) -> Optional[float]:
+        """Custo em USD pelos preços por milhão de tokens do modelo (None se o modelo não tem preço)"""
+        price = prices.get(self.model)
+        if not price:
+            return None
+        return (self.input_tokens * price.get("input", 0) + self.output_tokens * price.get("output", 0)) / 1_000_000
+
+    def to_dict(self, prices: Optional[Dict[str, Dict[str, float]]] = None) -> Dict[str, Any]:
+        usage: Dict[str, Any] = {
+            "model": self.model,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "total_tokens": self.total_tokens,
+            "llm_calls": self.llm_calls,
+            "llm_errors": self.llm_errors,
+            "llm_cache_hits": self.llm_cache_hits,
+            "llm_time": round(self.llm_time, 3),
+            "steps": self.steps,
+            "elapsed": round(self.elapsed(), 3),
+        }
+        cost = self.cost(prices or {})
+        if cost is not None:
+            usage["cost_usd"] = round(cost, 6)
+        if self.stop_reason:
+            usage["stop_reason"] = self.stop_reason
+        return usage
+
+
+def token_usage(response) -> Tuple[int, int]:
+    """(tokens de entrada, tokens de saída) de um LLMResult"""
+    input_tokens = output_tokens = 0
+    for generations in response.generations:
+        for generation in generations:
+            metadata = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if metadata:
+                input_tokens += metadata.get("input_tokens", 0)
+                output_tokens += metadata.get("output_tokens", 0)
+    if input_tokens or output_tokens:
+        return input_tokens, output_tokens
+    # Provedores que só informam o uso em llm_output (formato OpenAI)
+    reported = (response.llm_output or {}).get("token_usage") or {}
+    return reported.get("prompt_tokens", 0), reported.get("completion_tokens", 0)
+
+
+class UsageCallback(AsyncCallbackHandler):
+    """Callback LangChain que acumula o uso de cada chamada no TaskUsage da tarefa atual"""
+
+    def __init__(self):
+        self._started: Dict[UUID, Tuple[float, TaskUsage]] = {}
+
+    def _start(self, run_id: UUID):
+        usage = current_usage.get()
+        if usage is not None:
+            self._started[run_id] = (time.time(), usage)
+
+    def _finish(self, run_id: UUID) -> Optional[TaskUsage]:
+        started = self._started.pop(run_id, None)
+        if started is None:
+            return None
+        start, usage = started
+        usage.llm_calls += 1
+        usage.llm_time += time.time() - start
+        return usage
+
+    async def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs):
+        self._start(run_id)
+
+    async def on_llm_start(self, serialized, prompts, *, run_id: UUID, **kwargs):
+        self._start(run_id)
+
+    async def on_llm_end(self, response, *, run_id: UUID, **kwargs):
+        if served_from_cache(response):
+            # Resposta do cache: sem chamada, tempo de espera nem tokens
+            started = self._started.pop(run_id, None)
+            if started is not None:
+                started[1].llm_cache_hits += 1
+            return
+        usage = self._finish(run_id)
+        if usage is not None:
+            input_tokens, output_tokens = token_usage(response)
+            usage.input_tokens += input_tokens
+            usage.output_tokens += output_tokens
+
+    async def on_llm_error(self, error, *, run_id: UUID, **kwargs):
+        usage = self._finish(run_id)
+        if usage is not None:
+            usage.llm_errors += 1
+
+
+def budget_exceeded(
+    usage: TaskUsage,
+    max_tokens: Optional[int] = None,
+    max_steps: Optional[int] = None,
+    max_seconds: Optional[float] = None,
+) -> Optional[str]:
+    """Motivo da parada se algum limite do orçamento foi atingido, senão None"""
+    if max_tokens is not None and usage.total_tokens >= max_tokens:
+        return f"orçamento de tokens esgotado ({usage.total_tokens}/{max_tokens})"
+    if max_steps is not None and usage.steps >= max_steps:
+        return f"orçamento de passos esgotado ({usage.steps}/{max_steps})"
+    if max_seconds is not None and usage.elapsed() >= max_seconds:
+        return f"orçamento de tempo esgotado ({usage.elapsed():.1f}s/{max_seconds:g}s)"
+    return None
+
+
+def extracted_data(contents: List[str]) -> List[Any]:
+    """Objetos/listas JSON encontrados no conteúdo extraído pelo agente (o que não é JSON é ignorado)"""
+    data = []
+    for content in contents:
+        text = EXTRACTED_PREFIX.sub("", content or "").strip()
+        fenced = re.search(r"```(?:json)?\s*(.*?)```", text, re.DOTALL)
+        if fenced:
+            text = fenced.group(1).strip()
+        try:
+            value = json.loads(text)
+        except ValueError:
+            continue
+        if isinstance(value, (dict, list)):
+            data.append(value)
+    return data
+
+
+def partial_result(history, reason: str) -> Dict[str, Any]:
+    """Resultado parcial a partir do histórico do agente: conteúdo extraído e páginas visitadas"""
+    contents = history.extracted_content()
+    return {
+        "partial": True,
+        "reason": reason,
+        "steps": len(history.history),
+        "data": extracted_data(contents),
+        "extracted_content": contents,
+        "urls": [url for url in dict.fromkeys(history.urls()) if url],
+        "errors": [error for error in history.errors() if error],
+    }